@@ -0,0 +1,194 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from lato import checkpoint
+from lato.bodystate import BodyStates
+
+def _random_lato(rng):
+    """simulatereal system with random impulses, start offsets and automation"""
+    import simulatereal
+
+    impulses = [(rng.uniform(-500, 0), rng.uniform(-100, 100)),
+                (rng.uniform(0, 500), rng.uniform(-100, 100))]
+    state = simulatereal.new_simulation(impulses=impulses)
+    for body in state.bodies:
+        body.position += (rng.uniform(-20, 20), rng.uniform(-20, 20))
+
+    automation = state.automation
+    automation.interval = float(rng.uniform(0.5, 3.0))
+    automation.pull_force = float(rng.uniform(automation.min_force, automation.max_force))
+    automation.stop_time = 1e9
+    if rng.random() < 0.8:
+        simulatereal.toggle_auto(state)
+
+    def step(dt):
+        state.current_time += dt
+        simulatereal.step_simulation(state, dt)
+
+    def draw(surface):
+        surface.fill(simulatereal.BACKGROUND)
+        simulatereal.draw_scene(surface, state.hand.position,
+                                [body.position for body in state.bodies],
+                                [shape.radius for shape in state.shapes])
+
+    def pivots():
+        return [state.hand.position] * len(state.bodies)
+
+    radii = [shape.radius for shape in state.shapes]
+    config = {
+        "kind": "lato",
+        "impulses": [list(map(float, impulse)) for impulse in impulses],
+        "automated": automation.is_automated,
+        "interval": automation.interval,
+        "pull_force": automation.pull_force,
+    }
+    return state.bodies, radii, pivots, step, draw, (simulatereal.WIDTH, simulatereal.HEIGHT), config
+
+def _random_spring(rng):
+    """simulate system with random rope, gravity, start positions and kick"""
+    import pymunk
+    import simulate
+
+    gravity = float(rng.uniform(500, 1500))
+    rope_length = float(rng.uniform(simulate.cm_to_px(5), simulate.cm_to_px(30)))
+    rope_stiffness = float(rng.uniform(0.1, 5.0))
+    pull_height = float(rng.uniform(0, 50))
+    positions = {
+        'ball1': (float(rng.uniform(150, 330)), float(rng.uniform(150, 450))),
+        'ball2': (float(rng.uniform(370, 550)), float(rng.uniform(150, 450))),
+    }
+    kick = (float(rng.uniform(-400, 400)), float(rng.uniform(-400, 400)))
+
+    space = pymunk.Space()
+    space.gravity = (0, gravity)
+    balls, anchors, handle = simulate.create_balls(space, positions, rope_length,
+                                                   rope_stiffness, pull_height)
+    balls[0].apply_impulse_at_local_point(kick)
+
+    def step(dt):
+        space.step(dt)
+
+    def draw(surface):
+        simulate.draw_simulation_area(space, surface, balls)
+
+    def pivots():
+        return [anchor.position for anchor in anchors]
+
+    config = {
+        "kind": "spring",
+        "gravity": gravity,
+        "rope_length": rope_length,
+        "rope_stiffness": rope_stiffness,
+        "pull_height": pull_height,
+        "positions": positions,
+        "kick": kick,
+    }
+    return balls, [15, 15], pivots, step, draw, (simulate.SIMULATION_WIDTH, simulate.HEIGHT), config
+
+GENERATORS = {"lato": _random_lato, "spring": _random_spring}
+
+def generate_episode(directory, episode, seed, kind, frames, image_size, frame_stride=2, dt=1/60.0):
+    """Simulate and render one random configuration into one compressed shard.
+
+    Labels are taken at the rendered instant: ball positions and velocities
+    (px, px/s), angle from vertical about each ball's pivot (rad) and its rate,
+    and whether the two balls touch.
+    """
+    import pygame
+
+    pygame.init()
+    bodies, radii, pivots, step, draw, scene_size, config = GENERATORS[kind](np.random.default_rng(seed))
+    scene = pygame.Surface(scene_size)
+    image = pygame.Surface(image_size)
+
+    width, height = image_size
+    images = np.empty((frames, height, width, 3), dtype=np.uint8)
+    times = np.empty(frames, dtype=np.float32)
+    positions = np.empty((frames, len(bodies), 2), dtype=np.float32)
+    velocities = np.empty((frames, len(bodies), 2), dtype=np.float32)
+    angles = np.empty((frames, len(bodies)), dtype=np.float32)
+    angular_velocities = np.empty((frames, len(bodies)), dtype=np.float32)
+    collisions = np.empty(frames, dtype=bool)
+
+    states = BodyStates(bodies)
+    touch_distance = radii[0] + radii[1] + 0.5
+    for i in range(frames):
+        for _ in range(frame_stride):
+            step(dt)
+
+        draw(scene)
+        pygame.transform.smoothscale(scene, image_size, image)
+        images[i] = pygame.surfarray.pixels3d(image).transpose(1, 0, 2)
+
+        times[i] = (i + 1) * frame_stride * dt
+        states.refresh([tuple(pivot) for pivot in pivots()])
+        positions[i] = states.positions
+        velocities[i] = states.velocities
+        angles[i] = np.radians(states.angles)
+        angular_velocities[i] = np.radians(states.angular_velocities)
+        collisions[i] = states.distances[0, 1] <= touch_distance
+
+    path = os.path.join(directory, f"shard_{episode:06d}.npz")
+    np.savez_compressed(
+        path,
+        images=images,
+        times=times,
+        positions=positions,
+        velocities=velocities,
+        angles=angles,
+        angular_velocities=angular_velocities,
+        collisions=collisions,
+        episode=np.full(frames, episode, dtype=np.int32),
+    )
+    return {"episode": episode, "seed": seed, "shard": os.path.basename(path),
+            "frames": frames, "config": config}
+
+def generate_dataset(directory, episodes, frames_per_episode=500, kinds=("lato", "spring"),
+                     image_size=(128, 96), frame_stride=2, seed=0, workers=None):
+    """Generate episodes across worker processes and write a manifest.json next to the shards"""
+    os.makedirs(directory, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    jobs = [(episode, int(rng.integers(2**63)), kinds[episode % len(kinds)])
+            for episode in range(episodes)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=checkpoint.init_worker) as pool:
+        futures = [pool.submit(generate_episode, directory, episode, episode_seed, kind,
+                               frames_per_episode, image_size, frame_stride)
+                   for episode, episode_seed, kind in jobs]
+        shards = [future.result() for future in futures]
+
+    manifest = {
+        "image_size": list(image_size),
+        "frame_stride": frame_stride,
+        "frames": sum(shard["frames"] for shard in shards),
+        "shards": shards,
+    }
+    with open(os.path.join(directory, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a labeled image dataset of lato-lato motion")
+    parser.add_argument("directory")
+    parser.add_argument("--episodes", type=int, default=100)
+    parser.add_argument("--frames", type=int, default=500, help="frames per episode (one shard each)")
+    parser.add_argument("--size", default="128x96", help="WIDTHxHEIGHT of the images")
+    parser.add_argument("--stride", type=int, default=2, help="physics steps between frames")
+    parser.add_argument("--kinds", default="lato,spring")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    started = time.perf_counter()
+    manifest = generate_dataset(args.directory, args.episodes, args.frames, tuple(args.kinds.split(",")),
+                                tuple(int(v) for v in args.size.lower().split("x")),
+                                args.stride, args.seed, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {manifest['frames']} frames in {len(manifest['shards'])} shards "
+          f"({manifest['frames'] / elapsed:.0f} frames/s)")
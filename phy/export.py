@@ -0,0 +1,199 @@
+import argparse
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+class FrameExporter:
+    """Encodes rendered frames on background threads while the simulation keeps going.
+
+    Frames are drawn into a small pool of offscreen surfaces. submit() copies
+    the pixels out in one pass (no view of the surface is left to lock it) and
+    hands the array to the encoders; the surface goes back to the pool once its
+    frame is written. When every surface is still being encoded,
+    frame_surface() blocks, which bounds memory and slows the producer to the
+    encoders' pace.
+
+    fmt "png" writes frame_000000.png, ... using a pool of encoder threads
+    (zlib and Pillow release the GIL). fmt "raw" appends rgb24 frames in order
+    to frames.rgb for ffmpeg:
+        ffmpeg -f rawvideo -pix_fmt rgb24 -s WxH -r FPS -i frames.rgb out.mp4
+    """
+    def __init__(self, directory, size, fps, fmt="png", workers=None, pool_size=8, compress_level=1):
+        import pygame
+
+        if fmt not in ("png", "raw"):
+            raise ValueError(f"Unknown export format: {fmt}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.size = size
+        self.fps = fps
+        self.fmt = fmt
+        self.compress_level = compress_level
+        self.frame_count = 0
+
+        self.free_surfaces = queue.Queue()
+        for _ in range(pool_size):
+            self.free_surfaces.put(pygame.Surface(size))
+
+        # Raw streams must stay in order, so they get a single writer
+        self.workers = 1 if fmt == "raw" else (workers or os.cpu_count() or 1)
+        self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        self.raw_file = open(os.path.join(directory, "frames.rgb"), "wb") if fmt == "raw" else None
+        self.errors = []
+
+    def frame_surface(self):
+        """Free offscreen surface to draw the next frame into"""
+        return self.free_surfaces.get()
+
+    def submit(self, surface):
+        import pygame
+
+        index = self.frame_count
+        self.frame_count += 1
+        # (height, width, 3) rows, copied so the encoders never touch the surface
+        width, height = surface.get_size()
+        frame = np.frombuffer(pygame.image.tobytes(surface, "RGB"), dtype=np.uint8).reshape(height, width, 3)
+        self.pool.submit(self._encode, index, surface, frame)
+
+    def _encode(self, index, surface, frame):
+        try:
+            if self.fmt == "raw":
+                self.raw_file.write(frame.tobytes())
+            else:
+                from PIL import Image
+                path = os.path.join(self.directory, f"frame_{index:06d}.png")
+                Image.fromarray(frame).save(path, compress_level=self.compress_level)
+        except Exception as error:
+            self.errors.append(error)
+        finally:
+            # Frees a place in the pool for the next frame
+            self.free_surfaces.put(surface)
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+        if self.raw_file is not None:
+            self.raw_file.close()
+        if self.errors:
+            raise self.errors[0]
+
+def _present(exporter, frame):
+    """Copy a native-size frame into an export surface, scaling if needed, and submit it"""
+    import pygame
+
+    target = exporter.frame_surface()
+    if frame.get_size() == exporter.size:
+        target.blit(frame, (0, 0))
+    else:
+        pygame.transform.smoothscale(frame, exporter.size, target)
+    exporter.submit(target)
+
+def export_lato(directory, duration, fps=60, size=(800, 600), fmt="png", automated=True,
+                workers=None, physics_dt=1/60.0):
+    """Render simulatereal headlessly to frames, at sim time rather than wall time"""
+    import pygame
+    import simulatereal
+
+    pygame.init()
+    state = simulatereal.new_simulation(graph=simulatereal.GraphData())
+    if automated:
+        simulatereal.toggle_auto(state)
+
+    font = pygame.font.Font(None, 36)
+    buttons = simulatereal.create_controls()
+    frame = pygame.Surface((simulatereal.WIDTH, simulatereal.HEIGHT))
+    exporter = FrameExporter(directory, size, fps, fmt, workers)
+
+    # Physics keeps its fixed step; each frame advances the sim by 1/fps
+    frames = int(round(duration * fps))
+    steps_done = 0
+    for i in range(frames):
+        target_steps = int(round((i + 1) / fps / physics_dt))
+        while steps_done < target_steps:
+            state.current_time += physics_dt
+            simulatereal.step_simulation(state, physics_dt)
+            steps_done += 1
+
+        automation = state.automation
+        simulatereal.draw_frame(frame, font, state.hand.position,
+                                [body.position for body in state.bodies],
+                                [shape.radius for shape in state.shapes], buttons,
+                                simulatereal.info_texts(automation, state.current_time), state.graph,
+                                automation.interval if automation.is_automated else None)
+        _present(exporter, frame)
+
+    exporter.close()
+    return exporter.frame_count
+
+def export_simulate(directory, duration, fps=60, size=(1200, 800), fmt="png", workers=None,
+                    physics_dt=1/60.0, kick=(400, -200)):
+    """Render simulate's spring pendulum headlessly to frames, starting from the setup positions"""
+    import pygame
+    import pymunk
+    import simulate
+
+    pygame.init()
+    space = pymunk.Space()
+    space.gravity = (0, 981)
+    balls, anchors, handle = simulate.create_balls(space, {
+        'ball1': (simulate.SIMULATION_WIDTH/2 - 30, 200),
+        'ball2': (simulate.SIMULATION_WIDTH/2 + 30, 200)
+    })
+    balls[0].apply_impulse_at_local_point(kick)
+    states = simulate.track_balls(balls, anchors)
+
+    sliders, velocity_graph, collision_graph = simulate.create_panel()
+    graphs = [velocity_graph, collision_graph]
+    counter = {"time": 0}
+    space.add_collision_handler(1, 1).begin = lambda arb, space, _: simulate.collision_handler(
+        arb, space, (collision_graph, counter["time"])
+    )
+
+    frame = pygame.Surface((simulate.WIDTH, simulate.HEIGHT))
+    exporter = FrameExporter(directory, size, fps, fmt, workers)
+
+    frames = int(round(duration * fps))
+    steps_done = 0
+    for i in range(frames):
+        target_steps = int(round((i + 1) / fps / physics_dt))
+        while steps_done < target_steps:
+            counter["time"] += 1
+            space.step(physics_dt)
+            states.refresh()
+            velocity_graph.add_data_point(float(states.velocities[0, 1]), float(states.velocities[1, 1]))
+            collision_graph.update(counter["time"])
+            steps_done += 1
+
+        simulate.draw(space, frame, balls, sliders, simulate.collect_stats(states, collision_graph), graphs)
+        _present(exporter, frame)
+
+    exporter.close()
+    return exporter.frame_count
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a simulation as a frame sequence or raw video")
+    parser.add_argument("simulation", choices=["lato", "simulate"])
+    parser.add_argument("directory")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of simulated time")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--size", default=None, help="WIDTHxHEIGHT, defaults to the window size")
+    parser.add_argument("--format", choices=["png", "raw"], default="png")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    # Export never needs a visible window
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+    kwargs = {"fps": args.fps, "fmt": args.format, "workers": args.workers}
+    if args.size:
+        kwargs["size"] = tuple(int(v) for v in args.size.lower().split("x"))
+
+    started = time.perf_counter()
+    if args.simulation == "lato":
+        count = export_lato(args.directory, args.duration, **kwargs)
+    else:
+        count = export_simulate(args.directory, args.duration, **kwargs)
+    elapsed = time.perf_counter() - started
+    print(f"Exported {count} frames in {elapsed:.1f}s ({args.duration / elapsed:.1f}x real time)")
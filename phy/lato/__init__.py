@@ -0,0 +1,49 @@
+"""Physics core of the lato-lato simulations, usable without pygame.
+
+physics     -- pymunk builders and formulas shared by simulate and simulatereal
+bodystate   -- struct-of-arrays positions, velocities and angles of a group of bodies
+simulation  -- simulatereal's state, automation and fixed-step loop
+spectrum    -- streaming oscillation spectrum of θ(t)
+history     -- min/max pyramid over a whole run
+checkpoint  -- capture/restore of a running simulation and parallel forks
+scenario    -- JSON/TOML scenarios run headless (python -m lato)
+cache       -- content-addressed on-disk results of scenario runs
+tuning      -- search for the cheapest solver settings that stay accurate
+boundary    -- adaptive maps of where a run's outcome changes over drive parameters
+live        -- asyncio server streaming packed state frames and taking commands
+response    -- interpolation table of outcomes over simulate's slider ranges
+poincare    -- Poincaré sections of the driven lato-lato, rendered as 2-D histograms
+chaos       -- largest Lyapunov exponent over an ensemble of perturbed starts
+
+Submodules are imported on first use, so `import lato` costs nothing until
+something is actually needed.
+"""
+import importlib
+
+_EXPORTS = {
+    "create_lato_system": "physics",
+    "create_balls": "physics",
+    "calculate_angle": "physics",
+    "calculate_distance": "physics",
+    "px_to_cm": "physics",
+    "cm_to_px": "physics",
+    "calculate_pendulum_energy": "physics",
+    "BodyStates": "bodystate",
+    "AutomationSettings": "simulation",
+    "AngleHistory": "simulation",
+    "SimulationState": "simulation",
+    "new_simulation": "simulation",
+    "step_simulation": "simulation",
+    "run_headless": "simulation",
+    "toggle_pull": "simulation",
+    "toggle_auto": "simulation",
+}
+
+__all__ = sorted(_EXPORTS)
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
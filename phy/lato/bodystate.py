@@ -0,0 +1,58 @@
+import numpy as np
+
+class BodyStates:
+    """Struct-of-arrays view of a group of pymunk bodies, refreshed once per step.
+
+    Each quantity is one NumPy array indexed by body, so stats, graphs and
+    recorders read (or slice) the same arrays instead of asking pymunk body by
+    body. The arrays are updated in place and never replaced; take a copy to
+    keep a value past the next refresh.
+
+        positions           (n, 2) px
+        velocities          (n, 2) px/s
+        speeds              (n,)   px/s
+        pivots              (n, 2) px, the point each body hangs from
+        lengths             (n,)   px, distance from the pivot
+        angles              (n,)   degrees from vertical about the pivot, as calculate_angle
+        angular_velocities  (n,)   degrees/s about the pivot
+        distances           (n, n) px between body centres
+    """
+    def __init__(self, bodies):
+        self.bodies = list(bodies)
+        n = len(self.bodies)
+        # Positions and velocities are views into the one array filled per refresh
+        self.raw = np.zeros((n, 4))
+        self.positions = self.raw[:, :2]
+        self.velocities = self.raw[:, 2:]
+        self.speeds = np.zeros(n)
+        self.pivots = np.zeros((n, 2))
+        self.lengths = np.zeros(n)
+        self.angles = np.zeros(n)
+        self.angular_velocities = np.zeros(n)
+        self.distances = np.zeros((n, n))
+        self._offsets = np.zeros((n, 2))
+
+    def refresh(self, pivots=None):
+        """Read every body in one pass and derive the rest with array operations.
+
+        pivots is one point per body or a single point they all hang from;
+        None keeps the previous ones.
+        """
+        # pymunk has no bulk accessor; this is the only per-body Python left
+        self.raw[:] = [(p.x, p.y, v.x, v.y) for p, v in ((b.position, b.velocity) for b in self.bodies)]
+        if pivots is not None:
+            self.pivots[:] = pivots
+
+        np.hypot(self.velocities[:, 0], self.velocities[:, 1], out=self.speeds)
+        offsets = np.subtract(self.positions, self.pivots, out=self._offsets)
+        dx = offsets[:, 0]
+        dy = offsets[:, 1]
+        np.hypot(dx, dy, out=self.lengths)
+        np.degrees(np.arctan2(dx, dy), out=self.angles)
+        # d/dt atan2(dx, dy) = (dy·vx - dx·vy) / r²
+        rates = (dy * self.velocities[:, 0] - dx * self.velocities[:, 1]) / np.maximum(self.lengths ** 2, 1e-9)
+        np.degrees(rates, out=self.angular_velocities)
+
+        between = self.positions[:, None, :] - self.positions[None, :, :]
+        np.hypot(between[..., 0], between[..., 1], out=self.distances)
+        return self
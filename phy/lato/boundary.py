@@ -0,0 +1,207 @@
+import argparse
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import scenario as scenarios
+from .physics import px_to_cm
+
+# A lato-lato ball swinging further than this from the vertical is going over the top
+MAX_STABLE_ANGLE_DEG = 120
+# A spring pendulum whose rope stretches past this multiple of its length has blown up
+MAX_STABLE_STRETCH = 3.0
+
+def stable(scenario, result):
+    """1 if the run stayed bounded, 0 if it went over the top or blew up"""
+    if result["kind"] == "lato":
+        return int(max(result["max_angles_deg"]) <= MAX_STABLE_ANGLE_DEG)
+    limit = MAX_STABLE_STRETCH * px_to_cm(scenario["rope_length"])
+    return int(result["finite"] and max(result["max_rope_length_cm"]) <= limit)
+
+def clacking(scenario, result):
+    """1 if the balls hit each other at least once"""
+    return int((result["clacks"] if result["kind"] == "lato" else result["collisions"]) > 0)
+
+CLASSIFIERS = {"stable": stable, "clacking": clacking}
+
+def set_parameter(scenario, key, value):
+    """Copy of a scenario with one key set; "automation.interval" reaches into a table"""
+    scenario = dict(scenario)
+    *tables, name = key.split(".")
+    target = scenario
+    for table in tables:
+        target[table] = dict(target.get(table, {}))
+        target = target[table]
+    target[name] = value
+    return scenario
+
+def evaluate(scenario_list, cache=None, workers=None):
+    """Results of a batch of scenarios, through the cache or a process pool"""
+    if cache is not None:
+        from .cache import run_many
+
+        return run_many(scenario_list, cache, workers=workers)[0]
+    if len(scenario_list) <= 1 or workers == 1:
+        return [scenarios.run(scenario) for scenario in scenario_list]
+    from .checkpoint import init_worker
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        return list(pool.map(scenarios.run, scenario_list, chunksize=max(1, len(scenario_list) // 32)))
+
+class BoundaryMap:
+    """Outcome of a scenario over drive parameters: a coarse grid, halved `depth` times where corners disagree.
+
+    axes is a list of (key, low, high), e.g. ("automation.pull_force", 50, 400).
+    """
+    def __init__(self, base, axes, classify=stable, coarse=5, depth=4):
+        self.base = base
+        self.axes = [(key, float(low), float(high)) for key, low, high in axes]
+        self.classify = classify
+        self.coarse = coarse
+        self.depth = depth
+        self.resolution = (coarse - 1) * 2 ** depth + 1  # lattice points per axis
+        self.labels = {}       # lattice point -> class
+        self.leaves = []       # (origin, size, class) of cells whose corners agree
+        self.boundary = []     # (origin, size) of finest cells whose corners differ
+        self.levels = []       # points run per level
+
+    def value(self, point):
+        """Parameter values of a lattice point"""
+        return tuple(low + (high - low) * i / (self.resolution - 1)
+                     for i, (_, low, high) in zip(point, self.axes))
+
+    def scenario(self, point):
+        scenario = dict(self.base)
+        for (key, _, _), value in zip(self.axes, self.value(point)):
+            scenario = set_parameter(scenario, key, value)
+        scenario["name"] = f"{self.base['name']}@" + ",".join(
+            f"{key}={value:g}" for (key, _, _), value in zip(self.axes, self.value(point)))
+        return scenario
+
+    def _corners(self, origin, size):
+        return [tuple(o + size * c for o, c in zip(origin, corner))
+                for corner in itertools.product((0, 1), repeat=len(origin))]
+
+    def _run_batch(self, points, cache, workers):
+        points = sorted(set(points) - set(self.labels))
+        batch = [self.scenario(point) for point in points]
+        for point, scenario, result in zip(points, batch, evaluate(batch, cache, workers)):
+            self.labels[point] = self.classify(scenario, result)
+        self.levels.append(len(points))
+
+    def build(self, cache=None, workers=None, log=None):
+        size = 2 ** self.depth
+        dims = len(self.axes)
+        cells = [tuple(i * size for i in index)
+                 for index in itertools.product(range(self.coarse - 1), repeat=dims)]
+        for level in range(self.depth + 1):
+            self._run_batch([corner for origin in cells for corner in self._corners(origin, size)],
+                            cache, workers)
+            mixed = []
+            for origin in cells:
+                classes = {self.labels[corner] for corner in self._corners(origin, size)}
+                if len(classes) == 1:
+                    self.leaves.append((origin, size, classes.pop()))
+                else:
+                    mixed.append(origin)
+            if log is not None:
+                log(level, len(cells), len(mixed), self.levels[-1])
+            if size == 1:
+                self.boundary = [(origin, 1) for origin in mixed]
+                break
+            size //= 2
+            cells = [tuple(o + size * c for o, c in zip(origin, child))
+                     for origin in mixed for child in itertools.product((0, 1), repeat=dims)]
+        return self
+
+    @property
+    def evaluations(self):
+        return len(self.labels)
+
+    @property
+    def uniform_evaluations(self):
+        """Runs a uniform grid at the finest spacing would take"""
+        return self.resolution ** len(self.axes)
+
+    def grid(self):
+        """Classes on the finest lattice; points inside a uniform cell take its corners' class"""
+        grid = np.full((self.resolution,) * len(self.axes), -1, dtype=np.int8)
+        for origin, size, label in self.leaves:
+            grid[tuple(slice(o, o + size + 1) for o in origin)] = label
+        for point, label in self.labels.items():
+            grid[point] = label
+        return grid
+
+    def boundary_points(self):
+        """Parameter values at the centres of the finest cells the outcome changes in"""
+        return np.array([self.value(tuple(o + 0.5 for o in origin)) for origin, _ in self.boundary])
+
+    def save(self, path):
+        points = sorted(self.labels)
+        np.savez_compressed(
+            path,
+            grid=self.grid(),
+            axes=np.array([key for key, _, _ in self.axes]),
+            ranges=np.array([(low, high) for _, low, high in self.axes]),
+            points=np.array([self.value(point) for point in points]),
+            labels=np.array([self.labels[point] for point in points], dtype=np.int8),
+            boundary=self.boundary_points(),
+        )
+
+    def plot(self, path):
+        """Image of a two-axis map: classes, boundary cells and the points that were run"""
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        (x_key, x_low, x_high), (y_key, y_low, y_high) = self.axes
+        figure, axis = plt.subplots(figsize=(7, 6))
+        masked = np.ma.masked_less(self.grid().T.astype(float), 0)
+        axis.imshow(masked, origin="lower", extent=(x_low, x_high, y_low, y_high),
+                    aspect="auto", cmap="coolwarm", interpolation="nearest", alpha=0.6)
+        points = np.array([self.value(point) for point in self.labels])
+        axis.scatter(points[:, 0], points[:, 1], s=2, c="k")
+        axis.set_xlabel(x_key)
+        axis.set_ylabel(y_key)
+        axis.set_title(f"{self.classify.__name__}: {self.evaluations} runs "
+                       f"(uniform grid: {self.uniform_evaluations})")
+        figure.savefig(path, dpi=120)
+        plt.close(figure)
+
+def _axis(text):
+    key, low, high = text.split(",")
+    return key, float(low), float(high)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m lato.boundary",
+                                     description="Map where a scenario's outcome changes over drive parameters")
+    parser.add_argument("scenario", help="base scenario (.json or .toml)")
+    parser.add_argument("--axis", type=_axis, action="append", required=True,
+                        help="key,low,high, e.g. automation.pull_force,50,400 (give two or more)")
+    parser.add_argument("--classify", choices=sorted(CLASSIFIERS), default="stable")
+    parser.add_argument("--coarse", type=int, default=5, help="points per axis before refining")
+    parser.add_argument("--depth", type=int, default=4, help="refinement levels")
+    parser.add_argument("--cache", help="directory of cached results (see python -m lato --cache)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="boundary.npz")
+    parser.add_argument("--plot", help="also draw a two-axis map to this image")
+    args = parser.parse_args()
+
+    cache = None
+    if args.cache:
+        from .cache import ResultCache
+        cache = ResultCache(args.cache)
+
+    def log(level, cells, mixed, runs):
+        print(f"level {level}: {cells} cells, {mixed} on the boundary, {runs} new runs")
+
+    boundary_map = BoundaryMap(scenarios.load(args.scenario), args.axis, CLASSIFIERS[args.classify],
+                               args.coarse, args.depth).build(cache, args.workers, log)
+    boundary_map.save(args.output)
+    if args.plot:
+        boundary_map.plot(args.plot)
+    print(json.dumps({"runs": boundary_map.evaluations,
+                      "uniform_runs": boundary_map.uniform_evaluations,
+                      "boundary_cells": len(boundary_map.boundary)}))
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import pymunk
+
+from . import scenario as scenarios
+
+# Modules whose code decides what a run produces; editing any of them invalidates the cache
+RESULT_MODULES = ("physics.py", "bodystate.py", "simulation.py", "spectrum.py", "scenario.py")
+
+# Leftover temp files older than this belong to a writer that died
+STALE_TMP_SECONDS = 3600
+
+_code_version = None
+
+def code_version():
+    """Hash of the physics code and pymunk version that results depend on"""
+    global _code_version
+    if _code_version is None:
+        digest = hashlib.sha256(pymunk.version.encode())
+        package = os.path.dirname(os.path.abspath(__file__))
+        for name in RESULT_MODULES:
+            with open(os.path.join(package, name), "rb") as f:
+                digest.update(f.read())
+        _code_version = digest.hexdigest()[:16]
+    return _code_version
+
+def normalize(value):
+    """Numbers as floats and sequences as lists, so 10 and 10.0 or JSON and TOML hash alike"""
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+def scenario_key(scenario):
+    """Content address of a filled scenario: its parameters plus the code version.
+
+    The scenario's name is only a label and is left out, so two files that
+    describe the same run share one entry.
+    """
+    params = normalize({key: value for key, value in scenario.items() if key != "name"})
+    canonical = json.dumps({"params": params, "code": code_version()},
+                           sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+class ResultCache:
+    """Scenario results on disk, addressed by scenario_key().
+
+    An entry is <key>.json with the summary metrics and, when the run was
+    recorded, <key>.npz with the trajectory. Both are written to a temp file and
+    renamed into place, and the .json goes last, so a reader sees a whole entry
+    or none. Any number of processes can share a directory without locks: the
+    worst a race does is run the same scenario twice or miss an entry that is
+    being evicted.
+
+    Reads refresh an entry's mtime. Once the directory grows past max_bytes the
+    least recently used entries are deleted.
+    """
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, key[:2], f"{key}{extension}")
+
+    def get(self, key, trajectory=False):
+        """Cached result for key, or None. trajectory=True also needs the recorded trajectory."""
+        path = self._path(key, ".json")
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            if trajectory:
+                entry["result"]["trajectory"] = self._load_trajectory(key)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # Not there, evicted meanwhile, or no trajectory was recorded
+            return None
+        return entry["result"]
+
+    def _load_trajectory(self, key):
+        import numpy as np
+
+        with np.load(self._path(key, ".npz")) as data:
+            return {name: data[name].tolist() for name in data.files}
+
+    def put(self, key, result):
+        """Store a result; its "trajectory", if any, goes to the .npz next to it"""
+        os.makedirs(os.path.dirname(self._path(key, "")), exist_ok=True)
+        result = dict(result)
+        trajectory = result.pop("trajectory", None)
+        if trajectory is not None:
+            import numpy as np
+
+            self._write(key, ".npz", lambda f: np.savez(
+                f, **{name: np.asarray(values, dtype=np.float64) for name, values in trajectory.items()}))
+        entry = {"key": key, "code_version": code_version(), "created": time.time(), "result": result}
+        self._write(key, ".json", lambda f: f.write(json.dumps(entry).encode()))
+        self.evict()
+
+    def _write(self, key, extension, write):
+        path = self._path(key, extension)
+        tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+
+    def _entries(self):
+        """(mtime, size, paths) per entry, plus stale temp files, found by scanning the directory"""
+        entries = {}
+        stale = []
+        now = time.time()
+        for bucket in os.scandir(self.directory):
+            if not bucket.is_dir():
+                continue
+            for item in os.scandir(bucket.path):
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                if item.name.endswith(".tmp"):
+                    if now - stat.st_mtime > STALE_TMP_SECONDS:
+                        stale.append(item.path)
+                    continue
+                key, extension = os.path.splitext(item.name)
+                mtime, size, paths = entries.get(key, (0.0, 0, []))
+                if extension == ".json":
+                    mtime = stat.st_mtime
+                entries[key] = (mtime, size + stat.st_size, paths + [item.path])
+        return entries, stale
+
+    def size(self):
+        entries, _ = self._entries()
+        return sum(size for _, size, _ in entries.values())
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits in max_bytes"""
+        entries, stale = self._entries()
+        total = sum(size for _, size, _ in entries.values())
+        removals = stale
+        # Oldest first; a trajectory without its .json (mtime 0) is a half entry and goes first
+        for mtime, size, paths in sorted(entries.values(), key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            total -= size
+            # The .json goes first so the entry disappears before its trajectory does
+            removals.extend(sorted(paths, key=lambda path: not path.endswith(".json")))
+        _remove(removals)
+
+    def clear(self):
+        entries, stale = self._entries()
+        _remove(stale + [path for _, _, paths in entries.values() for path in paths])
+
+def _remove(paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # Another process got there first
+            pass
+
+def cached_run(scenario, cache, record=False, on_first_step=None):
+    """scenarios.run() through the cache: only a miss actually simulates"""
+    key = scenario_key(scenario)
+    result = cache.get(key, trajectory=record)
+    if result is None:
+        result = scenarios.run(scenario, on_first_step, record)
+        cache.put(key, result)
+    # The cached entry may have been stored under another name
+    result["name"] = scenario["name"]
+    return result
+
+def _run_worker(scenario, directory, max_bytes, record):
+    return cached_run(scenario, ResultCache(directory, max_bytes), record)
+
+def run_many(scenario_list, cache, record=False, workers=None, on_first_step=None):
+    """Run a sweep of scenarios, simulating only the ones the cache does not hold.
+
+    Hits are answered in this process. Several misses go to worker processes,
+    which store their results in the shared cache directory as they finish.
+    Returns the results in order and how many had to be simulated.
+    """
+    results = [None] * len(scenario_list)
+    misses = []
+    for i, scenario in enumerate(scenario_list):
+        result = cache.get(scenario_key(scenario), trajectory=record)
+        if result is None:
+            misses.append(i)
+        else:
+            result["name"] = scenario["name"]
+            results[i] = result
+
+    if len(misses) == 1 or workers == 1:
+        for i in misses:
+            results[i] = cached_run(scenario_list[i], cache, record, on_first_step)
+    elif misses:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {i: pool.submit(_run_worker, scenario_list[i], cache.directory, cache.max_bytes, record)
+                       for i in misses}
+            for i, future in futures.items():
+                results[i] = future.result()
+    return results, len(misses)
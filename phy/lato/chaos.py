@@ -0,0 +1,173 @@
+import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pymunk import Vec2d
+
+from . import checkpoint
+
+# Angular velocities enter the separation norm multiplied by this time (s), so
+# angle and angular velocity differences have comparable size
+TIME_SCALE = 0.1
+
+def state_vector(state):
+    """Phase-space point of all balls: (θ, θ̇·TIME_SCALE) per ball about the hand.
+
+    Working in angles rather than x/y keeps perturbations on the string's
+    constraint, so the pin joint solver never adds its own correction kicks.
+    """
+    hand = state.hand.position
+    values = []
+    for body in state.bodies:
+        offset = body.position - hand
+        radius = offset.length
+        angle = math.atan2(offset.x, offset.y)
+        tangent = Vec2d(offset.y, -offset.x) / radius
+        values.extend((angle, body.velocity.dot(tangent) / radius * TIME_SCALE))
+    return np.array(values)
+
+def phase_offset(vector, reference):
+    """vector - reference, each angle difference wrapped into [-π, π) so a swing through the top is no jump"""
+    offset = vector - reference
+    offset[0::2] = (offset[0::2] + math.pi) % (2 * math.pi) - math.pi
+    return offset
+
+def set_state_vector(state, vector):
+    """Inverse of state_vector; string lengths and radial velocities are kept"""
+    hand = state.hand.position
+    for i, body in enumerate(state.bodies):
+        angle, scaled_angular_velocity = vector[2*i:2*i + 2]
+        offset = body.position - hand
+        radius = offset.length
+        radial = offset / radius
+        radial_speed = body.velocity.dot(radial)
+
+        direction = Vec2d(math.sin(angle), math.cos(angle))
+        tangent = Vec2d(direction.y, -direction.x)
+        body.position = hand + direction * radius
+        body.velocity = (direction * radial_speed
+                         + tangent * (scaled_angular_velocity / TIME_SCALE * radius))
+
+def perturbed_simulation(rng, impulse_sigma, position_sigma, automated=True):
+    """New simulation with the default impulses and ball positions jittered"""
+    from . import simulation
+
+    impulses = [(-300 + rng.normal(0, impulse_sigma), rng.normal(0, impulse_sigma)),
+                (300 + rng.normal(0, impulse_sigma), rng.normal(0, impulse_sigma))]
+    state = simulation.new_simulation(impulses=impulses)
+    for body in state.bodies:
+        body.position += tuple(rng.normal(0, position_sigma, 2))
+    if automated:
+        simulation.toggle_auto(state)
+    return state
+
+def _run_chunk(seeds, duration, dt, impulse_sigma, position_sigma, separation,
+               renorm_every, sample_every, automated):
+    """Run one batch of ensemble members in lockstep.
+
+    Each member is a pair: a perturbed reference run and a shadow run kept
+    `separation` away from it. Every `renorm_every` steps the growth of the
+    pair's distance is logged and the shadow is pulled back along the same
+    direction (Benettin's method), so the sum of logs over time is the largest
+    Lyapunov exponent.
+    """
+    from . import simulation
+
+    baseline = perturbed_simulation(np.random.default_rng(0), 0, 0, automated)
+
+    references = []
+    shadows = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        reference = perturbed_simulation(rng, impulse_sigma, position_sigma, automated)
+        shadow = checkpoint.restore(checkpoint.capture(reference))
+        direction = rng.normal(size=len(reference.bodies) * 2)
+        direction *= separation / np.linalg.norm(direction)
+        set_state_vector(shadow, state_vector(reference) + direction)
+        references.append(reference)
+        shadows.append(shadow)
+
+    log_growth = np.zeros(len(seeds))
+    distances = []
+
+    steps = int(round(duration / dt))
+    for step in range(1, steps + 1):
+        for state in [baseline] + references + shadows:
+            state.current_time += dt
+            simulation.step_simulation(state, dt)
+
+        if step % renorm_every == 0:
+            for i, (reference, shadow) in enumerate(zip(references, shadows)):
+                reference_vector = state_vector(reference)
+                offset = phase_offset(state_vector(shadow), reference_vector)
+                distance = np.linalg.norm(offset)
+                if distance == 0:
+                    # Both copies fell into the same state (e.g. resting contact)
+                    offset = np.full_like(offset, separation / math.sqrt(len(offset)))
+                    distance = separation
+                log_growth[i] += math.log(distance / separation)
+                set_state_vector(shadow, reference_vector + offset * (separation / distance))
+
+        if step % sample_every == 0:
+            baseline_vector = state_vector(baseline)
+            distances.append([np.linalg.norm(phase_offset(state_vector(reference), baseline_vector))
+                              for reference in references])
+
+    elapsed = (steps // renorm_every) * renorm_every * dt
+    return log_growth / elapsed, np.array(distances).T
+
+def run_ensemble(members=1000, duration=10.0, dt=1/60.0, impulse_sigma=5.0, position_sigma=0.5,
+                 separation=1e-3, renorm_every=10, sample_every=6, automated=True,
+                 seed=0, workers=None, chunk_size=50):
+    """Estimate the largest Lyapunov exponent over an ensemble of perturbed starts.
+
+    Returns a dict with the per-member exponents (1/s), their summary
+    statistics and how far the ensemble has spread from the unperturbed run
+    over time (median and 90th percentile of the phase-space distance).
+
+    Ball impacts are discontinuous at the step level: a perturbation that moves
+    a collision by one step opens a gap of order v·dt however small it was. Too
+    small a `separation` therefore reports impact noise as chaos, so compare a
+    couple of separations before trusting the number.
+    """
+    seeds = [seed * 1_000_003 + i + 1 for i in range(members)]
+    chunks = [seeds[i:i + chunk_size] for i in range(0, members, chunk_size)]
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=checkpoint.init_worker) as pool:
+        futures = [pool.submit(_run_chunk, chunk, duration, dt, impulse_sigma, position_sigma,
+                               separation, renorm_every, sample_every, automated)
+                   for chunk in chunks]
+        results = [future.result() for future in futures]
+
+    exponents = np.concatenate([exponents for exponents, _ in results])
+    distances = np.concatenate([distances for _, distances in results])
+    times = (np.arange(distances.shape[1]) + 1) * sample_every * dt
+
+    return {
+        "exponents": exponents,
+        "mean": float(exponents.mean()),
+        "std": float(exponents.std()),
+        "median": float(np.median(exponents)),
+        "chaotic_fraction": float(np.mean(exponents > 0)),
+        "times": times,
+        "spread_median": np.median(distances, axis=0),
+        "spread_p90": np.percentile(distances, 90, axis=0),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m lato.chaos",
+                                     description="Largest Lyapunov exponent over an ensemble of perturbed starts")
+    parser.add_argument("--members", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=10.0, help="simulated seconds per member")
+    parser.add_argument("--separation", type=float, default=1e-3, help="shadow run distance in phase space")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    result = run_ensemble(members=args.members, duration=args.duration, separation=args.separation,
+                          seed=args.seed, workers=args.workers)
+    print(f"Largest Lyapunov exponent: {result['mean']:.3f} ± {result['std']:.3f} 1/s "
+          f"(median {result['median']:.3f}, {result['chaotic_fraction']:.0%} positive)")
+    for t, median, p90 in list(zip(result["times"], result["spread_median"], result["spread_p90"]))[::10]:
+        print(f"t={t:5.1f}s  spread median={median:9.3f}  p90={p90:9.3f}")
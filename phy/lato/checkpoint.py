@@ -0,0 +1,166 @@
+import copy
+import math
+import os
+import pickle
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+CHECKPOINT_VERSION = 1
+
+def capture(state):
+    """Snapshot a SimulationState into plain data (safe to keep, pickle or send to workers)
+
+    pymunk does not pickle its contact caches, so a restored run can differ very
+    slightly from the uninterrupted one. Every restore of the same checkpoint
+    behaves identically though, which is what forks rely on.
+    """
+    graph = state.graph
+    # Pickle the pymunk objects in one go so bodies, shapes and joints keep sharing references
+    physics = pickle.dumps((state.space, state.hand, state.bodies, state.shapes, state.strings))
+
+    return {
+        "version": CHECKPOINT_VERSION,
+        "physics": physics,
+        "automation": dict(vars(state.automation)),
+        "graph": {
+            "max_points": graph.max_points,
+            "times": list(graph.times),
+            "angles": list(graph.angles),
+            "start_time": graph.start_time,
+            "window_start": graph.window_start,
+            "spectrum": graph.spectrum.get_state(),
+            "history": copy.deepcopy(graph.history),
+        },
+        "loop": {
+            "current_time": state.current_time,
+            "original_y": state.original_y,
+            "target_y": state.target_y,
+            "prev_angles": state.prev_angles.tolist(),
+            "angular_velocities": state.angular_velocities.tolist(),
+            "substeps": state.substeps,
+        },
+    }
+
+def restore(checkpoint, state=None):
+    """Rebuild a checkpoint into state (in place), or into a new SimulationState"""
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version: {checkpoint.get('version')}")
+
+    space, hand, bodies, shapes, strings = pickle.loads(checkpoint["physics"])
+
+    if state is None:
+        from .simulation import SimulationState
+        state = SimulationState(space, hand, bodies, shapes, strings)
+    else:
+        state.space = space
+        state.hand = hand
+        state.bodies = bodies
+        state.shapes = shapes
+        state.strings = strings
+
+    # Keep the existing objects so anything holding on to them stays in sync
+    vars(state.automation).update(checkpoint["automation"])
+
+    restore_graph(state.graph, checkpoint["graph"])
+
+    loop = checkpoint["loop"]
+    state.current_time = loop["current_time"]
+    state.original_y = loop["original_y"]
+    state.target_y = loop["target_y"]
+    state.prev_angles = loop["prev_angles"]
+    state.angular_velocities = loop["angular_velocities"]
+    state.substeps = loop.get("substeps", 1)
+
+    return state
+
+def restore_graph(graph, graph_data):
+    """Load the "graph" part of a checkpoint into an AngleHistory (or GraphData)
+
+    The sample window takes the checkpoint's length, whatever the graph had.
+    """
+    graph.max_points = graph_data["max_points"]
+    graph.times = deque(graph_data["times"], maxlen=graph.max_points)
+    graph.angles = deque(graph_data["angles"], maxlen=graph.max_points)
+    graph.start_time = graph_data["start_time"]
+    graph.window_start = graph_data["window_start"]
+    graph.spectrum.set_state(graph_data["spectrum"])
+    graph.history = copy.deepcopy(graph_data["history"])
+
+def save(checkpoint, path):
+    """Write a checkpoint to disk (atomically, so a crash never leaves half a file)"""
+    # A temp file of its own, so savers racing to one path never write into each other's
+    descriptor, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                            prefix=f"{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def load(path):
+    """Read a checkpoint written by save()"""
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+def init_worker():
+    """Process pool initializer: workers never open a real window"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+def run_variant(checkpoint, variant, duration, dt=1/60.0):
+    """Restore a checkpoint, apply a variant and run it headless.
+
+    A variant is a dict with optional keys:
+        name        -- label returned with the result
+        automation  -- AutomationSettings attributes to override
+        events      -- list of (time, action) with time in seconds after the
+                       checkpoint and action "pull" or "auto" (the two buttons)
+
+    With a dt other than the checkpointed run's, the spectrum starts over at 1/dt.
+    """
+    from . import simulation
+
+    state = restore(checkpoint)
+    vars(state.automation).update(variant.get("automation", {}))
+    # The spectrum gets one sample per step from here on; samples at another rate cannot mix in
+    if not math.isclose(state.graph.spectrum.sample_rate, 1.0 / dt):
+        state.graph.reset_spectrum(1.0 / dt)
+
+    start_time = state.current_time
+    events = sorted(variant.get("events", []))
+    actions = {"pull": simulation.toggle_pull, "auto": simulation.toggle_auto}
+    for _, action in events:
+        if action not in actions:
+            raise ValueError(f"Unknown action: {action}")
+
+    times = []
+    angles = []
+
+    def on_step(state):
+        times.append(state.current_time - start_time)
+        angles.append(float(state.prev_angles[0]))
+
+    next_event = 0
+    steps = int(round(duration / dt))
+    for _ in range(steps):
+        while next_event < len(events) and events[next_event][0] <= state.current_time - start_time:
+            actions[events[next_event][1]](state)
+            next_event += 1
+        simulation.run_headless(state, dt, dt, on_step)
+
+    return {
+        "name": variant.get("name"),
+        "times": times,
+        "angles": angles,
+        "spectrum": state.graph.spectrum.summary(),
+        "checkpoint": capture(state),
+    }
+
+def fork(checkpoint, variants, duration, dt=1/60.0, workers=None):
+    """Branch several variants from one checkpoint and run them in parallel processes"""
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        futures = [pool.submit(run_variant, checkpoint, variant, duration, dt)
+                   for variant in variants]
+        return [future.result() for future in futures]
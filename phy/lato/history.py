@@ -0,0 +1,153 @@
+import math
+
+import numpy as np
+
+class _Level:
+    """Ring of (start time, min, max) buckets, each covering `bucket_size` samples.
+
+    Every entry is written twice, at i and i + capacity, so the newest
+    `capacity` entries are always one contiguous slice and reads never copy.
+    """
+    def __init__(self, bucket_size, capacity):
+        self.bucket_size = bucket_size
+        self.capacity = capacity
+        self.times = np.zeros(2 * capacity)
+        self.mins = np.zeros(2 * capacity)
+        self.maxs = np.zeros(2 * capacity)
+        self.head = 0
+        self.count = 0
+        self.total = 0  # Buckets ever completed
+
+        # Bucket still being filled
+        self.pending_time = None
+        self.pending_min = math.inf
+        self.pending_max = -math.inf
+        self.pending_samples = 0
+
+    def append(self, time, low, high):
+        index = (self.head + self.count) % self.capacity
+        if self.count == self.capacity:
+            self.head = (self.head + 1) % self.capacity
+        else:
+            self.count += 1
+        for i in (index, index + self.capacity):
+            self.times[i] = time
+            self.mins[i] = low
+            self.maxs[i] = high
+        self.total += 1
+
+    def add_sample(self, time, value):
+        if self.pending_time is None:
+            self.pending_time = time
+        self.pending_min = min(self.pending_min, value)
+        self.pending_max = max(self.pending_max, value)
+        self.pending_samples += 1
+        if self.pending_samples == self.bucket_size:
+            self.append(self.pending_time, self.pending_min, self.pending_max)
+            self.pending_time = None
+            self.pending_min = math.inf
+            self.pending_max = -math.inf
+            self.pending_samples = 0
+
+    def view(self):
+        """Completed buckets oldest first (views into the ring, not copies)"""
+        end = self.head + self.count
+        return self.times[self.head:end], self.mins[self.head:end], self.maxs[self.head:end]
+
+    def oldest_time(self):
+        if self.count:
+            return self.times[self.head]
+        return self.pending_time
+
+class HistoryPyramid:
+    """Min/max decimated history of one signal over an unbounded run.
+
+    Level 0 keeps the newest `capacity` raw samples; level k keeps `capacity`
+    buckets of factor**k samples each. A level is only added once the one
+    below starts forgetting, so memory grows with log(run length).
+    """
+    def __init__(self, capacity=1024, factor=4):
+        if capacity % factor:
+            raise ValueError("capacity must be a multiple of factor")
+        self.capacity = capacity
+        self.factor = factor
+        self.levels = [_Level(1, capacity)]
+        self.sample_count = 0
+
+    def add_sample(self, time, value):
+        self.sample_count += 1
+        for level in self.levels:
+            level.add_sample(time, value)
+
+        # Seed a coarser level from the top one just before it starts dropping data
+        top = self.levels[-1]
+        if top.total == self.capacity and top.pending_samples == 0:
+            self._add_level(top)
+
+    def _add_level(self, top):
+        level = _Level(top.bucket_size * self.factor, self.capacity)
+        times, mins, maxs = top.view()
+        for i in range(0, len(times), self.factor):
+            level.append(times[i], mins[i:i + self.factor].min(), maxs[i:i + self.factor].max())
+        self.levels.append(level)
+
+    def start_time(self):
+        return self.levels[-1].oldest_time()
+
+    def end_time(self):
+        level = self.levels[0]
+        if level.pending_samples:
+            return level.pending_time
+        if level.count:
+            return level.times[level.head + level.count - 1]
+        return None
+
+    def choose_level(self, start, end, columns):
+        """Finest level that still reaches back to `start` with at most ~2 buckets per column"""
+        for level in self.levels:
+            oldest = level.oldest_time()
+            if oldest is None or oldest > start:
+                continue
+            first, last = np.searchsorted(level.view()[0], (start, end))
+            if last - first <= 2 * columns:
+                return level
+        return self.levels[-1]
+
+    def query(self, start, end, columns):
+        """Min and max per pixel column over [start, end]; NaN where there is no data.
+
+        A bucket spans from its start to the next one's (the last ends with the
+        newest sample) and counts in every column it reaches into, so columns
+        narrower than a bucket never come back empty.
+        """
+        mins = np.full(columns, np.nan)
+        maxs = np.full(columns, np.nan)
+        if end <= start or self.sample_count == 0:
+            return mins, maxs
+
+        level = self.choose_level(start, end, columns)
+        times, level_mins, level_maxs = level.view()
+        # The bucket still being filled holds the newest samples
+        if level.pending_samples:
+            times = np.append(times, level.pending_time)
+            level_mins = np.append(level_mins, level.pending_min)
+            level_maxs = np.append(level_maxs, level.pending_max)
+
+        # Each column takes the buckets from the one holding its left edge to the last starting before its right edge
+        edges = start + (end - start) * np.arange(columns + 1) / columns
+        first = np.maximum(np.searchsorted(times, edges[:-1], side="right") - 1, 0)
+        last = np.searchsorted(times, edges[1:], side="left") - 1
+        last[-1] = np.searchsorted(times, end, side="right") - 1
+        used = (last >= first) & (edges[:-1] <= self.end_time())
+        if used.any():
+            bounds = np.empty(2 * np.count_nonzero(used), dtype=int)
+            bounds[0::2] = first[used]
+            bounds[1::2] = last[used] + 1
+            # Every other reduction is a column; the padding keeps last + 1 a valid index
+            mins[used] = np.minimum.reduceat(np.append(level_mins, np.nan), bounds)[0::2]
+            maxs[used] = np.maximum.reduceat(np.append(level_maxs, np.nan), bounds)[0::2]
+        return mins, maxs
+
+    def memory_bytes(self):
+        return sum(level.times.nbytes + level.mins.nbytes + level.maxs.nbytes
+                   for level in self.levels)
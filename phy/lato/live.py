@@ -0,0 +1,235 @@
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import threading
+
+import numpy as np
+
+from .simulation import adjust_automation, toggle_auto, toggle_pull
+
+# Clients send text lines; every server message is <u32 length><u8 type><payload>
+MESSAGE = struct.Struct("<IB")
+TEXT = 0    # UTF-8 reply to a command
+FRAME = 1   # one packed state frame
+
+# Frame payload: header, then a float32 (bodies, len(FIELDS)) array
+FRAME_HEADER = struct.Struct("<IdH")  # step, simulated time (s), bodies
+FIELDS = ("x", "y", "vx", "vy", "pivot_x", "pivot_y", "angle", "angular_velocity")
+
+DEFAULT_ADDRESS = "tcp://127.0.0.1:8765"
+
+# simulatereal's +/- limits for the automation settings a client may set
+AUTOMATION_LIMITS = {"interval": (0.5, 10.0), "stop_time": (1.0, 30.0), "pull_force": (None, None)}
+
+def _set(name, value):
+    """set NAME VALUE: like pressing +/- until the setting reaches value (or its limit)"""
+    if name not in AUTOMATION_LIMITS:
+        raise ValueError(f"unknown setting {name} (one of {', '.join(AUTOMATION_LIMITS)})")
+    value = float(value)
+    low, high = AUTOMATION_LIMITS[name]
+    return lambda state: adjust_automation(state, name, value - getattr(state.automation, name), low, high)
+
+# Commands for a lato-lato SimulationState: each parses its arguments and
+# returns fn(state), which the simulation runs between two steps
+LATO_COMMANDS = {
+    "pull": lambda: toggle_pull,
+    "auto": lambda: toggle_auto,
+    "set": _set,
+}
+
+def pack_frame(step, time, states):
+    """Frame payload from a BodyStates"""
+    columns = np.empty((len(states.bodies), len(FIELDS)), dtype=np.float32)
+    columns[:, 0:2] = states.positions
+    columns[:, 2:4] = states.velocities
+    columns[:, 4:6] = states.pivots
+    columns[:, 6] = states.angles
+    columns[:, 7] = states.angular_velocities
+    return FRAME_HEADER.pack(step, time, len(columns)) + columns.tobytes()
+
+def unpack_frame(payload):
+    """(step, time, {field: array over bodies}) of a frame payload"""
+    step, time, bodies = FRAME_HEADER.unpack_from(payload)
+    columns = np.frombuffer(payload, np.float32, bodies * len(FIELDS), FRAME_HEADER.size)
+    columns = columns.reshape(bodies, len(FIELDS))
+    return step, time, {name: columns[:, i] for i, name in enumerate(FIELDS)}
+
+def _message(kind, payload):
+    return MESSAGE.pack(len(payload), kind) + payload
+
+async def read_message(reader):
+    """Next (type, payload) from the server, or None once it hangs up"""
+    try:
+        length, kind = MESSAGE.unpack(await reader.readexactly(MESSAGE.size))
+        return kind, await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+
+def parse_address(address):
+    """("unix", path) or ("tcp", (host, port)) from unix:/path, tcp://host:port or host:port"""
+    if address.startswith("unix:"):
+        return "unix", address[len("unix:"):]
+    host, _, port = address.removeprefix("tcp://").rpartition(":")
+    return "tcp", (host or "127.0.0.1", int(port))
+
+async def open_connection(address):
+    kind, where = parse_address(address)
+    if kind == "unix":
+        return await asyncio.open_unix_connection(where)
+    return await asyncio.open_connection(*where)
+
+class _Client:
+    def __init__(self, writer, queue_frames):
+        self.writer = writer
+        self.every = 0  # send every n-th step; 0 until the client subscribes
+        self.frames = asyncio.Queue(queue_frames)
+        self.sent = 0
+        self.dropped = 0
+
+class StateServer:
+    """Streams packed state frames to local clients from its own asyncio thread and takes their commands.
+
+    commands maps a name to a parser of its arguments; send() gets what the parser returns.
+    """
+    def __init__(self, address, commands, send, queue_frames=8, write_buffer=1 << 16):
+        self.address = address
+        self.commands = commands
+        self.send = send
+        self.queue_frames = queue_frames
+        self.write_buffer = write_buffer
+        self.clients = set()
+        self.step = 0
+        self.loop = None
+        self.error = None
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            raise self.error
+        return self
+
+    def stop(self):
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._stopping.set)
+            self.thread.join()
+
+    def publish(self, time, states):
+        """Called by the simulation after every step; reads states afresh for a frame"""
+        self.step += 1
+        # A copy, since the loop thread adds and removes clients
+        wanted = [client for client in tuple(self.clients)
+                  if client.every and self.step % client.every == 0]
+        if not wanted:
+            return
+        message = _message(FRAME, pack_frame(self.step, time, states.refresh()))
+        self.loop.call_soon_threadsafe(self._deliver, wanted, message)
+
+    def _deliver(self, clients, message):
+        for client in clients:
+            try:
+                client.frames.put_nowait(message)
+            except asyncio.QueueFull:
+                client.dropped += 1
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except OSError as error:
+            # Could not listen (address in use...): start() raises it
+            self.error = error
+            self.ready.set()
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        kind, where = parse_address(self.address)
+        if kind == "unix":
+            server = await asyncio.start_unix_server(self._handle, where)
+        else:
+            server = await asyncio.start_server(self._handle, *where)
+        self.ready.set()
+        async with server:
+            await self._stopping.wait()
+            # Hanging up ends each handler's read loop, so they finish on their own;
+            # abort, since a client that stopped reading would never take the rest
+            handlers = [client.handler for client in self.clients]
+            for client in self.clients:
+                client.writer.transport.abort()
+            await asyncio.gather(*handlers, return_exceptions=True)
+        if kind == "unix":
+            os.remove(where)
+
+    async def _send_frames(self, client):
+        while True:
+            client.writer.write(await client.frames.get())
+            # Blocks this client only; meanwhile its queue fills and frames drop
+            await client.writer.drain()
+            client.sent += 1
+
+    async def _handle(self, reader, writer):
+        writer.transport.set_write_buffer_limits(self.write_buffer)
+        client = _Client(writer, self.queue_frames)
+        client.handler = asyncio.current_task()
+        self.clients.add(client)
+        sender = asyncio.create_task(self._send_frames(client))
+        try:
+            while line := await reader.readline():
+                words = line.decode(errors="replace").split()
+                if words:
+                    writer.write(_message(TEXT, self._command(client, words).encode()))
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            writer.close()
+
+    def _command(self, client, words):
+        name, args = words[0], words[1:]
+        try:
+            if name == "every":
+                client.every = max(0, int(args[0]))
+                return f"ok every {client.every}"
+            if name == "stats":
+                return f"ok sent {client.sent} dropped {client.dropped}"
+            if name not in self.commands:
+                return f"error unknown command {name}"
+            self.send(self.commands[name](*args))
+            return "ok"
+        except (ValueError, TypeError, IndexError) as error:
+            return f"error {error}"
+
+async def _monitor(address, every, commands):
+    reader, writer = await open_connection(address)
+    for command in commands:
+        writer.write(command.encode() + b"\n")
+    writer.write(f"every {every}\n".encode())
+    await writer.drain()
+    while (message := await read_message(reader)) is not None:
+        kind, payload = message
+        if kind == TEXT:
+            print(payload.decode(), file=sys.stderr)
+            continue
+        step, time, fields = unpack_frame(payload)
+        angles = " ".join(f"{angle:7.2f}" for angle in fields["angle"])
+        print(f"{step:8d} {time:8.3f}s  θ {angles}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m lato.live",
+                                     description="Print the state stream of a running simulation")
+    parser.add_argument("address", nargs="?", default=DEFAULT_ADDRESS,
+                        help="unix:/path/to/socket or tcp://host:port")
+    parser.add_argument("--every", type=int, default=6, help="print every n-th physics step")
+    parser.add_argument("--send", action="append", default=[],
+                        help='command to send first, e.g. "auto" or "set pull_force 300"')
+    args = parser.parse_args()
+    try:
+        asyncio.run(_monitor(args.address, args.every, args.send))
+    except KeyboardInterrupt:
+        pass
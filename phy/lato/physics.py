@@ -0,0 +1,240 @@
+import math
+
+import pymunk
+
+# simulatereal's window, which the lato-lato system is laid out in
+WIDTH = 800
+HEIGHT = 600
+# simulate's spring pendulum area (left of its control panel)
+SIMULATION_WIDTH = 700
+PIXELS_PER_CM = 10  # 10 pixels = 1 cm
+CM_PER_PIXEL = 1/PIXELS_PER_CM
+
+BALL_RED = (255, 50, 50)
+RED = BALL_RED
+
+# Length of the lato-lato strings (px)
+LATO_ROPE_LENGTH = 150
+
+# Bodies that stay below the idle speed this long are put to sleep by pymunk
+SLEEP_TIME_THRESHOLD = 0.5
+
+def create_lato_system(rope_length=LATO_ROPE_LENGTH):
+    bodies = []
+    shapes = []
+    strings = []
+    
+    # Center the hand position
+    hand = pymunk.Body(body_type=pymunk.Body.STATIC)
+    hand.position = (WIDTH//2, HEIGHT//3)  # Moved down for better centering
+    
+    # Create two lato-lato balls with different sizes
+    spread = 80  # Reduced spread for more centered look
+    start_x = hand.position.x - spread/2
+    
+    # Ball sizes and positions
+    ball_configs = [
+        {"radius": 25, "y_offset": rope_length},  # Closer/larger ball
+        {"radius": 25, "y_offset": rope_length}   # Further/smaller ball
+    ]
+    
+    for i, config in enumerate(ball_configs):
+        mass = 1
+        radius = config["radius"]
+        moment = pymunk.moment_for_circle(mass, 0, radius)
+        body = pymunk.Body(mass, moment)
+        
+        body.position = (start_x + (i * spread), hand.position.y + config["y_offset"])
+        
+        shape = pymunk.Circle(body, radius)
+        shape.elasticity = 0
+        shape.friction = 0.5
+        shape.color = RED
+        
+        string = pymunk.PinJoint(hand, body)
+        
+        bodies.append(body)
+        shapes.append(shape)
+        strings.append(string)
+    
+    return hand, bodies, shapes, strings
+
+def create_boundaries(space):
+    """Ground and side walls of the lato-lato window (not added to the space)"""
+    # Ground
+    ground = pymunk.Segment(space.static_body, (0, HEIGHT-10), (WIDTH, HEIGHT-10), 5)
+    ground.elasticity = 0.8
+    ground.friction = 0.5
+    
+    # Walls
+    left_wall = pymunk.Segment(space.static_body, (0, 0), (0, HEIGHT), 5)
+    right_wall = pymunk.Segment(space.static_body, (WIDTH, 0), (WIDTH, HEIGHT), 5)
+    
+    left_wall.elasticity = 0.8
+    right_wall.elasticity = 0.8
+    
+    return [ground, left_wall, right_wall]
+
+def calculate_angle(hand_pos, ball_pos):
+    """Calculate angle from vertical in degrees"""
+    dx = ball_pos.x - hand_pos.x
+    dy = ball_pos.y - hand_pos.y
+    # Calculate angle from vertical (90 degrees offset from atan2)
+    angle = math.degrees(math.atan2(dx, dy))
+    return angle
+
+def calculate_distance(point1, point2):
+    return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
+
+def px_to_cm(pixels):
+    """Convert pixels to centimeters"""
+    return pixels * CM_PER_PIXEL
+
+def cm_to_px(cm):
+    """Convert centimeters to pixels"""
+    return cm * PIXELS_PER_CM
+
+def create_balls(space, initial_pos=None, rope_length=100, rope_stiffness=1.0, pull_height=0,
+                 stiffness_scale=100):
+    """Create balls with enhanced rope physics and pullable top line
+
+    Spring constants are rope_stiffness * stiffness_scale (half that between the balls).
+    """
+    # Create static line segment on top with adjustable height
+    base_height = 100  # Increased base height
+    current_height = base_height - pull_height
+    
+    # Create the top bar as a static body
+    top_bar = pymunk.Body(body_type=pymunk.Body.STATIC)
+    line_segment = pymunk.Segment(
+        top_bar,
+        (100, current_height),  # Extended line length
+        (SIMULATION_WIDTH-100, current_height),
+        5
+    )
+    line_segment.friction = 0.5
+    line_segment.elasticity = 0.5
+    space.add(top_bar, line_segment)
+    
+    # Create anchor points for springs at fixed distances on the line
+    anchor1 = pymunk.Body(body_type=pymunk.Body.STATIC)
+    anchor2 = pymunk.Body(body_type=pymunk.Body.STATIC)
+    anchor1.position = (SIMULATION_WIDTH/2 - 100, current_height)  # Increased spacing
+    anchor2.position = (SIMULATION_WIDTH/2 + 100, current_height)  # Increased spacing
+    
+    # Create balls
+    ball1 = pymunk.Body(1, pymunk.moment_for_circle(1, 0, 15))
+    ball2 = pymunk.Body(1, pymunk.moment_for_circle(1, 0, 15))
+    
+    # Set initial positions
+    if initial_pos and all(isinstance(pos, (tuple, list)) for pos in initial_pos.values()):
+        ball1.position = initial_pos['ball1']
+        ball2.position = initial_pos['ball2']
+    else:
+        ball1.position = (anchor1.position.x, anchor1.position.y + rope_length)
+        ball2.position = (anchor2.position.x, anchor2.position.y + rope_length)
+    
+    shape1 = pymunk.Circle(ball1, 15)
+    shape2 = pymunk.Circle(ball2, 15)
+    
+    for shape in [shape1, shape2]:
+        shape.mass = 3
+        shape.friction = 0.5
+        shape.elasticity = 0.95
+        shape.collision_type = 1
+    
+    space.add(ball1, ball2, shape1, shape2)
+    
+    # Create springs with damping
+    spring1 = pymunk.DampedSpring(
+        anchor1, ball1, 
+        (0, 0), (0, 0), 
+        rope_length, 
+        rope_stiffness * stiffness_scale, 
+        1.0
+    )
+    spring2 = pymunk.DampedSpring(
+        anchor2, ball2, 
+        (0, 0), (0, 0), 
+        rope_length, 
+        rope_stiffness * stiffness_scale, 
+        1.0
+    )
+    
+    # Create rope constraint between balls
+    rope = pymunk.DampedSpring(
+        ball1, ball2, 
+        (0, 0), (0, 0), 
+        100,  # Fixed distance between balls
+        rope_stiffness * stiffness_scale / 2, 
+        0.5
+    )
+    
+    space.add(spring1, spring2, rope)
+    
+    return [ball1, ball2], [anchor1, anchor2], top_bar
+
+def calculate_pendulum_energy(ball, length, gravity=981):
+    """Calculate pendulum energy using formula from section 2.1"""
+    # E = mgl(1-cos θ) + (ml²θ̇²)/2
+    mass = ball.mass
+    angle = math.atan2(ball.position.y - length, ball.position.x - SIMULATION_WIDTH/2)
+    angular_velocity = ball.angular_velocity
+    
+    potential_energy = mass * gravity * length * (1 - math.cos(angle))
+    kinetic_energy = 0.5 * mass * (length**2) * (angular_velocity**2)
+    
+    return potential_energy + kinetic_energy
+
+def check_slack_condition(ball, length, gravity=981):
+    """Check slack condition using formula from section 2.2.1"""
+    # mlθ̇² + mgcos θ > 0
+    mass = ball.mass
+    angle = math.atan2(ball.position.y - length, ball.position.x - SIMULATION_WIDTH/2)
+    angular_velocity = ball.angular_velocity
+    
+    return (mass * length * angular_velocity**2 + mass * gravity * math.cos(angle)) > 0
+
+def calculate_slack_time(ball, length, gravity=981):
+    """Calculate slack time using formula from section 2.2.2"""
+    # t = 4v₀sin θ/g
+    velocity = math.sqrt(ball.velocity.x**2 + ball.velocity.y**2)
+    angle = math.atan2(ball.position.y - length, ball.position.x - SIMULATION_WIDTH/2)
+    
+    return 4 * velocity * math.sin(angle) / gravity
+
+def update_ball_physics(ball, handle, length, stiffness, dt):
+    """Update ball physics using Mathieu's equation from section 2.3"""
+    # -θ̈ = (g - a₀ω²cos ωt)sin θ
+    gravity = 981
+    omega = math.sqrt(gravity/length)  # Natural frequency
+    
+    angle = math.atan2(ball.position.y - handle.position.y, 
+                      ball.position.x - handle.position.x)
+    
+    # Calculate acceleration
+    angular_acceleration = -(gravity/length) * math.sin(angle)
+    angular_acceleration -= (stiffness * omega**2 * math.cos(omega * dt)) * math.sin(angle)
+    
+    # Update angular velocity
+    ball.angular_velocity += angular_acceleration * dt
+    
+    # Update position
+    new_x = handle.position.x + length * math.sin(angle + ball.angular_velocity * dt)
+    new_y = handle.position.y + length * math.cos(angle + ball.angular_velocity * dt)
+    
+    ball.position = pymunk.Vec2d(new_x, new_y)
+
+def enable_sleeping(space):
+    """Let pymunk put resting bodies to sleep so an idle scene costs nothing to step"""
+    space.sleep_time_threshold = SLEEP_TIME_THRESHOLD
+
+def bodies_at_rest(bodies):
+    """True once pymunk has put every body to sleep"""
+    return all(body.is_sleeping for body in bodies)
+
+def wake(bodies):
+    """Wake sleeping bodies, e.g. after moving the static body they hang from"""
+    for body in bodies:
+        if body.is_sleeping:
+            body.activate()
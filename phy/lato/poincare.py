@@ -0,0 +1,192 @@
+import argparse
+import functools
+import json
+import math
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import scenario as scenarios
+
+class SectionRecorder:
+    """(θ, θ̇) of every ball at one phase of the Auto Mode drive, read after each step.
+
+    The automation flips the hand on the first step at least `interval` after
+    the last flip, so its cycles are a whole number of steps and not all the
+    same length. The phase is therefore measured from the step each cycle
+    actually starts in (the hand switching up): the section of cycle k is at
+    start_k + phase * 2 * interval. That time mostly falls between two steps,
+    so the angles and angular velocities there are interpolated linearly
+    between the states before and after it.
+
+    The first `transient` cycles are skipped. points holds one (balls, 2)
+    array of degrees and degrees/s per section.
+    """
+    def __init__(self, state, phase=0.0, transient=0):
+        self.phase = phase
+        self.transient = transient
+        self.cycles = 0
+        self.points = []
+        self._crossings = deque()  # section times of started cycles, not reached yet
+        self._was_up = state.automation.is_up
+        states = state.body_states.refresh()
+        self._time = state.current_time
+        self._angles = states.angles.copy()
+        self._rates = states.angular_velocities.copy()
+
+    def after_step(self, state):
+        automation = state.automation
+        if automation.is_up and not self._was_up:
+            # The hand went up at the start of the step just taken
+            if self.cycles >= self.transient:
+                self._crossings.append(self._time + self.phase * 2 * automation.interval)
+            self.cycles += 1
+        self._was_up = automation.is_up
+
+        states = state.body_states.refresh()
+        time = state.current_time
+        while self._crossings and self._crossings[0] <= time:
+            fraction = (self._crossings.popleft() - self._time) / (time - self._time)
+            # The shorter way round, in case a ball swings through the top
+            turned = (states.angles - self._angles + 180) % 360 - 180
+            self.points.append(np.stack((self._angles + fraction * turned,
+                                         self._rates + fraction * (states.angular_velocities - self._rates)),
+                                        axis=1))
+        self._time = time
+        self._angles[:] = states.angles
+        self._rates[:] = states.angular_velocities
+
+def start_state(scenario, condition):
+    """A driven lato-lato state from a lato scenario, released at condition.
+
+    condition is (θ, θ̇) of each ball in turn, in degrees and degrees/s about
+    the hand. The scenario's physics, rope length and automation settings are
+    used; its impulses and events are not, and the drive never stops.
+    """
+    from .simulation import new_simulation, toggle_auto
+
+    state = new_simulation(impulses=(), rope_length=scenario["rope_length"], sample_rate=1.0 / scenario["dt"])
+    scenarios.apply_physics(state.space, state.shapes, scenario)
+    state.substeps = scenario["substeps"]
+    hand = state.hand.position
+    for body, string, (theta, rate) in zip(state.bodies, state.strings, np.reshape(condition, (-1, 2))):
+        # Along the string (which keeps its length) with the velocity at right angles to it
+        angle = math.radians(theta)
+        body.position = (hand.x + string.distance * math.sin(angle), hand.y + string.distance * math.cos(angle))
+        speed = string.distance * math.radians(rate)
+        body.velocity = (speed * math.cos(angle), -speed * math.sin(angle))
+    vars(state.automation).update(scenario["automation"])
+    state.automation.stop_time = math.inf
+    toggle_auto(state)
+    return state
+
+def run_section(scenario, condition, crossings, phase=0.0, transient=0):
+    """float32 (crossings, balls, 2) section points of one initial condition"""
+    from .simulation import step_simulation
+
+    state = start_state(scenario, condition)
+    recorder = SectionRecorder(state, phase, transient)
+    dt = scenario["dt"]
+    # Cycles run a step long at most, so this many steps always suffice
+    cycle_steps = 2 * (math.ceil(state.automation.interval / dt) + 1)
+    for _ in range((transient + crossings + 1) * cycle_steps):
+        state.current_time += dt
+        step_simulation(state, dt)
+        recorder.after_step(state)
+        if len(recorder.points) >= crossings:
+            break
+    # A run that fell short (it never should) is padded with NaN, which histogram() skips
+    points = np.full((crossings, len(state.bodies), 2), np.nan, dtype=np.float32)
+    if recorder.points:
+        points[:len(recorder.points)] = recorder.points[:crossings]
+    return points
+
+def sample_conditions(count, balls=2, theta=(-90.0, 90.0), rate=(-360.0, 360.0), seed=0):
+    """count random initial conditions, (θ, θ̇) per ball drawn uniformly from the ranges"""
+    rng = np.random.default_rng(seed)
+    low = np.tile((theta[0], rate[0]), balls)
+    high = np.tile((theta[1], rate[1]), balls)
+    return rng.uniform(low, high, size=(count, 2 * balls))
+
+def generate(scenario, conditions, crossings, phase=0.0, transient=0, workers=None):
+    """float32 (runs, crossings, balls, 2) sections of a batch of initial conditions, in parallel"""
+    run = functools.partial(run_section, scenario, crossings=crossings, phase=phase, transient=transient)
+    if len(conditions) <= 1 or workers == 1:
+        return np.stack([run(condition) for condition in conditions])
+    from .checkpoint import init_worker
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        return np.stack(list(pool.map(run, conditions, chunksize=max(1, len(conditions) // 64))))
+
+def histogram(points, bins=(800, 600), extent=None):
+    """Counts of (θ, θ̇) points on a grid, (rows θ̇, columns θ), and the extent they cover.
+
+    One bincount over flat bin indices, which stays fast for tens of millions
+    of points. extent is (θ low, θ high, θ̇ low, θ̇ high) and defaults to the
+    range of the points; points outside it are left out.
+    """
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+    if extent is None:
+        (x_low, y_low), (x_high, y_high) = np.nanmin(points, axis=0), np.nanmax(points, axis=0)
+        extent = (float(x_low), float(x_high), float(y_low), float(y_high))
+    x_bins, y_bins = bins
+    x_low, x_high, y_low, y_high = extent
+    # Fractional bin coordinates in float32; NaN fails every comparison and drops out
+    x = (points[:, 0] - np.float32(x_low)) * np.float32(x_bins / max(x_high - x_low, 1e-9))
+    y = (points[:, 1] - np.float32(y_low)) * np.float32(y_bins / max(y_high - y_low, 1e-9))
+    inside = (x >= 0) & (x <= x_bins) & (y >= 0) & (y <= y_bins)
+    # The top edge belongs to the last bin
+    columns = np.minimum(x[inside].astype(np.int32), x_bins - 1)
+    rows = np.minimum(y[inside].astype(np.int32), y_bins - 1)
+    counts = np.bincount(rows * x_bins + columns, minlength=x_bins * y_bins)
+    return counts.reshape(y_bins, x_bins), extent
+
+def save(path, sections, conditions, scenario, phase, transient):
+    np.savez_compressed(path, sections=sections.astype(np.float32),
+                        conditions=np.asarray(conditions, dtype=np.float32),
+                        scenario=json.dumps(scenario), phase=phase, transient=transient)
+
+def plot(sections, path, ball=0, bins=(800, 600), extent=None, title=None):
+    """Image of one ball's section as log point density"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    counts, extent = histogram(sections[..., ball, :], bins, extent)
+    figure, axis = plt.subplots(figsize=(8, 6))
+    axis.imshow(np.log1p(counts), origin="lower", extent=extent, aspect="auto",
+                cmap="magma", interpolation="nearest")
+    axis.set_xlabel(f"θ{ball + 1} (°)")
+    axis.set_ylabel(f"dθ{ball + 1}/dt (°/s)")
+    axis.set_title(title or f"{counts.sum()} points")
+    figure.savefig(path, dpi=120)
+    plt.close(figure)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m lato.poincare",
+                                     description="Poincaré sections of the driven lato-lato, once per drive cycle")
+    parser.add_argument("scenario", help="lato scenario (.json or .toml) with the automation settings")
+    parser.add_argument("--runs", type=int, default=100, help="random initial conditions")
+    parser.add_argument("--crossings", type=int, default=200, help="section points per run")
+    parser.add_argument("--transient", type=int, default=20, help="drive cycles skipped first")
+    parser.add_argument("--phase", type=float, default=0.0,
+                        help="drive phase of the section, 0 (hand going up) to 1")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="section.npz")
+    parser.add_argument("--plot", help="also draw the first ball's section to this image")
+    parser.add_argument("--bins", type=int, default=800, help="histogram columns (rows are 3/4 of it)")
+    args = parser.parse_args()
+
+    scenario = scenarios.load(args.scenario)
+    if scenario["kind"] != "lato":
+        parser.error("sections need a lato scenario (the spring pendulum has no drive)")
+    conditions = sample_conditions(args.runs, seed=args.seed)
+    sections = generate(scenario, conditions, args.crossings, args.phase, args.transient, args.workers)
+    save(args.output, sections, conditions, scenario, args.phase, args.transient)
+    if args.plot:
+        plot(sections, args.plot, bins=(args.bins, args.bins * 3 // 4),
+             title=f"{scenario['name']}, phase {args.phase:g}: {sections.shape[0] * sections.shape[1]} points")
+    print(json.dumps({"runs": sections.shape[0], "points": sections.shape[0] * sections.shape[1],
+                      "bytes": sections.nbytes}))
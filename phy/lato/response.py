@@ -0,0 +1,180 @@
+import argparse
+import hashlib
+import itertools
+import json
+import os
+
+import numpy as np
+
+from . import scenario as scenarios
+from .boundary import evaluate
+from .cache import code_version, normalize
+from .tuning import DEFAULT_PROFILE
+
+# What the table predicts, per slider setting, for the standard kick
+OUTCOMES = ("period", "collision_rate", "max_swing")
+UNITS = {"period": "s", "collision_rate": "/s", "max_swing": "°"}
+
+# Table points per slider; the lengths and gravity shape the swing the most
+DEFAULT_POINTS = {
+    "gravity": 6,
+    "mass": 3,
+    "elasticity": 3,
+    "friction": 2,
+    "rope_length": 6,
+    "rope_stiffness": 4,
+}
+
+def base_scenario(profile=None, duration=10.0):
+    """The spring scenario every table point varies: simulate's kick under its solver profile"""
+    scenario = {"kind": "spring", "name": "slider_response", "duration": duration, "dt": 1 / 60.0}
+    scenario.update(scenarios.SPRING_DEFAULTS)
+    scenario.update(DEFAULT_PROFILE if profile is None else profile)
+    return scenario
+
+def outcomes(scenario, result):
+    """(period s, collisions per s, largest swing °) of a spring run; NaN where there is none"""
+    if not result["finite"]:
+        return (np.nan,) * len(OUTCOMES)
+    period = result["zero_crossing_period"]
+    return (np.nan if period is None else period,
+            result["collisions"] / scenario["duration"],
+            max(result["max_angles_deg"]))
+
+_table_version = None
+
+def table_version():
+    """Hash of this module: the outcomes and how the grid is laid out are decided here"""
+    global _table_version
+    if _table_version is None:
+        with open(os.path.abspath(__file__), "rb") as f:
+            _table_version = hashlib.sha256(f.read()).hexdigest()[:16]
+    return _table_version
+
+def table_key(base, ranges, points):
+    """What a table was built from: the physics and table code, the base scenario, the ranges and points"""
+    canonical = json.dumps({"code": code_version(), "table": table_version(),
+                            "base": normalize({key: value for key, value in base.items() if key != "name"}),
+                            "ranges": normalize(ranges), "points": points},
+                           sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()[:16]
+
+class ResponseTable:
+    """Outcomes of the spring scenario on a grid over the sliders, for instant lookups.
+
+    ranges maps each slider (a spring scenario key) to its (low, high) and
+    points gives how many evenly spaced values of it are run. Every
+    combination is one run of base; values is a float32 array indexed by the
+    grid point and then the outcome. lookup() interpolates multilinearly
+    between the 2^n grid points around a setting, leaving out the ones whose
+    run produced no value (the system blew up, or swung too slowly to time a
+    period) and reweighting the rest.
+    """
+    def __init__(self, names, ranges, points, values, key):
+        self.names = list(names)
+        self.ranges = np.asarray(ranges, dtype=float)
+        self.points = [int(n) for n in points]
+        self.values = values
+        self.key = key
+        self._corners = np.array(list(itertools.product((0, 1), repeat=len(self.names))))
+
+    @classmethod
+    def build(cls, base, ranges, points=None, cache=None, workers=None):
+        points = dict(DEFAULT_POINTS, **(points or {}))
+        names = list(ranges)
+        counts = [points[name] for name in names]
+        axes = [np.linspace(*ranges[name], count) for name, count in zip(names, counts)]
+        batch = []
+        for setting in itertools.product(*axes):
+            scenario = dict(base, **{name: float(value) for name, value in zip(names, setting)})
+            scenario["name"] = f"{base['name']}@" + ",".join(
+                f"{name}={value:g}" for name, value in zip(names, setting))
+            batch.append(scenario)
+        values = np.array([outcomes(scenario, result)
+                           for scenario, result in zip(batch, evaluate(batch, cache, workers))],
+                          dtype=np.float32).reshape(counts + [len(OUTCOMES)])
+        return cls(names, [ranges[name] for name in names], counts, values,
+                   table_key(base, ranges, {name: points[name] for name in names}))
+
+    def lookup(self, settings):
+        """{outcome: value} interpolated at settings ({slider: value}); NaN where nothing is known"""
+        position = np.array([settings[name] for name in self.names], dtype=float)
+        low, high = self.ranges.T
+        counts = np.array(self.points)
+        scaled = np.clip((position - low) / np.where(high > low, high - low, 1), 0, 1) * (counts - 1)
+        index = np.minimum(scaled.astype(int), counts - 2)
+        fraction = scaled - index
+        corners = self.values[tuple((index + self._corners).T)]  # (2^n, outcomes)
+        weights = np.prod(np.where(self._corners, fraction, 1 - fraction), axis=1)
+        known = np.isfinite(corners)
+        total = (weights[:, None] * known).sum(axis=0)
+        interpolated = (weights[:, None] * np.where(known, corners, 0)).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            interpolated = np.where(total > 0, interpolated / total, np.nan)
+        return {name: float(value) for name, value in zip(OUTCOMES, interpolated)}
+
+    def save(self, path):
+        # Written aside and renamed, so a reader never loads half a table
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(tmp_path, names=np.array(self.names), ranges=self.ranges,
+                            points=np.array(self.points), values=self.values,
+                            outcomes=np.array(OUTCOMES), key=np.array(self.key))
+        os.replace(tmp_path, path)
+        return self
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["names"].tolist(), data["ranges"], data["points"].tolist(),
+                       data["values"], str(data["key"]))
+
+def load_current(path, base, ranges, points=None):
+    """The table at path if it was built from this code, base, ranges and points; else None"""
+    points = dict(DEFAULT_POINTS, **(points or {}))
+    key = table_key(base, ranges, {name: points[name] for name in ranges})
+    try:
+        table = ResponseTable.load(path)
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+    return table if table.key == key else None
+
+def ensure(path, base, ranges, points=None, cache=None, workers=None):
+    """The current table at path, rebuilt and saved first if the code, base or ranges changed"""
+    table = load_current(path, base, ranges, points)
+    if table is None:
+        table = ResponseTable.build(base, ranges, points, cache, workers).save(path)
+    return table
+
+def _range(text):
+    name, low, high = text.split(",")
+    return name, (float(low), float(high))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m lato.response",
+                                     description="Precompute simulate's slider predictions")
+    parser.add_argument("--range", type=_range, action="append", required=True,
+                        help="slider,low,high, e.g. gravity,0,2000 (one per slider)")
+    parser.add_argument("--points", action="append", default=[],
+                        help="slider,count: grid points of a slider (defaults in DEFAULT_POINTS)")
+    parser.add_argument("--profile", help="solver profile from python -m lato.tuning")
+    parser.add_argument("--settings", type=json.loads, help="the same solver settings as a JSON object")
+    parser.add_argument("--cache", help="directory of cached results (see python -m lato --cache)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default="slider_response.npz")
+    args = parser.parse_args()
+
+    profile = args.settings
+    if args.profile:
+        from .tuning import load_profile
+        profile = load_profile(args.profile)
+    cache = None
+    if args.cache:
+        from .cache import ResultCache
+        cache = ResultCache(args.cache)
+    points = {name: int(count) for name, count in (text.split(",") for text in args.points)}
+    base = base_scenario(profile)
+    ranges = dict(args.range)
+    current = load_current(args.output, base, ranges, points) is not None
+    table = ensure(args.output, base, ranges, points, cache, args.workers)
+    print(json.dumps({"output": args.output, "rebuilt": not current, "runs": int(np.prod(table.points)),
+                      "bytes": table.values.nbytes}))
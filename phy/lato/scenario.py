@@ -0,0 +1,237 @@
+import json
+import math
+import os
+
+import numpy as np
+import pymunk
+
+from .bodystate import BodyStates
+from .physics import create_balls, px_to_cm
+from .spectrum import StreamingSpectrum
+
+# Keys a scenario may set, with their defaults
+# None keeps what the builder or pymunk sets
+PHYSICS_DEFAULTS = {
+    "gravity": 981,
+    "mass": None,
+    "elasticity": None,
+    "friction": None,
+    "substeps": 1,          # physics steps per dt
+    "iterations": None,     # pymunk solver iterations
+    "collision_slop": None,
+}
+LATO_DEFAULTS = {
+    **PHYSICS_DEFAULTS,
+    "impulses": [[-300, 0], [300, 0]],
+    "rope_length": 150,  # px from the hand to each ball's centre
+    "automated": False,
+    "automation": {},   # AutomationSettings attributes, e.g. interval, pull_force, stop_time
+    "events": [],       # [time, "pull" | "auto"], like clicking the buttons
+}
+SPRING_DEFAULTS = {
+    **PHYSICS_DEFAULTS,
+    "stiffness_scale": 100,
+    "rope_length": 100,
+    "rope_stiffness": 1.0,
+    "pull_height": 0,
+    "positions": None,  # {"ball1": [x, y], "ball2": [x, y]}
+    "kick": [400, -200],
+}
+KINDS = {"lato": LATO_DEFAULTS, "spring": SPRING_DEFAULTS}
+
+def load(path):
+    """Read a scenario from a .json or .toml file and fill in the defaults.
+
+    A scenario names its system with "kind" ("lato" for simulatereal's lato-lato,
+    "spring" for simulate's spring pendulum) and sets "duration" and "dt" in
+    seconds; every other key overrides one of that kind's defaults.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            scenario = tomllib.load(f)
+    elif extension == ".json":
+        with open(path) as f:
+            scenario = json.load(f)
+    else:
+        raise ValueError(f"Unknown scenario format: {extension} (use .json or .toml)")
+
+    kind = scenario.get("kind", "lato")
+    if kind not in KINDS:
+        raise ValueError(f"Unknown scenario kind: {kind}")
+    unknown = set(scenario) - set(KINDS[kind]) - {"kind", "name", "duration", "dt"}
+    if unknown:
+        raise ValueError(f"Unknown {kind} scenario keys: {', '.join(sorted(unknown))}")
+
+    filled = {"kind": kind, "name": os.path.splitext(os.path.basename(path))[0],
+              "duration": 10.0, "dt": 1/60.0}
+    filled.update(KINDS[kind])
+    filled.update(scenario)
+    return filled
+
+def run(scenario, on_first_step=None, record=False):
+    """Run a loaded scenario headless and return its summary metrics.
+
+    on_first_step() is called once right after the first physics step, which is
+    where the command line measures its cold start. With record the result also
+    holds a "trajectory" sampled every dt: times, ball positions, angles (degrees
+    about each ball's pivot), total energy and kinetic energy.
+    """
+    runner = run_lato if scenario["kind"] == "lato" else run_spring
+    result = runner(scenario, on_first_step, record)
+    return {"name": scenario["name"], "kind": scenario["kind"],
+            "duration": scenario["duration"], "dt": scenario["dt"], **result}
+
+def apply_physics(space, shapes, scenario):
+    """Gravity, solver settings and the ball material overrides a scenario sets"""
+    space.gravity = (0, scenario["gravity"])
+    if scenario["iterations"] is not None:
+        space.iterations = scenario["iterations"]
+    if scenario["collision_slop"] is not None:
+        space.collision_slop = scenario["collision_slop"]
+    for shape in shapes:
+        if scenario["mass"] is not None:
+            # Shape mass makes pymunk derive the body's mass and moment
+            shape.mass = scenario["mass"]
+        if scenario["elasticity"] is not None:
+            shape.elasticity = scenario["elasticity"]
+        if scenario["friction"] is not None:
+            shape.friction = scenario["friction"]
+
+def _record_energy(trajectory, bodies, gravity):
+    """Kinetic plus gravitational energy of the balls (y grows downwards)"""
+    kinetic = sum(body.kinetic_energy for body in bodies)
+    trajectory["kinetic"].append(kinetic)
+    trajectory["energy"].append(kinetic - sum(body.mass * gravity * body.position.y for body in bodies))
+
+def run_lato(scenario, on_first_step=None, record=False):
+    """simulatereal's lato-lato system: swing amplitude, clacks and oscillation spectrum"""
+    from .simulation import new_simulation, step_simulation, toggle_auto, toggle_pull
+
+    # Impulses go in after the materials so a heavier ball really gets a slower start
+    state = new_simulation(impulses=(), rope_length=scenario["rope_length"], sample_rate=1.0 / scenario["dt"])
+    apply_physics(state.space, state.shapes, scenario)
+    state.substeps = scenario["substeps"]
+    for body, impulse in zip(state.bodies, scenario["impulses"]):
+        body.apply_impulse_at_local_point(tuple(impulse))
+    unknown = set(scenario["automation"]) - set(vars(state.automation))
+    if unknown:
+        raise ValueError(f"Unknown automation settings: {', '.join(sorted(unknown))}")
+    vars(state.automation).update(scenario["automation"])
+    if scenario["automated"]:
+        toggle_auto(state)
+
+    actions = {"pull": toggle_pull, "auto": toggle_auto}
+    events = sorted((float(time), action) for time, action in scenario["events"])
+    for _, action in events:
+        if action not in actions:
+            raise ValueError(f"Unknown action: {action}")
+
+    dt = scenario["dt"]
+    states = state.body_states
+    touch_distance = sum(shape.radius for shape in state.shapes) + 0.5
+    max_angles = np.zeros(len(state.bodies))
+    trajectory = {"times": [], "positions": [], "angles": [], "energy": [], "kinetic": []}
+    clack_times = []
+    touching = False
+    next_event = 0
+
+    for step in range(int(round(scenario["duration"] / dt))):
+        while next_event < len(events) and events[next_event][0] <= state.current_time:
+            actions[events[next_event][1]](state)
+            next_event += 1
+
+        state.current_time += dt
+        step_simulation(state, dt)
+        if step == 0 and on_first_step is not None:
+            on_first_step()
+
+        # Read the balls again after the step, so angles and positions agree
+        states.refresh()
+        np.maximum(max_angles, np.abs(states.angles), out=max_angles)
+        if record:
+            trajectory["times"].append(state.current_time)
+            trajectory["positions"].append(states.positions.tolist())
+            trajectory["angles"].append(states.angles.tolist())
+            _record_energy(trajectory, state.bodies, scenario["gravity"])
+        # A clack is the moment the balls meet, not every step they stay in contact
+        now_touching = states.distances[0, 1] <= touch_distance
+        if now_touching and not touching:
+            clack_times.append(state.current_time)
+        touching = now_touching
+
+    spectrum = state.graph.spectrum.summary()
+    result = {
+        "max_angles_deg": max_angles.tolist(),
+        "final_angles_deg": states.angles.tolist(),
+        "clacks": len(clack_times),
+        "clack_times": clack_times,
+        "dominant_frequency": spectrum["dominant_frequency"],
+        "zero_crossing_period": spectrum["zero_crossing_period"],
+    }
+    if record:
+        result["trajectory"] = trajectory
+    return result
+
+def run_spring(scenario, on_first_step=None, record=False):
+    """simulate's spring pendulum: collisions, top speeds, rope stretch, swing and period"""
+    space = pymunk.Space()
+    positions = scenario["positions"]
+    if positions is not None:
+        positions = {name: tuple(position) for name, position in positions.items()}
+    balls, anchors, handle = create_balls(space, positions, scenario["rope_length"],
+                                          scenario["rope_stiffness"], scenario["pull_height"],
+                                          scenario["stiffness_scale"])
+    apply_physics(space, [shape for ball in balls for shape in ball.shapes], scenario)
+    balls[0].apply_impulse_at_local_point(tuple(scenario["kick"]))
+
+    collisions = []
+    step_time = [0.0]
+
+    def count_collision(arbiter, space, data):
+        collisions.append(step_time[0])
+        return True
+    space.add_collision_handler(1, 1).begin = count_collision
+
+    dt = scenario["dt"]
+    states = BodyStates(balls)
+    states.pivots[:] = [tuple(anchor.position) for anchor in anchors]
+    max_speeds = np.zeros(len(balls))
+    max_stretch = np.zeros(len(balls))
+    max_angles = np.zeros(len(balls))
+    # The kicked ball's swing about its anchor, as run_lato follows θ
+    spectrum = StreamingSpectrum(sample_rate=1.0 / dt)
+    trajectory = {"times": [], "positions": [], "angles": [], "energy": [], "kinetic": []}
+    substeps = scenario["substeps"]
+    for step in range(int(round(scenario["duration"] / dt))):
+        step_time[0] = (step + 1) * dt
+        for _ in range(substeps):
+            space.step(dt / substeps)
+        if step == 0 and on_first_step is not None:
+            on_first_step()
+
+        states.refresh()
+        np.maximum(max_speeds, states.speeds, out=max_speeds)
+        np.maximum(max_stretch, states.lengths, out=max_stretch)
+        np.maximum(max_angles, np.abs(states.angles), out=max_angles)
+        spectrum.add_sample(math.radians(states.angles[0]))
+        if record:
+            trajectory["times"].append(step_time[0])
+            trajectory["positions"].append(states.positions.tolist())
+            trajectory["angles"].append(states.angles.tolist())
+            _record_energy(trajectory, balls, scenario["gravity"])
+
+    result = {
+        "collisions": len(collisions),
+        "collision_times": collisions,
+        "max_speeds": max_speeds.tolist(),
+        "max_rope_length_cm": [px_to_cm(length) for length in max_stretch.tolist()],
+        "max_angles_deg": max_angles.tolist(),
+        "zero_crossing_period": spectrum.zero_crossing_period(),
+        "final_positions": [list(ball.position) for ball in balls],
+        "finite": all(math.isfinite(v) for ball in balls for v in ball.position),
+    }
+    if record:
+        result["trajectory"] = trajectory
+    return result
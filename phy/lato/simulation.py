@@ -0,0 +1,215 @@
+import math
+from collections import deque
+
+from pymunk import Vec2d
+import pymunk
+
+from .bodystate import BodyStates
+from .history import HistoryPyramid
+from .physics import (LATO_ROPE_LENGTH, bodies_at_rest, create_lato_system,
+                      enable_sleeping, wake)
+from .spectrum import StreamingSpectrum
+
+class AutomationSettings:
+    def __init__(self):
+        self.is_automated = False
+        self.interval = 2.0
+        self.timer = 0
+        self.is_up = False
+        self.last_update = 0
+        self.stop_time = 10.0
+        self.start_time = 0
+        self.is_finished = False
+        self.pull_force = 200  # Default pull-up force
+        self.max_force = 400   # Maximum allowed force
+        self.min_force = 50    # Minimum allowed force
+
+class AngleHistory:
+    """θ samples behind the angle graph: scrolling window, whole-run history and spectrum.
+
+    sample_rate is how many samples a second it gets: one per step_simulation, so 1/dt.
+    """
+    def __init__(self, max_points=600, sample_rate=60.0):
+        self.max_points = max_points
+        self.times = deque(maxlen=max_points)
+        self.angles = deque(maxlen=max_points)
+        self.start_time = None
+        self.window_start = 0  # Track the start of the visible time window
+        
+        # Signed θ per physics step feeds the spectral panel
+        self.reset_spectrum(sample_rate)
+        # Whole-run history for zooming out over long runs
+        self.history = HistoryPyramid()
+    
+    def reset_spectrum(self, sample_rate):
+        """Start the spectrum over at sample_rate, with the same 8.5 s segments (512 samples at 60 Hz)"""
+        self.spectrum = StreamingSpectrum(sample_rate=sample_rate,
+                                          segment_length=int(round(512 * sample_rate / 60.0)))
+        
+    def update(self, current_time, angle):
+        if self.start_time is None:
+            self.start_time = current_time
+            
+        time = current_time - self.start_time
+        
+        # Update window start time to create scrolling effect
+        if time > 10:  # When we pass 10 seconds
+            self.window_start = time - 10  # Keep the last 10 seconds visible
+        
+        self.times.append(time)
+        self.angles.append(abs(angle))
+        self.history.add_sample(time, abs(angle))
+
+class SimulationState:
+    """Everything the main loop mutates between frames"""
+    def __init__(self, space, hand, bodies, shapes, strings, automation=None, graph=None):
+        self.space = space
+        self.hand = hand
+        self.bodies = bodies  # also builds body_states
+        self.shapes = shapes
+        self.strings = strings
+        self.automation = automation if automation is not None else AutomationSettings()
+        self.graph = graph if graph is not None else AngleHistory()
+        self.original_y = hand.position.y
+        self.target_y = self.original_y
+        self.current_time = 0
+        # Physics steps per call of step_simulation (see lato.tuning)
+        self.substeps = 1
+
+    @property
+    def bodies(self):
+        return self._bodies
+
+    @bodies.setter
+    def bodies(self, bodies):
+        self._bodies = bodies
+        self.body_states = BodyStates(bodies)
+
+    # Angles (degrees) and angular velocities (degrees/s) of the balls as of the
+    # last step, kept in body_states; assigning copies into it (see checkpoint)
+    @property
+    def prev_angles(self):
+        return self.body_states.angles
+
+    @prev_angles.setter
+    def prev_angles(self, values):
+        self.body_states.angles[:] = values
+
+    @property
+    def angular_velocities(self):
+        return self.body_states.angular_velocities
+
+    @angular_velocities.setter
+    def angular_velocities(self, values):
+        self.body_states.angular_velocities[:] = values
+
+def new_simulation(sim_space=None, impulses=((-300, 0), (300, 0)), graph=None,
+                   rope_length=LATO_ROPE_LENGTH, sample_rate=60.0):
+    """Build a lato-lato system in its own space and apply the initial impulses.
+
+    graph receives the θ samples; simulatereal passes its GraphData to draw them.
+    Without one, a new AngleHistory takes sample_rate, which must be 1/dt of the
+    steps the state will be run with.
+    """
+    if sim_space is None:
+        sim_space = pymunk.Space()
+        sim_space.gravity = Vec2d(0, 981)
+    enable_sleeping(sim_space)
+    
+    hand, bodies, shapes, strings = create_lato_system(rope_length)
+    for body, shape, string in zip(bodies, shapes, strings):
+        sim_space.add(body, shape, string)
+    
+    for body, impulse in zip(bodies, impulses):
+        body.apply_impulse_at_local_point(impulse)
+    
+    if graph is None:
+        graph = AngleHistory(sample_rate=sample_rate)
+    return SimulationState(sim_space, hand, bodies, shapes, strings, graph=graph)
+
+def toggle_pull(state):
+    """Same as clicking the Pull Up button"""
+    state.automation.is_automated = False
+    state.automation.is_finished = False
+    if state.target_y == state.original_y:
+        state.target_y = state.original_y - state.automation.pull_force
+    else:
+        state.target_y = state.original_y
+
+def toggle_auto(state):
+    """Same as clicking the Auto Mode button"""
+    automation = state.automation
+    automation.is_automated = not automation.is_automated
+    automation.timer = 0
+    automation.is_up = False
+    automation.last_update = state.current_time
+    automation.start_time = state.current_time
+    automation.is_finished = False
+    if automation.is_automated:
+        state.target_y = state.original_y - automation.pull_force
+        automation.is_up = True
+
+def adjust_automation(state, name, delta, low=None, high=None):
+    """Same as the +/- buttons: nudge one automation setting within its limits"""
+    automation = state.automation
+    if name == "pull_force":
+        low, high = automation.min_force, automation.max_force
+    setattr(automation, name, min(high, max(low, getattr(automation, name) + delta)))
+
+def step_simulation(state, step_dt=1/60.0):
+    """Run automation, hand animation, angle tracking and step_dt of physics.
+
+    The physics advances in state.substeps equal steps; everything else runs
+    once per call, so the hand and the graph behave the same for any substeps.
+    """
+    automation = state.automation
+    current_time = state.current_time
+    
+    # Handle automation and stop time
+    if automation.is_automated and not automation.is_finished:
+        elapsed_time = current_time - automation.start_time
+        if elapsed_time >= automation.stop_time:
+            automation.is_automated = False
+            automation.is_finished = True
+            state.target_y = state.original_y
+        else:
+            if current_time - automation.last_update >= automation.interval:
+                automation.last_update = current_time
+                automation.is_up = not automation.is_up
+                state.target_y = state.original_y - automation.pull_force if automation.is_up else state.original_y
+    
+    # Smooth pull up/down animation
+    hand = state.hand
+    current_y = hand.position.y
+    if current_y != state.target_y:
+        dy = (state.target_y - current_y) * 0.1
+        # Snap the last fraction of a pixel so the hand really comes to rest
+        new_y = state.target_y if abs(dy) < 0.001 else current_y + dy
+        hand.position = (hand.position.x, new_y)
+        # Moving a static body does not wake what hangs from it
+        wake(state.bodies)
+    
+    # One read of every ball, then update graph with first ball's angle
+    angle = float(state.body_states.refresh(hand.position).angles[0])
+    state.graph.update(current_time, math.radians(abs(angle)))
+    state.graph.spectrum.add_sample(math.radians(angle))
+    
+    for _ in range(state.substeps):
+        state.space.step(step_dt / state.substeps)
+
+def is_idle(state):
+    """Nothing will move until the user does something"""
+    automation = state.automation
+    return (bodies_at_rest(state.bodies)
+            and state.hand.position.y == state.target_y
+            and (not automation.is_automated or automation.is_finished))
+
+def run_headless(state, duration, dt=1/60.0, on_step=None):
+    """Advance a state without a window, calling on_step(state) after every step"""
+    steps = int(round(duration / dt))
+    for _ in range(steps):
+        state.current_time += dt
+        step_simulation(state, dt)
+        if on_step is not None:
+            on_step(state)
+    return state
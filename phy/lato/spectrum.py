@@ -0,0 +1,155 @@
+import math
+from collections import deque
+
+import numpy as np
+
+class StreamingSpectrum:
+    """Welch power spectrum and zero-crossing period of a uniformly sampled signal.
+
+    Samples go into a ring buffer. Every `hop` new samples one Hann-windowed
+    segment is transformed and its periodogram joins a running average over the
+    last `segments` periodograms, so the cost per sample stays constant and no
+    frame ever pays for more than one FFT.
+    """
+    def __init__(self, sample_rate=60.0, segment_length=512, overlap=0.5, segments=8,
+                 crossings=8):
+        self.sample_rate = sample_rate
+        self.segment_length = segment_length
+        self.hop = max(1, int(segment_length * (1 - overlap)))
+        self.segments = segments
+
+        self.buffer = np.zeros(segment_length)
+        self.write_index = 0
+        self.sample_count = 0
+        self.since_last_segment = 0
+
+        self.window = np.hanning(segment_length)
+        # Scale so the PSD is in rad²/Hz (one-sided)
+        self.scale = 1.0 / (sample_rate * np.sum(self.window ** 2))
+        self.frequencies = np.fft.rfftfreq(segment_length, 1.0 / sample_rate)
+        self.periodograms = deque(maxlen=segments)
+        self.psd_sum = np.zeros(len(self.frequencies))
+        self.psd = None
+
+        # Zero-crossing estimator works on the signal minus its running mean,
+        # which follows over ~1.7 s at any sample rate (0.01 per sample at 60 Hz)
+        self.mean = 0.0
+        self.mean_weight = min(1.0, 0.6 / sample_rate)
+        self.previous_value = None
+        self.last_crossing = None
+        self.periods = deque(maxlen=crossings)
+
+    def add_sample(self, value):
+        """Feed one new sample"""
+        time = self.sample_count / self.sample_rate
+        self.sample_count += 1
+
+        self.buffer[self.write_index] = value
+        self.write_index = (self.write_index + 1) % self.segment_length
+        self.since_last_segment += 1
+
+        self._update_crossings(time, value)
+
+        if self.sample_count >= self.segment_length and self.since_last_segment >= self.hop:
+            self.since_last_segment = 0
+            self._add_segment()
+
+    def _update_crossings(self, time, value):
+        # Slow running mean so an offset swing still crosses "zero"
+        self.mean += (value - self.mean) * self.mean_weight
+        centered = value - self.mean
+        previous = self.previous_value
+        self.previous_value = centered
+        if previous is None or not (previous < 0 <= centered):
+            return
+
+        # Interpolate the upward crossing between the two samples
+        crossing = time - (centered / (centered - previous)) / self.sample_rate
+        if self.last_crossing is not None:
+            self.periods.append(crossing - self.last_crossing)
+        self.last_crossing = crossing
+
+    def _add_segment(self):
+        segment = np.roll(self.buffer, -self.write_index)
+        segment = (segment - segment.mean()) * self.window
+        periodogram = np.abs(np.fft.rfft(segment)) ** 2 * self.scale
+        periodogram[1:-1] *= 2
+
+        if len(self.periodograms) == self.segments:
+            self.psd_sum -= self.periodograms[0]
+        self.periodograms.append(periodogram)
+        self.psd_sum += periodogram
+        self.psd = self.psd_sum / len(self.periodograms)
+
+    def dominant_frequency(self):
+        """Peak of the Welch PSD in Hz (parabolic interpolation), or None"""
+        if self.psd is None:
+            return None
+        peak = int(np.argmax(self.psd[1:])) + 1
+        if peak >= len(self.psd) - 1:
+            return float(self.frequencies[peak])
+
+        # Fit a parabola through the log power around the peak
+        left, center, right = np.log(self.psd[peak - 1:peak + 2] + 1e-30)
+        denominator = left - 2 * center + right
+        shift = 0.5 * (left - right) / denominator if denominator != 0 else 0.0
+        return float((peak + shift) * self.sample_rate / self.segment_length)
+
+    def zero_crossing_period(self):
+        """Mean time between upward zero crossings in s, or None"""
+        if not self.periods:
+            return None
+        return sum(self.periods) / len(self.periods)
+
+    def summary(self):
+        """Plain-data results for headless outputs"""
+        frequency = self.dominant_frequency()
+        period = self.zero_crossing_period()
+        return {
+            "samples": self.sample_count,
+            "dominant_frequency": frequency,
+            "dominant_period": 1.0 / frequency if frequency else None,
+            "zero_crossing_period": period,
+            "zero_crossing_frequency": 1.0 / period if period else None,
+            "frequencies": self.frequencies.tolist() if self.psd is not None else [],
+            "psd": self.psd.tolist() if self.psd is not None else [],
+        }
+
+    def get_state(self):
+        """Everything needed to continue the stream elsewhere (see checkpoint)"""
+        return {
+            "sample_rate": self.sample_rate,
+            "buffer": self.buffer.tolist(),
+            "write_index": self.write_index,
+            "sample_count": self.sample_count,
+            "since_last_segment": self.since_last_segment,
+            "periodograms": [p.tolist() for p in self.periodograms],
+            "mean": self.mean,
+            "previous_value": self.previous_value,
+            "last_crossing": self.last_crossing,
+            "periods": list(self.periods),
+        }
+
+    def set_state(self, data):
+        sample_rate = data.get("sample_rate", self.sample_rate)
+        if sample_rate != self.sample_rate or len(data["buffer"]) != self.segment_length:
+            # Carry on at the rate and segment length the stream was captured with
+            self.__init__(sample_rate, len(data["buffer"]), 1 - self.hop / self.segment_length,
+                          self.segments, self.periods.maxlen)
+        self.buffer[:] = data["buffer"]
+        self.write_index = data["write_index"]
+        self.sample_count = data["sample_count"]
+        self.since_last_segment = data["since_last_segment"]
+        self.periodograms.clear()
+        self.periodograms.extend(np.array(p) for p in data["periodograms"])
+        self.psd_sum = np.sum(self.periodograms, axis=0) if self.periodograms else np.zeros(len(self.frequencies))
+        self.psd = self.psd_sum / len(self.periodograms) if self.periodograms else None
+        self.mean = data["mean"]
+        self.previous_value = data["previous_value"]
+        self.last_crossing = data["last_crossing"]
+        self.periods.clear()
+        self.periods.extend(data["periods"])
+
+def drive_frequency(interval):
+    """Frequency of the automated pull: one full up/down cycle takes 2 intervals"""
+    return 1.0 / (2 * interval) if interval > 0 else math.nan
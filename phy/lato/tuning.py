@@ -0,0 +1,185 @@
+import argparse
+import itertools
+import json
+import time
+
+import numpy as np
+
+from . import scenario as scenarios
+
+# What simulate and simulatereal use without a profile: one 1/60 s step per
+# frame, pymunk's solver defaults and rope_stiffness * 100 springs
+DEFAULT_PROFILE = {
+    "substeps": 1,
+    "iterations": 10,
+    "collision_slop": 0.1,
+    "stiffness_scale": 100,
+}
+
+# The "truth" every candidate is compared with
+REFERENCE_SETTINGS = {"substeps": 16, "iterations": 40, "collision_slop": 0.01}
+
+DEFAULT_TOLERANCES = {
+    "theta_deg": 2.0,          # largest |θ - θ_ref| of any ball at any sample
+    "collision_time": 0.05,    # largest shift of a collision/clack time (s); clacks are seen per frame
+    "energy_drift": 0.05,      # energy gained or lost by the end versus the reference's, relative to its peak kinetic energy
+}
+
+SEARCH_SPACE = {
+    "substeps": [1, 2, 3, 4, 6, 8],
+    "iterations": [1, 2, 3, 5, 7, 10, 15, 20],
+    "collision_slop": [0.1, 0.5, 1.0],
+    "stiffness_scale": [100, 75, 50],
+}
+
+def load_profile(path):
+    """Read a tuned profile, filling in defaults for anything it leaves out"""
+    with open(path) as f:
+        data = json.load(f)
+    profile = dict(DEFAULT_PROFILE)
+    profile.update({key: data[key] for key in DEFAULT_PROFILE if key in data})
+    return profile
+
+def apply_profile(space, profile):
+    """Set a space's solver settings from a profile (substeps and stiffness are up to the caller)"""
+    space.iterations = profile["iterations"]
+    space.collision_slop = profile["collision_slop"]
+
+def _collision_times(result):
+    return result["clack_times"] if result["kind"] == "lato" else result["collision_times"]
+
+def _collision_error(ref_times, run_times, horizon, tolerance):
+    """Largest shift from each reference collision to the nearest run collision within tolerance.
+
+    Every run collision stands for one reference collision at most. A reference
+    collision with none in reach, or a run collision left over, is an error
+    (inf), except in the last `tolerance` before the horizon: collisions there
+    may fall either side of the end.
+    """
+    counted = horizon - tolerance
+    run_times = sorted(t for t in run_times if t < horizon)
+    matched = [False] * len(run_times)
+    worst = 0.0
+    first = 0
+    for time in sorted(t for t in ref_times if t < horizon):
+        # Run collisions too early for this one are too early for every later one
+        while first < len(run_times) and run_times[first] < time - tolerance:
+            first += 1
+        nearest = None
+        for i in range(first, len(run_times)):
+            if run_times[i] > time + tolerance:
+                break
+            if not matched[i] and (nearest is None or abs(run_times[i] - time) < abs(run_times[nearest] - time)):
+                nearest = i
+        if nearest is None:
+            if time < counted:
+                return float("inf")
+            continue
+        matched[nearest] = True
+        worst = max(worst, abs(run_times[nearest] - time))
+    if any(not used and time < counted for used, time in zip(matched, run_times)):
+        return float("inf")
+    return worst
+
+def compare(reference, result, horizon, collision_tolerance=DEFAULT_TOLERANCES["collision_time"]):
+    """Worst θ, collision-time and energy errors of a recorded run against the reference"""
+    ref = reference["trajectory"]
+    run = result["trajectory"]
+    steps = min(len(ref["times"]), len(run["times"]))
+    theta_error = float(np.max(np.abs(np.asarray(run["angles"][:steps]) - np.asarray(ref["angles"][:steps]))))
+
+    # Drift over the whole run, averaged over its last tenth: comparing sample by
+    # sample would mostly measure a clack landing one frame earlier or later
+    ref_energy = np.asarray(ref["energy"][:steps])
+    run_energy = np.asarray(run["energy"][:steps])
+    tail = max(steps // 10, 1)
+    drift = (run_energy[-tail:].mean() - run_energy[0]) - (ref_energy[-tail:].mean() - ref_energy[0])
+    energy_error = float(abs(drift) / max(max(ref["kinetic"][:steps]), 1e-9))
+
+    collision_error = _collision_error(_collision_times(reference), _collision_times(result),
+                                       horizon, collision_tolerance)
+
+    return {"theta_deg": theta_error, "collision_time": collision_error, "energy_drift": energy_error}
+
+def _speed(scenario, repeats=3):
+    """Simulated seconds per wall second, best of a few unrecorded runs"""
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        scenarios.run(scenario)
+        best = min(best, time.perf_counter() - started)
+    return scenario["duration"] / best
+
+def tune(scenario, tolerances=None, search_space=None, log=None):
+    """Find the fastest solver settings whose run stays within tolerances of a high-resolution reference.
+
+    scenario is a loaded scenario (see lato.scenario); keep its duration short
+    (a few seconds), since the lato-lato is chaotic and any two settings drift
+    apart eventually. For each substeps/slop/stiffness combination, iterations
+    are tried from low to high and the first that passes ends that line, since
+    more iterations only cost more. Returns the profile, with the errors and
+    speed of the winner and the run count.
+    """
+    tolerances = dict(DEFAULT_TOLERANCES, **(tolerances or {}))
+    search_space = dict(SEARCH_SPACE, **(search_space or {}))
+    if scenario["kind"] == "lato":
+        # Pin joints have no spring constant to tune
+        search_space["stiffness_scale"] = [DEFAULT_PROFILE["stiffness_scale"]]
+
+    reference = scenarios.run(dict(scenario, **REFERENCE_SETTINGS), record=True)
+    best = None
+    runs = 0
+    for substeps, slop, stiffness in itertools.product(search_space["substeps"],
+                                                       search_space["collision_slop"],
+                                                       search_space["stiffness_scale"]):
+        for iterations in search_space["iterations"]:
+            settings = {"substeps": substeps, "iterations": iterations,
+                        "collision_slop": slop, "stiffness_scale": stiffness}
+            candidate = dict(scenario, **settings)
+            result = scenarios.run(candidate, record=True)
+            runs += 1
+            errors = compare(reference, result, scenario["duration"], tolerances["collision_time"])
+            passed = all(errors[name] <= tolerances[name] for name in tolerances)
+            # Only settings that pass are worth timing
+            speed = _speed(candidate) if passed else None
+            if log is not None:
+                log(settings, errors, speed, passed)
+            if passed:
+                if best is None or speed > best["speed"]:
+                    best = dict(settings, errors=errors, speed=speed,
+                                steps_per_second=speed / scenario["dt"] * substeps)
+                break
+
+    if best is None:
+        raise ValueError("No setting in the search space meets the tolerances")
+    return dict(best, scenario=scenario["name"], tolerances=tolerances, runs=runs)
+
+def save_profile(profile, path):
+    with open(path, "w") as f:
+        json.dump(profile, f, indent=2)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m lato.tuning",
+                                     description="Tune dt, solver iterations, collision slop and spring stiffness")
+    parser.add_argument("scenario", help="reference scenario (.json or .toml); a few seconds long is best")
+    parser.add_argument("--output", default="tuned_profile.json")
+    parser.add_argument("--theta", type=float, default=DEFAULT_TOLERANCES["theta_deg"],
+                        help="θ tolerance in degrees")
+    parser.add_argument("--collision", type=float, default=DEFAULT_TOLERANCES["collision_time"],
+                        help="collision time tolerance in seconds")
+    parser.add_argument("--energy", type=float, default=DEFAULT_TOLERANCES["energy_drift"],
+                        help="energy drift tolerance relative to the peak kinetic energy")
+    args = parser.parse_args()
+
+    def log(settings, errors, speed, passed):
+        print(f"{'pass' if passed else 'fail'}  {settings}  θ {errors['theta_deg']:.3f}°  "
+              f"collision {errors['collision_time']:.4f}s  energy {errors['energy_drift']:.4f}"
+              + (f"  {speed:.0f}x real time" if passed else ""))
+
+    profile = tune(scenarios.load(args.scenario),
+                   {"theta_deg": args.theta, "collision_time": args.collision, "energy_drift": args.energy},
+                   log=log)
+    save_profile(profile, args.output)
+    print(f"Wrote {args.output}: substeps {profile['substeps']}, "
+          f"iterations {profile['iterations']}, collision slop {profile['collision_slop']}, "
+          f"stiffness scale {profile['stiffness_scale']} - {profile['speed']:.0f}x real time")
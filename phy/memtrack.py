@@ -0,0 +1,233 @@
+import json
+import linecache
+import os
+import tempfile
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+# What a long session may cost: memory growth once warmed up (bytes per hour
+# of frames at 60 fps) and memory churned within one frame (peak above start)
+DEFAULT_BUDGET = {
+    "growth_per_hour": 8 << 20,
+    "frame_churn_p95": 1 << 20,
+}
+
+class _Phase:
+    """Per-frame figures of one phase; bounded, or the tracker would grow itself"""
+    def __init__(self, window):
+        self.frames = 0
+        self.churn = deque(maxlen=window)   # peak above the phase's starting traced memory
+        self.net = deque(maxlen=window)     # traced memory left behind
+        self.churn_max = 0
+
+    def add(self, churn, net, counted):
+        self.frames += 1
+        if counted:
+            self.churn.append(churn)
+            self.net.append(net)
+            self.churn_max = max(self.churn_max, churn)
+
+class MemoryTracker:
+    """Opt-in tracemalloc churn per frame and phase, plus growth over snapshots after the warm-up.
+
+    Call begin_frame(), phase(name) as each part starts and end_frame(); see the README.
+    """
+    def __init__(self, snapshot_every=600, warmup=900, top=10, depth=8, fps=60, window=3600,
+                 report_path=None, min_snapshots=6):
+        self.snapshot_every = snapshot_every
+        self.warmup = warmup
+        self.min_snapshots = min_snapshots
+        self.top = top
+        self.depth = depth
+        self.fps = fps
+        self.window = window
+        self.report_path = report_path  # where finish() writes the JSON report, if anywhere
+        self.phases = {}
+        self.frames = _Phase(window)
+        self.frame_count = 0
+        self.growth = []   # (frame, traced bytes) at each snapshot
+        # The baseline snapshot waits on disk: kept in memory it would be traced too
+        self.baseline_path = None
+        self._frame_start = 0
+        self._frame_churn = 0
+        self._current = None
+        self._phase_start = 0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.depth)
+        return self
+
+    def stop(self):
+        tracemalloc.stop()
+        if self.baseline_path is not None:
+            os.remove(self.baseline_path)
+            self.baseline_path = None
+
+    def _phase(self, name):
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = _Phase(self.window)
+        return phase
+
+    def begin_frame(self):
+        self._frame_start = tracemalloc.get_traced_memory()[0]
+        self._frame_churn = 0
+        self._current = None
+
+    def _end_phase(self):
+        if self._current is not None:
+            current, peak = tracemalloc.get_traced_memory()
+            churn = peak - self._phase_start
+            self._phase(self._current).add(churn, current - self._phase_start, self.frame_count >= self.warmup)
+            self._frame_churn += churn
+            self._current = None
+
+    def phase(self, name):
+        self._end_phase()
+        # The peak is tracked from here, so the phase's churn is its own
+        tracemalloc.reset_peak()
+        self._phase_start = tracemalloc.get_traced_memory()[0]
+        self._current = name
+
+    def end_frame(self):
+        self._end_phase()
+        # Work outside any phase is not counted as churn
+        self.frames.add(self._frame_churn, tracemalloc.get_traced_memory()[0] - self._frame_start,
+                        self.frame_count >= self.warmup)
+        self.frame_count += 1
+        if self.frame_count >= self.warmup and (self.frame_count - self.warmup) % self.snapshot_every == 0:
+            self._snapshot()
+
+    def _take_snapshot(self):
+        # Leave out tracemalloc's and the tracker's own memory
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, linecache.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*"),
+        ))
+
+    def _snapshot(self):
+        snapshot = self._take_snapshot()
+        self.growth.append((self.frame_count, sum(stat.size for stat in snapshot.statistics("filename"))))
+        if self.baseline_path is None:
+            descriptor, self.baseline_path = tempfile.mkstemp(suffix=".tracemalloc")
+            os.close(descriptor)
+            snapshot.dump(self.baseline_path)
+
+    def top_sites(self):
+        """Call sites that grew most since the baseline snapshot"""
+        if len(self.growth) < 2:
+            return []
+        baseline = tracemalloc.Snapshot.load(self.baseline_path)
+        sites = []
+        for stat in self._take_snapshot().compare_to(baseline, "lineno")[:self.top]:
+            frame = stat.traceback[0]
+            sites.append({"site": f"{frame.filename}:{frame.lineno}", "size_diff": stat.size_diff,
+                          "count_diff": stat.count_diff, "size": stat.size})
+        return sites
+
+    def frames_needed(self):
+        """How many frames a run needs for a growth rate"""
+        return self.warmup + (self.min_snapshots - 1) * self.snapshot_every
+
+    def growth_rate(self):
+        """Bytes per hour of frames, fitted over the snapshots from the baseline on; None with too few"""
+        if len(self.growth) < max(self.min_snapshots, 2):
+            return None
+        frames, sizes = np.array(self.growth, dtype=float).T
+        slope = np.polyfit(frames, sizes, 1)[0]
+        return float(slope * self.fps * 3600)
+
+    def _summary(self, phase):
+        """Figures of a phase's frames after the warm-up; None when there were none"""
+        if not phase.churn:
+            return None
+        churn = np.array(phase.churn)
+        return {
+            "frames": phase.frames,
+            "churn_mean": float(churn.mean()),
+            "churn_p95": float(np.percentile(churn, 95)),
+            "churn_max": int(phase.churn_max),
+            "net_mean": float(np.mean(phase.net)),
+        }
+
+    def report(self):
+        return {
+            "frames": self.frame_count,
+            "frame": self._summary(self.frames),
+            "phases": {name: self._summary(phase) for name, phase in self.phases.items()},
+            "snapshots": self.growth,
+            "growth_per_hour": self.growth_rate(),
+            "warmup": self.warmup,
+            "frames_needed": self.frames_needed(),
+            "top_sites": self.top_sites(),
+        }
+
+def check(report, budget=None):
+    """Budget lines a report breaks, as messages; an empty list is a pass"""
+    budget = dict(DEFAULT_BUDGET, **(budget or {}))
+    failures = []
+    # Without a rate there is nothing to hold against the budget
+    growth = report["growth_per_hour"]
+    if growth is not None and growth > budget["growth_per_hour"]:
+        failures.append(f"memory grows {report['growth_per_hour'] / (1 << 20):.1f} MB/hour "
+                        f"(budget {budget['growth_per_hour'] / (1 << 20):.1f} MB/hour)")
+    frame = report["frame"]
+    if frame is None:
+        # Nothing was measured, so nothing can pass
+        failures.append(f"no frames after the {report['warmup']}-frame warm-up to measure "
+                        f"(run at least {report['warmup'] + 1} frames)")
+    elif frame["churn_p95"] > budget["frame_churn_p95"]:
+        failures.append(f"95th percentile frame allocates {frame['churn_p95'] / 1024:.0f} KB "
+                        f"(budget {budget['frame_churn_p95'] / 1024:.0f} KB)")
+    return failures
+
+def format_report(report, failures=None):
+    growth = report["growth_per_hour"]
+    if growth is None:
+        lines = [f"{report['frames']} frames, memory growth: not enough data "
+                 f"(run at least {report['frames_needed']} frames)"]
+    else:
+        lines = [f"{report['frames']} frames, memory growth {growth / 1024:.1f} KB/hour"]
+    for name, phase in [("frame", report["frame"])] + sorted(report["phases"].items()):
+        if phase is None:
+            lines.append(f"  {name:10s} not enough data (all its frames were in the warm-up)")
+            continue
+        lines.append(f"  {name:10s} churn mean {phase['churn_mean'] / 1024:8.1f} KB  "
+                     f"p95 {phase['churn_p95'] / 1024:8.1f} KB  max {phase['churn_max'] / 1024:8.1f} KB  "
+                     f"net mean {phase['net_mean']:+.0f} B")
+    if report["top_sites"]:
+        lines.append("  growth since baseline by call site:")
+        for site in report["top_sites"]:
+            lines.append(f"    {site['size_diff']:+10d} B {site['count_diff']:+6d} blocks  {site['site']}")
+    if failures is not None:
+        lines.append("PASS" if not failures else "FAIL: " + "; ".join(failures))
+    return "\n".join(lines)
+
+def finish(tracker, budget=None):
+    """Print the report (and write it as JSON to tracker.report_path) at the end of a tracked run"""
+    report = tracker.report()
+    failures = check(report, budget)
+    print(format_report(report, failures))
+    if tracker.report_path:
+        with open(tracker.report_path, "w") as f:
+            json.dump(dict(report, failures=failures), f, indent=2)
+    tracker.stop()
+    return failures
+
+class _Untracked:
+    """Stand-in when tracking is off: the same calls, doing nothing"""
+    def begin_frame(self):
+        pass
+
+    def phase(self, name):
+        pass
+
+    def end_frame(self):
+        pass
+
+UNTRACKED = _Untracked()
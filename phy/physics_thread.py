@@ -0,0 +1,91 @@
+import queue
+import threading
+import time
+
+class SnapshotBuffer:
+    """Lock-free double buffer holding the newest published snapshot.
+
+    The physics thread fills the back slot and then flips the index; the render
+    thread only ever reads the front slot. Both operations are single reference
+    assignments, which are atomic under the GIL, so neither side ever waits.
+    Snapshots must be immutable once published.
+    """
+    def __init__(self):
+        self.slots = [None, None]
+        self.front = 0
+
+    def publish(self, snapshot):
+        back = 1 - self.front
+        self.slots[back] = snapshot
+        self.front = back
+
+    def latest(self):
+        return self.slots[self.front]
+
+class PhysicsThread(threading.Thread):
+    """Steps a simulation at a fixed rate on its own thread.
+
+    step(state) advances the state by one fixed step, snapshot(state) builds
+    the immutable object the renderer draws and idle(state), if given, lets the
+    thread sleep instead of stepping while nothing moves. Other threads never
+    touch the state: they send(fn, *args) and fn(state, *args) runs on the
+    physics thread between two steps.
+    """
+    def __init__(self, state, step, snapshot, dt=1/60.0, idle=None, speed=1.0, max_catch_up=8):
+        super().__init__(daemon=True)
+        self.state = state
+        self.step = step
+        self.snapshot = snapshot
+        self.dt = dt
+        self.idle = idle
+        self.speed = speed
+        self.max_catch_up = max_catch_up
+        self.buffer = SnapshotBuffer()
+        self.commands = queue.SimpleQueue()
+        self.stopped = threading.Event()
+        self.steps = 0
+        self.buffer.publish(snapshot(state))
+
+    def send(self, fn, *args):
+        self.commands.put((fn, args))
+
+    def stop(self):
+        self.stopped.set()
+
+    def _run_commands(self):
+        ran = False
+        while True:
+            try:
+                fn, args = self.commands.get_nowait()
+            except queue.Empty:
+                return ran
+            fn(self.state, *args)
+            ran = True
+
+    def run(self):
+        step_period = self.dt / self.speed
+        next_step = time.perf_counter()
+
+        while not self.stopped.is_set():
+            changed = self._run_commands()
+
+            if self.idle is not None and self.idle(self.state):
+                if changed:
+                    self.buffer.publish(self.snapshot(self.state))
+                # Nothing moves: wait for a command instead of spinning
+                self.stopped.wait(step_period)
+                next_step = time.perf_counter()
+                continue
+
+            # Fixed steps paced to wall time; after a stall catch up a bounded amount
+            now = time.perf_counter()
+            due = min(int((now - next_step) / step_period) + 1, self.max_catch_up)
+            if now < next_step:
+                time.sleep(next_step - now)
+                due = 1
+            for _ in range(due):
+                self.step(self.state)
+                self.steps += 1
+            next_step = max(next_step + due * step_period, time.perf_counter() - step_period)
+
+            self.buffer.publish(self.snapshot(self.state))
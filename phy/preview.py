@@ -0,0 +1,100 @@
+import threading
+from collections import namedtuple
+
+import pygame
+
+from physics_thread import SnapshotBuffer
+
+# paths[i] is the predicted [(x, y), ...] of the i-th body, one point per sample
+Prediction = namedtuple("Prediction", "generation paths")
+
+class TrajectoryPredictor(threading.Thread):
+    """Simulates a few seconds ahead on a background thread, e.g. while a ball is dragged.
+
+    request(build) hands over a new starting point: build() runs on the worker
+    and returns (space, bodies) for a space nothing else touches. Only the
+    newest request is kept, so a burst of mouse motion costs one prediction, and
+    a run in progress is dropped as soon as a newer request arrives. Finished
+    predictions are published through a SnapshotBuffer, so the UI thread never
+    waits: latest() is the newest Prediction, or None after clear().
+    """
+    def __init__(self, horizon=2.5, dt=1/60.0, substeps=1, sample_every=2, check_every=10):
+        super().__init__(daemon=True)
+        self.horizon = horizon
+        self.dt = dt
+        self.substeps = substeps
+        self.sample_every = sample_every
+        self.check_every = check_every
+        self.buffer = SnapshotBuffer()
+        self.condition = threading.Condition()
+        self.pending = None
+        self.generation = 0
+        self.stopped = False
+        self.completed = 0
+        self.cancelled = 0
+
+    def request(self, build):
+        with self.condition:
+            self.generation += 1
+            self.pending = (self.generation, build)
+            self.condition.notify()
+
+    def clear(self):
+        """Drop pending and finished predictions (e.g. when the drag ends)"""
+        with self.condition:
+            self.generation += 1
+            self.pending = None
+            self.buffer.publish(None)
+
+    def latest(self):
+        return self.buffer.latest()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.stopped:
+                    self.condition.wait()
+                if self.stopped:
+                    return
+                generation, build = self.pending
+                self.pending = None
+
+            paths = self._predict(build)
+            with self.condition:
+                # A clear() or newer request since then makes this one stale
+                if paths is None or generation != self.generation:
+                    self.cancelled += 1
+                    continue
+                self.buffer.publish(Prediction(generation, paths))
+                self.completed += 1
+
+    def _predict(self, build):
+        space, bodies = build()
+        paths = [[tuple(body.position)] for body in bodies]
+        step_dt = self.dt / self.substeps
+        for frame in range(1, int(round(self.horizon / self.dt)) + 1):
+            if frame % self.check_every == 0 and self.pending is not None:
+                return None
+            for _ in range(self.substeps):
+                space.step(step_dt)
+            if frame % self.sample_every == 0:
+                for path, body in zip(paths, bodies):
+                    path.append(tuple(body.position))
+        return paths
+
+def draw_ghost_trails(window, paths, color, background, segments=12, width=3):
+    """Predicted paths as trails that fade into background the further ahead they are"""
+    for path in paths:
+        if len(path) < 2:
+            continue
+        chunk = max(1, (len(path) - 1) // segments)
+        for start in range(0, len(path) - 1, chunk):
+            # Blending towards the background instead of alpha needs no extra surface
+            fade = start / (len(path) - 1)
+            shade = [int(c + (b - c) * fade) for c, b in zip(color, background)]
+            pygame.draw.lines(window, shade, False, path[start:start + chunk + 1], width)
@@ -0,0 +1,82 @@
+import pygame
+
+# Frame rate while nothing moves: enough to keep hover feedback responsive
+IDLE_FPS = 15
+
+class RenderScheduler:
+    """Tracks which screen regions changed since the last presented frame.
+
+    Each widget reports its rect and a signature of what it shows (positions,
+    hover state, text...). A widget is dirty when either changed; both its old
+    and new rect are then updated, so things that move leave no trails. When
+    nothing is dirty the frame does not need to be drawn or presented at all.
+    """
+    def __init__(self, screen_rect):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.widgets = {}  # name -> (rect, signature) as last presented
+        self.dirty = []
+        self.full_redraw = True
+
+    def track(self, name, rect, signature):
+        rect = pygame.Rect(rect)
+        previous = self.widgets.get(name)
+        if previous is None:
+            self.dirty.append(rect)
+        else:
+            old_rect, old_signature = previous
+            if old_rect != rect or old_signature != signature:
+                self.dirty.append(old_rect.union(rect))
+        self.widgets[name] = (rect, signature)
+
+    def invalidate(self):
+        """Present the whole window next frame (first frame, restores, resizes)"""
+        self.full_redraw = True
+
+    def needs_redraw(self):
+        return self.full_redraw or bool(self.dirty)
+
+    def regions(self):
+        """What to redraw this frame: the whole screen, or the dirty rects merged where they overlap"""
+        if self.full_redraw:
+            return [self.screen_rect.copy()]
+        merged = []
+        for rect in self.dirty:
+            rect = rect.clip(self.screen_rect)
+            if not rect.width or not rect.height:
+                continue
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect = rect.union(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+    def present(self):
+        """Push the dirty parts of the drawn frame to the display and reset"""
+        if self.full_redraw:
+            pygame.display.update()
+        elif self.dirty:
+            pygame.display.update(self.regions())
+        self.dirty = []
+        self.full_redraw = False
+
+def redraw(surface, regions, layers):
+    """Draw only what reaches into regions, each region clipped to itself.
+
+    layers are (rect, draw) pairs from the bottom up; draw() is called for
+    every region its rect overlaps, so whatever lies above a changed widget is
+    drawn again over it, and nothing outside the regions is touched.
+    """
+    for region in regions:
+        surface.set_clip(region)
+        for rect, draw in layers:
+            if region.colliderect(rect):
+                draw()
+    surface.set_clip(None)
+
+def bounding_rect(points, margin):
+    """Smallest rect around points, grown by margin on every side"""
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    left, top = int(min(xs)) - margin, int(min(ys)) - margin
+    return pygame.Rect(left, top, int(max(xs)) + margin - left, int(max(ys)) + margin - top)
@@ -1,20 +1,31 @@
 import pygame
 import pymunk
 import pymunk.pygame_util
-import math
-from typing import Dict, List, Tuple, Optional
 import numpy as np
 import collections
-
-pygame.init()
+import functools
+import argparse
+import sys
+import os
+import json
+import queue
+import subprocess
+from lato.history import HistoryPyramid
+from lato.physics import (bodies_at_rest, calculate_distance, px_to_cm, cm_to_px, create_balls,
+                          enable_sleeping, wake)
+from lato import response, tuning
+from lato.bodystate import BodyStates
+from lato.live import DEFAULT_ADDRESS, StateServer
+from preview import TrajectoryPredictor, draw_ghost_trails
+import memtrack
+import render
+from widgets import Widget, WidgetLayer, get_font
 
 # Constants
 WIDTH, HEIGHT = 1200, 800  # Increased width to accommodate menu
 SIMULATION_WIDTH = 700  # Original simulation area
 MENU_WIDTH = WIDTH - SIMULATION_WIDTH
 MENU_X = SIMULATION_WIDTH
-PIXELS_PER_CM = 10  # 10 pixels = 1 cm
-CM_PER_PIXEL = 1/PIXELS_PER_CM
 
 # Colors
 GRAY = (211, 211, 211)
@@ -34,9 +45,13 @@ GRID_COLOR = (230, 230, 230)
 TITLE_COLOR = (44, 62, 80)
 GRAPH_LINE_WIDTH = 2
 BALL_SHINE = True
+GHOST_COLOR = (70, 70, 160)
+GHOST_BACKGROUND = (196, 196, 196)  # Middle of the simulation area's gradient
 
-class Slider:
+class Slider(Widget):
     def __init__(self, x, y, width, min_val, max_val, initial_val, label):
+        # Indexed along the whole track the knob can travel; draws its label above it
+        super().__init__((x - 10, y - 5, width + 20, 20), (x - 10, y - 20, width + 20, 40))
         self.x = x
         self.y = y
         self.width = width
@@ -45,76 +60,89 @@ class Slider:
         self.max_val = max_val
         self.value = initial_val
         self.label = label
-        self.dragging = False
         
         # Calculate initial position of slider button
         self.button_x = self.x + (self.value - self.min_val) / (self.max_val - self.min_val) * self.width
-        
-    def draw(self, window):
+    
+    @property
+    def dragging(self):
+        return self.pressed
+    
+    def hit(self, pos):
+        # Only the knob can be grabbed
+        return pygame.Rect(self.button_x - 10, self.y - 5, 20, 20).collidepoint(pos)
+    
+    def label_text(self):
+        return f"{self.label}: {self.value:.1f}"
+    
+    def look(self):
+        return self.label_text(), int(self.button_x), self.hover
+    
+    def render(self, look):
+        text, button_x, hover = look
+        surface = pygame.Surface(self.area.size, pygame.SRCALPHA)
         # Draw label
-        font = pygame.font.Font(None, 24)
-        label_text = font.render(f"{self.label}: {self.value:.1f}", True, BLACK)
-        window.blit(label_text, (self.x, self.y - 20))
+        surface.blit(get_font(24).render(text, True, BLACK), (10, 0))
         
         # Draw track
-        pygame.draw.rect(window, DARK_GRAY, (self.x, self.y, self.width, self.height))
+        self.draw_track(surface, (10, 20))
         
         # Draw button
-        pygame.draw.circle(window, BLUE, (int(self.button_x), self.y + self.height//2), 10)
-    
-    def handle_event(self, event):
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
-            button_rect = pygame.Rect(self.button_x - 10, self.y - 5, 20, 20)
-            if button_rect.collidepoint(mouse_pos):
-                self.dragging = True
-                
-        elif event.type == pygame.MOUSEBUTTONUP:
-            self.dragging = False
-            
-        elif event.type == pygame.MOUSEMOTION and self.dragging:
-            mouse_x = event.pos[0]
-            self.button_x = max(self.x, min(mouse_x, self.x + self.width))
-            self.value = self.min_val + (self.button_x - self.x) / self.width * (self.max_val - self.min_val)
+        pygame.draw.circle(surface, self.knob_color(hover),
+                           (button_x - self.area.x, 20 + self.height//2), 10)
+        return surface
+    
+    def draw_track(self, surface, pos):
+        pygame.draw.rect(surface, DARK_GRAY, (pos[0], pos[1], self.width, self.height))
+    
+    def knob_color(self, hover):
+        return BLUE
+    
+    def on_press(self, pos):
+        self.pressed = True
+        return True, False
+    
+    def on_drag(self, pos):
+        old_value = self.value
+        self.button_x = max(self.x, min(pos[0], self.x + self.width))
+        self.value = self.min_val + (self.button_x - self.x) / self.width * (self.max_val - self.min_val)
+        return self.value != old_value
+    
+    def set_value(self, value):
+        """Move the knob as if dragged to value; returns whether it changed"""
+        return self.on_drag((self.x + (value - self.min_val) / (self.max_val - self.min_val) * self.width, 0))
 
 class AdvancedSlider(Slider):
     """Enhanced slider with better visual feedback"""
+    # Gradient tracks by size, shared by every slider of that size
+    tracks = {}
+    
     def __init__(self, x, y, width, min_val, max_val, initial_val, label, unit=""):
         super().__init__(x, y, width, min_val, max_val, initial_val, label)
         self.unit = unit
-        self.hover = False
-        
-    def draw(self, window):
+    
+    def label_text(self):
         # Draw label with units
-        font = pygame.font.Font(None, 24)
         if "Length" in self.label:
             # Show length in both pixels and cm
-            label_text = font.render(
-                f"{self.label}: {self.value:.1f} px ({px_to_cm(self.value):.1f} cm)", 
-                True, BLACK
-            )
-        else:
-            label_text = font.render(f"{self.label}: {self.value:.1f}{self.unit}", True, BLACK)
-        window.blit(label_text, (self.x, self.y - 20))
-        
+            return f"{self.label}: {self.value:.1f} px ({px_to_cm(self.value):.1f} cm)"
+        return f"{self.label}: {self.value:.1f}{self.unit}"
+    
+    def draw_track(self, surface, pos):
         # Draw track with gradient
-        gradient_rect = pygame.Surface((self.width, self.height))
-        for i in range(self.width):
-            progress = i / self.width
-            color = tuple(int(a + (b - a) * progress) for a, b in zip(BLUE, GREEN))
-            pygame.draw.line(gradient_rect, color, (i, 0), (i, self.height))
-        window.blit(gradient_rect, (self.x, self.y))
-        
+        size = (self.width, self.height)
+        gradient_rect = self.tracks.get(size)
+        if gradient_rect is None:
+            gradient_rect = self.tracks[size] = pygame.Surface(size)
+            for i in range(self.width):
+                progress = i / self.width
+                color = tuple(int(a + (b - a) * progress) for a, b in zip(BLUE, GREEN))
+                pygame.draw.line(gradient_rect, color, (i, 0), (i, self.height))
+        surface.blit(gradient_rect, pos)
+    
+    def knob_color(self, hover):
         # Draw button with hover effect
-        button_color = YELLOW if self.hover else BLUE
-        pygame.draw.circle(window, button_color, (int(self.button_x), self.y + self.height//2), 10)
-        
-    def handle_event(self, event):
-        super().handle_event(event)
-        if event.type == pygame.MOUSEMOTION:
-            mouse_pos = pygame.mouse.get_pos()
-            button_rect = pygame.Rect(self.button_x - 10, self.y - 5, 20, 20)
-            self.hover = button_rect.collidepoint(mouse_pos)
+        return YELLOW if hover else BLUE
 
 class Graph:
     def __init__(self, x, y, width, height, max_points=200):  # Increased buffer size
@@ -128,21 +156,33 @@ class Graph:
         self.max_value = 100  # Start with smaller scale
         self.min_value = -100
         
+        # Whole-run history (x axis in samples); view_span is set while zoomed out
+        self.history = [HistoryPyramid(), HistoryPyramid()]
+        self.sample_count = 0
+        self.view_span = None
+        self.area = pygame.Rect(x - 40, y, width + 40, height)  # the scale labels sit to the left
+        
     def add_data_point(self, value1, value2):
         self.data_ball1.append(value1)
         self.data_ball2.append(value2)
+        self.history[0].add_sample(self.sample_count, value1)
+        self.history[1].add_sample(self.sample_count, value2)
+        self.sample_count += 1
         
-        # Dynamic scale adjustment
-        all_values = list(self.data_ball1) + list(self.data_ball2)
-        if all_values:
-            max_val = max(all_values)
-            min_val = min(all_values)
-            max_abs = max(abs(max_val), abs(min_val))
-            
-            # Smooth scale changes
-            target_max = max_abs * 1.2
-            self.max_value = min(max(100, target_max), 2000)  # Limit scale range
-            self.min_value = -self.max_value
+        # Dynamic scale adjustment (straight over the buffers, no combined copy)
+        max_abs = max(max(self.data_ball1), -min(self.data_ball1),
+                      max(self.data_ball2), -min(self.data_ball2))
+        
+        # Smooth scale changes
+        target_max = max_abs * 1.2
+        self.max_value = min(max(100, target_max), 2000)  # Limit scale range
+        self.min_value = -self.max_value
+    
+    def zoom(self, steps):
+        """Mouse wheel: zoom out (down) through the whole run, back in (up) to the live buffer"""
+        span = (self.view_span or self.max_points) * (0.5 ** steps)
+        span = min(span, max(self.max_points, self.sample_count))
+        self.view_span = int(span) if span > self.max_points else None
     
     def draw(self, window):
         # Draw background with grid
@@ -166,7 +206,7 @@ class Graph:
                         (self.x + self.width, mid_y), 2)
         
         # Draw scale labels
-        font = pygame.font.Font(None, 20)
+        font = get_font(20)
         # Top value
         scale_label = font.render(f"{self.max_value:.0f}", True, BLACK)
         window.blit(scale_label, (self.x - 40, self.y))
@@ -187,9 +227,25 @@ class Graph:
             if len(points) > 1:
                 pygame.draw.lines(window, color, False, points, 2)
         
+        # Zoomed out: one min/max bar per pixel column from the matching history level
+        def draw_history(history, color):
+            end = self.sample_count
+            mins, maxs = history.query(end - self.view_span, end, self.width)
+            scale = (self.height // 2) / self.max_value
+            mid = self.y + self.height // 2
+            for column in np.flatnonzero(~np.isnan(mins)):
+                x = self.x + int(column)
+                y_low = max(self.y, min(int(mid - mins[column] * scale), self.y + self.height))
+                y_high = max(self.y, min(int(mid - maxs[column] * scale), self.y + self.height))
+                pygame.draw.line(window, color, (x, y_low), (x, y_high), 1)
+        
         # Draw both lines
-        draw_line(self.data_ball1, RED)
-        draw_line(self.data_ball2, BLUE)
+        if self.view_span is None:
+            draw_line(self.data_ball1, RED)
+            draw_line(self.data_ball2, BLUE)
+        else:
+            draw_history(self.history[0], RED)
+            draw_history(self.history[1], BLUE)
         
         # Draw border
         pygame.draw.rect(window, BLACK, (self.x, self.y, self.width, self.height), 2)
@@ -197,8 +253,10 @@ class Graph:
 class CollisionGraph(Graph):
     def __init__(self, x, y, width, height, max_points=200):
         super().__init__(x, y, width, height, max_points)
+        self.area = pygame.Rect(x, y - 25, width, height + 25)  # the count sits above
         self.collision_count = 0
-        self.collision_times = []
+        # Only the recent ones matter; a whole lab session's worth would pile up
+        self.collision_times = collections.deque(maxlen=max_points)
         self.last_collision_time = 0
         self.collision_cooldown = 5  # Reduced cooldown
         
@@ -239,21 +297,10 @@ class CollisionGraph(Graph):
         
         # Draw border and count
         pygame.draw.rect(window, BLACK, (self.x, self.y, self.width, self.height), 2)
-        font = pygame.font.Font(None, 24)
+        font = get_font(24)
         text = font.render(f"Collisions: {self.collision_count}", True, BLACK)
         window.blit(text, (self.x + 5, self.y - 25))
 
-def calculate_distance(point1, point2):
-    return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
-
-def px_to_cm(pixels):
-    """Convert pixels to centimeters"""
-    return pixels * CM_PER_PIXEL
-
-def cm_to_px(cm):
-    """Convert centimeters to pixels"""
-    return cm * PIXELS_PER_CM
-
 def draw_ball_with_gradient(window, pos, radius):
     """Draw a ball with gradient and shine effect"""
     # Main ball gradient
@@ -267,14 +314,26 @@ def draw_ball_with_gradient(window, pos, radius):
         shine_pos = (int(pos.x - radius/3), int(pos.y - radius/3))
         pygame.draw.circle(window, (255, 255, 255), shine_pos, radius//4)
 
-def draw(space, window, balls, sliders, stats, graphs):
+# Vertical gradients by (size, top color, bottom color), built on first use
+_gradients = {}
+
+def vertical_gradient(size, top, bottom):
+    """Surface fading from top to bottom color; shared, so do not draw on it"""
+    key = (size, top, bottom)
+    surface = _gradients.get(key)
+    if surface is None:
+        width, height = size
+        surface = _gradients[key] = pygame.Surface(size)
+        for y in range(height):
+            progress = y/height
+            color = [int(a + (b-a)*progress) for a, b in zip(top, bottom)]
+            pygame.draw.line(surface, color, (0, y), (width, y))
+    return surface
+
+def draw_simulation_area(space, window, balls, ghost_paths=()):
+    """Background, top bar, ropes and balls of the left-hand simulation area"""
     # Draw simulation area with gradient background
-    background = pygame.Surface((SIMULATION_WIDTH, HEIGHT))
-    for y in range(HEIGHT):
-        progress = y/HEIGHT
-        color = [int(a + (b-a)*progress) for a, b in zip(GRAY, (180, 180, 180))]
-        pygame.draw.line(background, color, (0, y), (SIMULATION_WIDTH, y))
-    window.blit(background, (0, 0))
+    window.blit(vertical_gradient((SIMULATION_WIDTH, HEIGHT), GRAY, (180, 180, 180)), (0, 0))
     
     # Draw top line with thickness
     for shape in space.shapes:
@@ -303,32 +362,51 @@ def draw(space, window, balls, sliders, stats, graphs):
             # Draw spring/rope
             pygame.draw.line(window, ROPE_COLOR, p1, p2, 3)
     
+    # Where the dragged ball would go if released now
+    draw_ghost_trails(window, ghost_paths, GHOST_COLOR, GHOST_BACKGROUND)
+    
     # Draw balls with enhanced effects
     for ball in balls:
         draw_ball_with_gradient(window, ball.position, 15)
-    
+
+def forecast_text(expected, building):
+    """Line under the sliders with what the response table expects of the current settings"""
+    if expected is None:
+        return "Predictions: building table..." if building else ""
+    def show(name, digits):
+        value = expected[name]
+        return "-" if value != value else f"{value:.{digits}f}"
+    return (f"Kick test: period {show('period', 2)} s, "
+            f"{show('collision_rate', 1)} hits/s, swing {show('max_swing', 0)}°")
+
+# Where the panel text goes, for redrawing only what changed
+FORECAST_RECT = pygame.Rect(SIMULATION_WIDTH + 15, 350, MENU_WIDTH - 30, 24)
+GRAPH_TITLES_RECT = pygame.Rect(SIMULATION_WIDTH, 380, MENU_WIDTH, 230)
+
+def stats_rect(stats):
+    return pygame.Rect(SIMULATION_WIDTH + 15, 395, MENU_WIDTH - 30, 35 * len(stats))
+
+def draw_menu_background(window):
     # Draw menu panel with gradient
-    menu_background = pygame.Surface((MENU_WIDTH, HEIGHT))
-    for y in range(HEIGHT):
-        progress = y/HEIGHT
-        color = [int(255 - 10*progress)] * 3  # Subtle gradient
-        pygame.draw.line(menu_background, color, (0, y), (MENU_WIDTH, y))
-    window.blit(menu_background, (SIMULATION_WIDTH, 0))
+    window.blit(vertical_gradient((MENU_WIDTH, HEIGHT), (255, 255, 255), (245, 245, 245)),
+                (SIMULATION_WIDTH, 0))  # Subtle gradient
     
     # Draw title with shadow
-    font = pygame.font.Font(None, 40)
+    font = get_font(40)
     title_shadow = font.render("Physics Controls", True, (100, 100, 100))
     title = font.render("Physics Controls", True, TITLE_COLOR)
     window.blit(title_shadow, (SIMULATION_WIDTH + 22, 22))
     window.blit(title, (SIMULATION_WIDTH + 20, 20))
-    
-    # Draw sliders
-    for slider in sliders:
-        slider.draw(window)
-    
+
+def draw_forecast(window, forecast):
+    # Predicted outcome of the settings, from the response table
+    if forecast:
+        window.blit(get_font(20).render(forecast, True, DARK_GRAY), (SIMULATION_WIDTH + 20, 354))
+
+def draw_stats(window, stats):
     # Draw statistics with enhanced styling
     stats_y = 400
-    font = pygame.font.Font(None, 24)
+    font = get_font(24)
     for label, value in stats.items():
         # Draw stat box with shadow
         stat_box = pygame.Rect(SIMULATION_WIDTH + 15, stats_y - 5, MENU_WIDTH - 30, 30)
@@ -343,106 +421,129 @@ def draw(space, window, balls, sliders, stats, graphs):
             text = font.render(f"{label}: {value:.1f}", True, TITLE_COLOR)
         window.blit(text, (SIMULATION_WIDTH + 20, stats_y))
         stats_y += 35
-    
+
+def draw_graph_titles(window):
     # Draw graph titles with style
-    font = pygame.font.Font(None, 28)
+    font = get_font(28)
     for title, y_pos in [("Velocity Graph", 380), ("Collision Graph", 580)]:
         text = font.render(title, True, TITLE_COLOR)
         text_shadow = font.render(title, True, (200, 200, 200))
         window.blit(text_shadow, (SIMULATION_WIDTH + 22, y_pos + 2))
         window.blit(text, (SIMULATION_WIDTH + 20, y_pos))
+
+def draw(space, window, balls, sliders, stats, graphs, ghost_paths=(), forecast="", regions=None):
+    """Draw the window, or only the widgets reaching into regions (RenderScheduler.regions())"""
+    layers = [
+        (pygame.Rect(0, 0, SIMULATION_WIDTH, HEIGHT),
+         lambda: draw_simulation_area(space, window, balls, ghost_paths)),
+        (pygame.Rect(SIMULATION_WIDTH, 0, MENU_WIDTH, HEIGHT), lambda: draw_menu_background(window)),
+    ]
+    layers += [(slider.area, functools.partial(slider.draw, window)) for slider in sliders]
+    layers.append((FORECAST_RECT, lambda: draw_forecast(window, forecast)))
+    layers.append((stats_rect(stats), lambda: draw_stats(window, stats)))
+    layers.append((GRAPH_TITLES_RECT, lambda: draw_graph_titles(window)))
+    layers += [(graph.area, functools.partial(graph.draw, window)) for graph in graphs]
+    render.redraw(window, [window.get_rect()] if regions is None else regions, layers)
+
+def collect_stats(states, collision_graph):
+    """Values shown in the statistics boxes, from the balls' BodyStates"""
+    return {
+        "Ball 1 Velocity": float(states.speeds[0]),
+        "Ball 2 Velocity": float(states.speeds[1]),
+        "Distance": float(states.distances[0, 1]),
+        "Collisions": collision_graph.collision_count
+    }
+
+def track_balls(balls, anchors):
+    """BodyStates of the balls, hanging from their anchors, read once already"""
+    states = BodyStates(balls)
+    states.pivots[:] = [tuple(anchor.position) for anchor in anchors]
+    return states.refresh()
+
+# Order of the sliders create_panel() returns
+SLIDER_NAMES = ("gravity", "mass", "elasticity", "friction", "rope_length", "rope_stiffness")
+
+def set_slider(name, value):
+    """set NAME VALUE command of the state server: like dragging that slider to value"""
+    if name not in SLIDER_NAMES:
+        raise ValueError(f"unknown slider {name} (one of {', '.join(SLIDER_NAMES)})")
+    return SLIDER_NAMES.index(name), float(value)
+
+REMOTE_COMMANDS = {"set": set_slider}
+
+# Slider predictions, rebuilt by lato.response whenever the physics or the ranges change
+RESPONSE_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "slider_response.npz")
+
+def slider_ranges(sliders):
+    return {name: (slider.min_val, slider.max_val) for name, slider in zip(SLIDER_NAMES, sliders)}
+
+def slider_settings(sliders):
+    return {name: slider.value for name, slider in zip(SLIDER_NAMES, sliders)}
+
+def build_response_table(ranges, profile):
+    """Start rebuilding the table in its own process, which finishes it even if the window closes"""
+    command = [sys.executable, "-m", "lato.response", "--output", RESPONSE_TABLE,
+               "--settings", json.dumps(profile)]
+    command += [f"--range={name},{low},{high}" for name, (low, high) in ranges.items()]
+    return subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL, start_new_session=True)
+
+def create_panel():
+    """Sliders and graphs of the control panel"""
+    # Enhanced sliders with units
+    sliders = [
+        AdvancedSlider(MENU_X + 10, 80, MENU_WIDTH - 40, 0, 2000, 981, "Gravity", " px/s²"),
+        AdvancedSlider(MENU_X + 10, 130, MENU_WIDTH - 40, 0, 2, 1, "Mass", " kg"),
+        AdvancedSlider(MENU_X + 10, 180, MENU_WIDTH - 40, 0, 1, 0.95, "Elasticity", ""),
+        AdvancedSlider(MENU_X + 10, 230, MENU_WIDTH - 40, 0, 1, 0.5, "Friction", ""),
+        AdvancedSlider(MENU_X + 10, 280, MENU_WIDTH - 40, 
+                      cm_to_px(5), cm_to_px(30), cm_to_px(10), "Rope Length", ""),
+        AdvancedSlider(MENU_X + 10, 330, MENU_WIDTH - 40, 0.1, 5.0, 1.0, "Rope Stiffness", "")
+    ]
     
-    # Draw graphs
-    for graph in graphs:
-        graph.draw(window)
-
-def create_balls(space, initial_pos=None, rope_length=100, rope_stiffness=1.0, pull_height=0):
-    """Create balls with enhanced rope physics and pullable top line"""
-    # Create static line segment on top with adjustable height
-    base_height = 100  # Increased base height
-    current_height = base_height - pull_height
-    
-    # Create the top bar as a static body
-    top_bar = pymunk.Body(body_type=pymunk.Body.STATIC)
-    line_segment = pymunk.Segment(
-        top_bar,
-        (100, current_height),  # Extended line length
-        (SIMULATION_WIDTH-100, current_height),
-        5
-    )
-    line_segment.friction = 0.5
-    line_segment.elasticity = 0.5
-    space.add(line_segment)
-    
-    # Create anchor points for springs at fixed distances on the line
-    anchor1 = pymunk.Body(body_type=pymunk.Body.STATIC)
-    anchor2 = pymunk.Body(body_type=pymunk.Body.STATIC)
-    anchor1.position = (SIMULATION_WIDTH/2 - 100, current_height)  # Increased spacing
-    anchor2.position = (SIMULATION_WIDTH/2 + 100, current_height)  # Increased spacing
-    
-    # Create balls
-    ball1 = pymunk.Body(1, pymunk.moment_for_circle(1, 0, 15))
-    ball2 = pymunk.Body(1, pymunk.moment_for_circle(1, 0, 15))
-    
-    # Set initial positions
-    if initial_pos and all(isinstance(pos, (tuple, list)) for pos in initial_pos.values()):
-        ball1.position = initial_pos['ball1']
-        ball2.position = initial_pos['ball2']
-    else:
-        ball1.position = (anchor1.position.x, anchor1.position.y + rope_length)
-        ball2.position = (anchor2.position.x, anchor2.position.y + rope_length)
-    
-    shape1 = pymunk.Circle(ball1, 15)
-    shape2 = pymunk.Circle(ball2, 15)
-    
-    for shape in [shape1, shape2]:
-        shape.mass = 3
-        shape.friction = 0.5
-        shape.elasticity = 0.95
-        shape.collision_type = 1
-    
-    space.add(ball1, ball2, shape1, shape2)
-    
-    # Create springs with damping
-    spring1 = pymunk.DampedSpring(
-        anchor1, ball1, 
-        (0, 0), (0, 0), 
-        rope_length, 
-        rope_stiffness * 100, 
-        1.0
-    )
-    spring2 = pymunk.DampedSpring(
-        anchor2, ball2, 
-        (0, 0), (0, 0), 
-        rope_length, 
-        rope_stiffness * 100, 
-        1.0
-    )
+    # Create graphs
+    velocity_graph = Graph(MENU_X + 20, 420, MENU_WIDTH - 40, 150)
+    collision_graph = CollisionGraph(MENU_X + 20, 620, MENU_WIDTH - 40, 150)
+    return sliders, velocity_graph, collision_graph
+
+def build_space(positions, rope_length, rope_stiffness, profile, gravity=981, materials=None,
+                velocities=None):
+    """Space with both balls; the live run, its resets and the previews are all built here"""
+    space = pymunk.Space()
+    space.gravity = (0, gravity)
+    enable_sleeping(space)
+    tuning.apply_profile(space, profile)
     
-    # Create rope constraint between balls
-    rope = pymunk.DampedSpring(
-        ball1, ball2, 
-        (0, 0), (0, 0), 
-        100,  # Fixed distance between balls
-        rope_stiffness * 50, 
-        0.5
-    )
+    balls, anchors, handle = create_balls(space, positions, rope_length, rope_stiffness,
+                                          stiffness_scale=profile['stiffness_scale'])
+    if velocities is not None:
+        for ball, velocity in zip(balls, velocities):
+            ball.velocity = velocity
     
-    space.add(spring1, spring2, rope)
+    if materials is not None:
+        for ball in balls:
+            ball.mass = materials['mass']
+            for shape in space.shapes:
+                if shape.body == ball:
+                    shape.elasticity = materials['elasticity']
+                    shape.friction = materials['friction']
     
-    return [ball1, ball2], [anchor1, anchor2], top_bar
+    return space, balls, anchors, handle
 
-def draw_setup_screen(window, ball_positions):
+def draw_setup_screen(window, ball_positions, ghost_paths=()):
     """Draw setup screen for initial ball positions"""
     window.fill(WHITE)
     pygame.draw.rect(window, GRAY, (0, 0, SIMULATION_WIDTH, HEIGHT))
     
+    # Where the balls will go once started
+    draw_ghost_trails(window, ghost_paths, GHOST_COLOR, GRAY)
+    
     # Draw balls
     for pos in ball_positions.values():
         pygame.draw.circle(window, RED, (int(pos[0]), int(pos[1])), 15)
     
     # Draw instructions
-    font = pygame.font.Font(None, 36)
+    font = get_font(36)
     text = font.render("Click and drag balls to set initial positions", True, BLACK)
     window.blit(text, (SIMULATION_WIDTH/4, 50))
     
@@ -456,10 +557,21 @@ def draw_setup_screen(window, ball_positions):
     pygame.display.update()
     return button_rect
 
-def run(window, width, height):
+def run(window, width, height, profile=None, serve=None, memory=None, frames=None):
+    """The interactive simulation; profile holds solver settings from lato.tuning.
+
+    serve is an address to stream the running simulation to and take slider
+    settings from (see lato.live). memory is a memtrack.MemoryTracker for the
+    running simulation's frames; returns its budget failures, if any. With
+    frames the setup screen is skipped (the balls start where they are placed
+    by default) and the window quits after that many frames, so it runs
+    unattended.
+    """
+    if profile is None:
+        profile = tuning.DEFAULT_PROFILE
     run = True
     clock = pygame.time.Clock()
-    simulation_started = False
+    simulation_started = frames is not None
     
     # Initial ball positions
     ball_positions = {
@@ -475,8 +587,20 @@ def run(window, width, height):
     current_rope_length = 100  # Initial rope length
     current_rope_stiffness = 1.0  # Initial rope stiffness
     
+    # Ghost trails run a few seconds ahead on a background thread
+    predictor = TrajectoryPredictor(substeps=profile['substeps'])
+    predictor.start()
+    
+    def predict_setup():
+        positions = dict(ball_positions)
+        predictor.request(lambda: build_space(positions, current_rope_length, current_rope_stiffness,
+                                              profile)[:2])
+    
+    predict_setup()
     while not simulation_started and run:
-        start_button = draw_setup_screen(window, ball_positions)
+        prediction = predictor.latest()
+        start_button = draw_setup_screen(window, ball_positions,
+                                         prediction.paths if prediction else ())
         
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -500,30 +624,28 @@ def run(window, width, height):
             elif event.type == pygame.MOUSEMOTION:
                 if selected_ball and event.pos[0] < SIMULATION_WIDTH:
                     ball_positions[selected_ball] = event.pos
+                    predict_setup()
+        
+        clock.tick(60)
     
-    # Initialize physics simulation
-    space = pymunk.Space()
-    space.gravity = (0, 981)
-    
-    balls, anchors, top_bar = create_balls(space, ball_positions, 
-                                         current_rope_length, 
-                                         current_rope_stiffness)
+    predictor.clear()
     
-    # Enhanced sliders with units
-    sliders = [
-        AdvancedSlider(MENU_X + 10, 80, MENU_WIDTH - 40, 0, 2000, 981, "Gravity", " px/s²"),
-        AdvancedSlider(MENU_X + 10, 130, MENU_WIDTH - 40, 0, 2, 1, "Mass", " kg"),
-        AdvancedSlider(MENU_X + 10, 180, MENU_WIDTH - 40, 0, 1, 0.95, "Elasticity", ""),
-        AdvancedSlider(MENU_X + 10, 230, MENU_WIDTH - 40, 0, 1, 0.5, "Friction", ""),
-        AdvancedSlider(MENU_X + 10, 280, MENU_WIDTH - 40, 
-                      cm_to_px(5), cm_to_px(30), cm_to_px(10), "Rope Length", ""),
-        AdvancedSlider(MENU_X + 10, 330, MENU_WIDTH - 40, 0.1, 5.0, 1.0, "Rope Stiffness", "")
-    ]
+    # Initialize physics simulation
+    space, balls, anchors, handle = build_space(ball_positions, current_rope_length,
+                                                current_rope_stiffness, profile)
+    states = track_balls(balls, anchors)
     
-    # Create graphs
-    velocity_graph = Graph(MENU_X + 20, 420, MENU_WIDTH - 40, 150)
-    collision_graph = CollisionGraph(MENU_X + 20, 620, MENU_WIDTH - 40, 150)
+    sliders, velocity_graph, collision_graph = create_panel()
     graphs = [velocity_graph, collision_graph]
+    panel = WidgetLayer()
+    for slider in sliders:
+        panel.add(slider)
+    
+    # What the settings lead to, looked up while a slider moves instead of waiting for the balls
+    response_base = response.base_scenario(profile)
+    responses = response.load_current(RESPONSE_TABLE, response_base, slider_ranges(sliders))
+    builder = build_response_table(slider_ranges(sliders), profile) if responses is None else None
+    expected = responses.lookup(slider_settings(sliders)) if responses is not None else None
     
     # Create simulation time counter
     simulation_time = 0
@@ -535,50 +657,62 @@ def run(window, width, height):
     
     def reset_simulation(space, balls, handle, settings):
         """Reset simulation with new settings"""
-        space = pymunk.Space()
-        space.gravity = (0, settings['gravity'])
-        
-        # Create new balls with current settings
-        balls, handle = create_balls(space, 
-                                   initial_pos={'ball1': balls[0].position, 
-                                              'ball2': balls[1].position},
-                                   rope_length=settings['rope_length'],
-                                   rope_stiffness=settings['rope_stiffness'])
-        
-        # Apply other physics properties
-        for ball in balls:
-            ball.mass = settings['mass']
-            for shape in space.shapes:
-                if shape.body == ball:
-                    shape.elasticity = settings['elasticity']
-                    shape.friction = settings['friction']
+        # Create new balls with current settings, keeping them in motion
+        space, balls, anchors, handle = build_space(
+            {'ball1': tuple(balls[0].position), 'ball2': tuple(balls[1].position)},
+            settings['rope_length'], settings['rope_stiffness'], profile,
+            settings['gravity'], settings, [ball.velocity for ball in balls])
+        
+        space.add_collision_handler(1, 1).begin = lambda arb, space, _: collision_handler(
+            arb, space, (collision_graph, simulation_time)
+        )
         
-        return space, balls, handle
+        return space, balls, handle, track_balls(balls, anchors)
+    
+    def predict_release():
+        """Ask for the paths the balls take if the dragged ball is let go now"""
+        materials = {
+            'mass': balls[0].mass,
+            'elasticity': next(shape.elasticity for shape in space.shapes if shape.body == balls[0]),
+            'friction': next(shape.friction for shape in space.shapes if shape.body == balls[0]),
+        }
+        # Plain values only: the worker builds its own space and never touches this one
+        positions = {'ball1': tuple(balls[0].position), 'ball2': tuple(balls[1].position)}
+        velocities = [tuple(ball.velocity) for ball in balls]
+        args = (positions, current_rope_length, current_rope_stiffness, profile,
+                space.gravity.y, materials, velocities)
+        predictor.request(lambda: build_space(*args)[:2])
+    
+    # (slider, value) from clients of the state server
+    remote = queue.SimpleQueue()
+    server = StateServer(serve, REMOTE_COMMANDS, remote.put).start() if serve else None
+    
+    scheduler = render.RenderScheduler(window.get_rect())
+    
+    tracker = memory if memory is not None else memtrack.UNTRACKED
+    frame = 0
     
     while run and simulation_started:
-        simulation_time += 1  # Increment time counter
-        
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                run = False
-            
-            # Handle slider events and check for changes
-            settings_changed = False
-            current_settings = {
-                'gravity': space.gravity.y,
-                'mass': balls[0].mass,
-                'elasticity': next(shape.elasticity for shape in space.shapes if shape.body == balls[0]),
-                'friction': next(shape.friction for shape in space.shapes if shape.body == balls[0]),
-                'rope_length': current_rope_length,
-                'rope_stiffness': current_rope_stiffness
-            }
-            
-            for i, slider in enumerate(sliders):
-                old_value = slider.value
-                slider.handle_event(event)
-                if old_value != slider.value:
-                    settings_changed = True
-            
+        tracker.begin_frame()
+        tracker.phase("input")
+        drag_moved = False
+        frame += 1
+        if frames is not None and frame > frames:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+        events, changed = panel.handle(pygame.event.get())
+        while not remote.empty():
+            index, value = remote.get()
+            if sliders[index].set_value(value):
+                changed = True
+        
+        if builder is not None and builder.poll() is not None:
+            responses = response.load_current(RESPONSE_TABLE, response_base, slider_ranges(sliders))
+            builder = None
+            if responses is not None:
+                expected = responses.lookup(slider_settings(sliders))
+        
+        # Reset simulation if settings changed (once per frame, however far the slider moved)
+        if changed:
             new_settings = {
                 'gravity': sliders[0].value,
                 'mass': sliders[1].value,
@@ -587,12 +721,15 @@ def run(window, width, height):
                 'rope_length': sliders[4].value,
                 'rope_stiffness': sliders[5].value
             }
-            
-            # Reset simulation if settings changed
-            if settings_changed:
-                space, balls, handle = reset_simulation(space, balls, handle, new_settings)
-                current_rope_length = new_settings['rope_length']
-                current_rope_stiffness = new_settings['rope_stiffness']
+            space, balls, handle, states = reset_simulation(space, balls, handle, new_settings)
+            current_rope_length = new_settings['rope_length']
+            current_rope_stiffness = new_settings['rope_stiffness']
+            if responses is not None:
+                expected = responses.lookup(new_settings)
+        
+        for event in events:
+            if event.type == pygame.QUIT:
+                run = False
             
             # Handle ball interaction
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -600,6 +737,8 @@ def run(window, width, height):
                 for ball in balls:
                     if calculate_distance(mouse_pos, ball.position) < 20:
                         selected_ball = ball
+                        wake(balls)
+                        drag_moved = True
             
             elif event.type == pygame.MOUSEBUTTONUP:
                 if selected_ball:
@@ -607,37 +746,90 @@ def run(window, width, height):
                     force_x = (selected_ball.position.x - mouse_pos[0]) * 5
                     force_y = (selected_ball.position.y - mouse_pos[1]) * 5
                     selected_ball.apply_impulse_at_local_point((force_x, force_y))
+                    wake(balls)
                     selected_ball = None
+                    predictor.clear()
             
             elif event.type == pygame.MOUSEMOTION:
                 if selected_ball and event.pos[0] < SIMULATION_WIDTH:
                     selected_ball.position = event.pos
+                    drag_moved = True
+            
+            elif event.type == pygame.MOUSEWHEEL:
+                graph_rect = pygame.Rect(velocity_graph.x, velocity_graph.y,
+                                         velocity_graph.width, velocity_graph.height)
+                if graph_rect.collidepoint(pygame.mouse.get_pos()):
+                    velocity_graph.zoom(event.y)
+        
+        # At rest (and not being dragged) nothing needs stepping, drawing or presenting
+        tracker.phase("physics")
+        idle = (bodies_at_rest(balls) and selected_ball is None
+                and not any(slider.dragging for slider in sliders))
+        
+        if not idle:
+            simulation_time += 1  # Increment time counter
+            
+            # Update physics with fixed timestep
+            substeps = profile['substeps']
+            for _ in range(substeps):
+                space.step(1/60.0 / substeps)
+            
+            # One read of both balls feeds the graphs and the stats
+            states.refresh()
+            if server is not None:
+                server.publish(simulation_time / 60.0, states)
+            
+            # Update graphs
+            velocity_graph.add_data_point(
+                float(states.velocities[0, 1]),
+                float(states.velocities[1, 1])
+            )
+            collision_graph.update(simulation_time)
         
-        # Update physics with fixed timestep
-        space.step(1/60.0)
-        
-        # Update graphs
-        velocity_graph.add_data_point(
-            float(balls[0].velocity.y),
-            float(balls[1].velocity.y)
-        )
-        collision_graph.update(simulation_time)
+        # One request per frame however many motion events came in
+        if drag_moved and selected_ball is not None:
+            predict_release()
+        prediction = predictor.latest()
+        ghost_paths = prediction.paths if prediction else ()
         
         # Update stats
-        stats = {
-            "Ball 1 Velocity": math.sqrt(balls[0].velocity.x**2 + balls[0].velocity.y**2),
-            "Ball 2 Velocity": math.sqrt(balls[1].velocity.x**2 + balls[1].velocity.y**2),
-            "Distance": calculate_distance(balls[0].position, balls[1].position),
-            "Collisions": collision_graph.collision_count
-        }
-        
-        # Update drawing
-        draw(space, window, balls, sliders, stats, graphs)
-        
-        pygame.display.update()
-        clock.tick(60)
-    
+        tracker.phase("draw")
+        stats = collect_stats(states, collision_graph)
+        forecast = forecast_text(expected, builder is not None)
+        
+        # Report what each widget shows so only changed regions get presented
+        scene_points = [ball.position for ball in balls] + [anchor.position for anchor in anchors]
+        scheduler.track("scene", render.bounding_rect(scene_points, 30),
+                        tuple((p.x, p.y) for p in scene_points))
+        for i, slider in enumerate(sliders):
+            scheduler.track(f"slider{i}", slider.area, slider.look())
+        scheduler.track("stats", stats_rect(stats),
+                        tuple(round(value, 1) for value in stats.values()))
+        scheduler.track("velocity_graph", velocity_graph.area,
+                        (velocity_graph.sample_count, velocity_graph.view_span))
+        # The collision strip only scrolls while a spike is on screen
+        scheduler.track("collision_graph", collision_graph.area,
+                        (collision_graph.collision_count,
+                         simulation_time if any(collision_graph.data_ball1) else 0))
+        scheduler.track("forecast", FORECAST_RECT, forecast)
+        ghost_points = [point for path in ghost_paths for point in path]
+        scheduler.track("ghost", render.bounding_rect(ghost_points, 4) if ghost_points else (0, 0, 0, 0),
+                        prediction.generation if prediction else None)
+        
+        if scheduler.needs_redraw():
+            # Update drawing
+            draw(space, window, balls, sliders, stats, graphs, ghost_paths, forecast, scheduler.regions())
+            scheduler.present()
+        tracker.end_frame()
+        
+        clock.tick(render.IDLE_FPS if idle else 60)
+    
+    if server is not None:
+        server.stop()
+    predictor.stop()
     pygame.quit()
+    if memory is not None:
+        return memtrack.finish(memory)
 
 def collision_handler(arbiter, space, data):
     """Enhanced collision handler with time stamp"""
@@ -650,58 +842,23 @@ def collision_handler(arbiter, space, data):
     
     return True
 
-def calculate_pendulum_energy(ball, length, gravity=981):
-    """Calculate pendulum energy using formula from section 2.1"""
-    # E = mgl(1-cos θ) + (ml²θ̇²)/2
-    mass = ball.mass
-    angle = math.atan2(ball.position.y - length, ball.position.x - SIMULATION_WIDTH/2)
-    angular_velocity = ball.angular_velocity
-    
-    potential_energy = mass * gravity * length * (1 - math.cos(angle))
-    kinetic_energy = 0.5 * mass * (length**2) * (angular_velocity**2)
-    
-    return potential_energy + kinetic_energy
-
-def check_slack_condition(ball, length, gravity=981):
-    """Check slack condition using formula from section 2.2.1"""
-    # mlθ̇² + mgcos θ > 0
-    mass = ball.mass
-    angle = math.atan2(ball.position.y - length, ball.position.x - SIMULATION_WIDTH/2)
-    angular_velocity = ball.angular_velocity
-    
-    return (mass * length * angular_velocity**2 + mass * gravity * math.cos(angle)) > 0
-
-def calculate_slack_time(ball, length, gravity=981):
-    """Calculate slack time using formula from section 2.2.2"""
-    # t = 4v₀sin θ/g
-    velocity = math.sqrt(ball.velocity.x**2 + ball.velocity.y**2)
-    angle = math.atan2(ball.position.y - length, ball.position.x - SIMULATION_WIDTH/2)
-    
-    return 4 * velocity * math.sin(angle) / gravity
-
-def update_ball_physics(ball, handle, length, stiffness, dt):
-    """Update ball physics using Mathieu's equation from section 2.3"""
-    # -θ̈ = (g - a₀ω²cos ωt)sin θ
-    gravity = 981
-    omega = math.sqrt(gravity/length)  # Natural frequency
-    
-    angle = math.atan2(ball.position.y - handle.position.y, 
-                      ball.position.x - handle.position.x)
-    
-    # Calculate acceleration
-    angular_acceleration = -(gravity/length) * math.sin(angle)
-    angular_acceleration -= (stiffness * omega**2 * math.cos(omega * dt)) * math.sin(angle)
-    
-    # Update angular velocity
-    ball.angular_velocity += angular_acceleration * dt
-    
-    # Update position
-    new_x = handle.position.x + length * math.sin(angle + ball.angular_velocity * dt)
-    new_y = handle.position.y + length * math.cos(angle + ball.angular_velocity * dt)
-    
-    ball.position = pymunk.Vec2d(new_x, new_y)
-
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Spring pendulum simulation")
+    parser.add_argument("--profile", help="tuned solver profile written by python -m lato.tuning")
+    parser.add_argument("--serve", nargs="?", const=DEFAULT_ADDRESS, metavar="ADDRESS",
+                        help="stream state to and take slider settings from local clients "
+                             f"(unix:/path or tcp://host:port, default {DEFAULT_ADDRESS})")
+    parser.add_argument("--memtrack", nargs="?", const="", metavar="REPORT",
+                        help="trace allocations per frame and phase and check them against the memory "
+                             "budget at exit (optionally writing a JSON report); slows the loop down")
+    parser.add_argument("--frames", type=int,
+                        help="skip the setup screen and quit after this many frames (runs unattended)")
+    args = parser.parse_args()
+    
+    pygame.init()
     window = pygame.display.set_mode((WIDTH, HEIGHT))
     pygame.display.set_caption("Physics Simulation Controls")
-    run(window, WIDTH, HEIGHT)
\ No newline at end of file
+    memory = memtrack.MemoryTracker(report_path=args.memtrack).start() if args.memtrack is not None else None
+    failures = run(window, WIDTH, HEIGHT, tuning.load_profile(args.profile) if args.profile else None,
+                   args.serve, memory, args.frames)
+    sys.exit(1 if failures else 0)
\ No newline at end of file
@@ -1,18 +1,22 @@
 import pygame
-import pymunk
 import sys
-from pymunk import Vec2d
+import argparse
 import math
-import matplotlib.pyplot as plt
-from collections import deque
+from collections import deque, namedtuple
+from functools import partial
+import copy
+import queue
 import numpy as np
-
-# Initialize Pygame and Pymunk
-pygame.init()
-WIDTH = 800
-HEIGHT = 600
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Multiple Lato-lato Simulation")
+from lato import checkpoint, tuning
+from lato.live import DEFAULT_ADDRESS, LATO_COMMANDS, StateServer
+from lato.physics import WIDTH, HEIGHT
+from lato.simulation import (AngleHistory, adjust_automation, is_idle, new_simulation,
+                             step_simulation, toggle_auto, toggle_pull)
+from lato.spectrum import drive_frequency
+import memtrack
+import render
+from widgets import Widget, WidgetLayer, get_font
+from physics_thread import PhysicsThread
 
 # Enhanced colors - Define all colors at the start
 BACKGROUND = (220, 220, 220)  # Lighter gray
@@ -25,96 +29,128 @@ BALL_SHADOW = (200, 30, 30)   # Darker red for shadow
 STRING_COLOR = (160, 120, 80)  # Warmer brown
 RED = BALL_RED  # Define RED to maintain compatibility
 
-# Setup Pymunk space
-space = pymunk.Space()
-space.gravity = Vec2d(0, 981)
-
-class Button:
-    def __init__(self, x, y, width, height, text):
-        self.rect = pygame.Rect(x, y, width, height)
+class Button(Widget):
+    def __init__(self, x, y, width, height, text, action=None):
+        # The shadow hangs 2px below the button
+        super().__init__((x, y, width, height), (x, y, width, height + 2))
         self.text = text
+        self.action = action  # action(state) when clicked
         self.color = BUTTON_COLOR
         self.hover_color = BUTTON_HOVER
-        self.font = pygame.font.Font(None, 36)
-        
-    def draw(self, screen):
-        color = self.hover_color if self.is_hovered() else self.color
-        # Draw button shadow
-        shadow_rect = self.rect.copy()
-        shadow_rect.y += 2
-        pygame.draw.rect(screen, (50, 50, 50), shadow_rect, border_radius=5)
+        self.font = get_font(36)
+        
+    def render(self, look):
+        surface = pygame.Surface(self.area.size, pygame.SRCALPHA)
+        rect = pygame.Rect(0, 0, self.rect.width, self.rect.height)
+        color = self.hover_color if look != "normal" else self.color
+        # Draw button shadow (a pressed button sits on it)
+        if look == "pressed":
+            rect.y += 2
+        else:
+            pygame.draw.rect(surface, (50, 50, 50), rect.move(0, 2), border_radius=5)
         # Draw main button
-        pygame.draw.rect(screen, color, self.rect, border_radius=5)
+        pygame.draw.rect(surface, color, rect, border_radius=5)
         # Draw button highlight
-        pygame.draw.rect(screen, (color[0]+20, color[1]+20, color[2]+20), 
-                        self.rect, border_radius=5, width=2)
+        pygame.draw.rect(surface, (color[0]+20, color[1]+20, color[2]+20), 
+                        rect, border_radius=5, width=2)
         
         text_surface = self.font.render(self.text, True, (255, 255, 255))
-        text_rect = text_surface.get_rect(center=self.rect.center)
-        screen.blit(text_surface, text_rect)
-        
-    def is_hovered(self):
-        return self.rect.collidepoint(pygame.mouse.get_pos())
-
-class AutomationSettings:
-    def __init__(self):
-        self.is_automated = False
-        self.interval = 2.0
-        self.timer = 0
-        self.is_up = False
-        self.last_update = 0
-        self.stop_time = 10.0
-        self.start_time = 0
-        self.is_finished = False
-        self.pull_force = 200  # Default pull-up force
-        self.max_force = 400   # Maximum allowed force
-        self.min_force = 50    # Minimum allowed force
+        text_rect = text_surface.get_rect(center=rect.center)
+        surface.blit(text_surface, text_rect)
+        return surface
+    
+    def on_press(self, pos):
+        self.pressed = True
+        # Buttons act as soon as they are pressed, as they always have
+        return True, True
 
-class GraphData:
+class GraphData(AngleHistory):
     def __init__(self, width=400, height=200, max_points=600):
+        super().__init__(max_points)
         self.width = width
         self.height = height
-        self.max_points = max_points
-        self.times = deque(maxlen=max_points)
-        self.angles = deque(maxlen=max_points)
-        self.start_time = None
-        self.window_start = 0  # Track the start of the visible time window
         self.surface = pygame.Surface((width, height), pygame.SRCALPHA)
         self.rect = pygame.Rect(WIDTH - width - 40, HEIGHT - height - 40, width, height)
+        # Loading a font reads the font file, so do it once rather than per label
+        self.small_font = pygame.font.Font(None, 20)
+        self.font = pygame.font.Font(None, 24)
         
-    def update(self, current_time, angle):
-        if self.start_time is None:
-            self.start_time = current_time
-            
-        time = current_time - self.start_time
-        
-        # Update window start time to create scrolling effect
-        if time > 10:  # When we pass 10 seconds
-            self.window_start = time - 10  # Keep the last 10 seconds visible
+        self.show_spectrum = False
+        self.spectrum_surface = pygame.Surface((300, height), pygame.SRCALPHA)
+        self.spectrum_rect = pygame.Rect(40, HEIGHT - height - 40, 300, height)
         
-        self.times.append(time)
-        self.angles.append(abs(angle))
+        # Set while the history view is zoomed or panned away from the live window
+        self.history_span = None
+        self.history_end = None
+    
+    def handle_event(self, event):
+        """S toggles the spectrum panel, arrows pan and the mouse wheel zooms the history"""
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_s:
+                self.show_spectrum = not self.show_spectrum
+            elif event.key == pygame.K_LEFT:
+                self.pan(-0.25)
+            elif event.key == pygame.K_RIGHT:
+                self.pan(0.25)
+        elif event.type == pygame.MOUSEWHEEL and self.rect.collidepoint(pygame.mouse.get_pos()):
+            self.zoom(event.y)
+    
+    def zoom(self, steps):
+        """Mouse wheel: each step halves (up) or doubles (down) the visible time span"""
+        span = (self.history_span or 10.0) * (0.5 ** steps)
+        latest = self.history.end_time() or 0
+        span = min(span, max(10.0, latest - (self.history.start_time() or 0)))
+        if span <= 10.0 and self.history_end is None:
+            # Back to the live 10 s window
+            self.history_span = None
+        else:
+            self.history_span = max(span, 1.0)
+    
+    def pan(self, fraction):
+        """Shift the view by a fraction of its span; panning past the newest data follows live again"""
+        latest = self.history.end_time()
+        if latest is None:
+            return
+        span = self.history_span or 10.0
+        end = (self.history_end if self.history_end is not None else latest) + fraction * span
+        earliest = (self.history.start_time() or 0) + span
+        if end >= latest:
+            self.history_end = None
+        else:
+            self.history_end = max(end, earliest)
+            self.history_span = span
         
     def draw(self, screen):
         self.surface.fill((220, 220, 220, 240))
         
+        # Live view scrolls with the newest data; zoomed/panned views read the history pyramid
+        from_history = self.history_span is not None or self.history_end is not None
+        if from_history:
+            span = self.history_span or 10.0
+            latest = self.history.end_time() or 0
+            window_end = self.history_end if self.history_end is not None else max(latest, span)
+            window_start = window_end - span
+        else:
+            span = 10.0
+            window_start = self.window_start
+            window_end = window_start + span
+        
         # Draw grid
         grid_color = (180, 180, 180, 255)
-        # Vertical lines every second
-        window_end = self.window_start + 10
+        # Vertical lines every tenth of the window
         for i in range(11):
-            time_value = self.window_start + i
+            time_value = window_start + i * span / 10
             x = int(30 + ((i / 10.0) * (self.width - 60)))
             pygame.draw.line(self.surface, grid_color, (x, 30), (x, self.height - 30))
-            if i % 2 == 0:  # Label every 2 seconds
-                time_label = pygame.font.Font(None, 20).render(f"{time_value:.0f}", True, (0, 0, 0))
+            if i % 2 == 0:  # Label every other line
+                time_label = self.small_font.render(f"{time_value:.0f}", True, (0, 0, 0))
                 self.surface.blit(time_label, (x - 10, self.height - 25))
         
         # Horizontal lines
         for i in range(8):
             y = int(self.height - ((i * 0.25 / 1.75) * (self.height - 60)) - 30)
             pygame.draw.line(self.surface, grid_color, (30, y), (self.width - 30, y))
-            angle_label = pygame.font.Font(None, 20).render(f"{i*0.25:.2f}", True, (0, 0, 0))
+            angle_label = self.small_font.render(f"{i*0.25:.2f}", True, (0, 0, 0))
             self.surface.blit(angle_label, (5, y - 8))
         
         # Draw axes
@@ -125,7 +161,7 @@ class GraphData:
                         (30, self.height - 30), 2)
         
         # Draw labels
-        font = pygame.font.Font(None, 24)
+        font = self.font
         title = font.render('θ as a Function of Time (Kapitza Model)', True, (0, 0, 0))
         x_label = font.render('Time (s)', True, (0, 0, 0))
         y_label = font.render('θ(t) (rad)', True, (0, 0, 0))
@@ -135,8 +171,19 @@ class GraphData:
         y_label_rotated = pygame.transform.rotate(y_label, 90)
         self.surface.blit(y_label_rotated, (5, self.height//2 - y_label_rotated.get_width()//2))
         
+        # Draw one min/max bar per pixel column from the matching history level
+        if from_history:
+            columns = self.width - 60
+            mins, maxs = self.history.query(window_start, window_end, columns)
+            scale = (self.height - 60) / 1.75
+            for column in np.flatnonzero(~np.isnan(mins)):
+                x = 30 + int(column)
+                y_low = max(30, min(int(self.height - 30 - mins[column] * scale), self.height - 30))
+                y_high = max(30, min(int(self.height - 30 - maxs[column] * scale), self.height - 30))
+                pygame.draw.line(self.surface, (0, 100, 255, 255), (x, y_low), (x, y_high), 2)
+        
         # Draw data points with scrolling
-        if len(self.times) > 1:
+        elif len(self.times) > 1:
             points = []
             for i in range(len(self.times)):
                 time = self.times[i]
@@ -157,72 +204,64 @@ class GraphData:
         pygame.draw.rect(self.surface, (0, 0, 0, 255), (0, 0, self.width, self.height), 2)
         
         # Draw current window time range
-        time_range = font.render(f"Time Window: {self.window_start:.1f}s - {window_end:.1f}s", 
+        time_range = font.render(f"Time Window: {window_start:.1f}s - {window_end:.1f}s", 
                                True, (0, 0, 0))
         screen.blit(self.surface, self.rect)
-
-def create_lato_system():
-    bodies = []
-    shapes = []
-    strings = []
-    
-    # Center the hand position
-    hand = pymunk.Body(body_type=pymunk.Body.STATIC)
-    hand.position = (WIDTH//2, HEIGHT//3)  # Moved down for better centering
-    
-    # Create two lato-lato balls with different sizes
-    spread = 80  # Reduced spread for more centered look
-    start_x = hand.position.x - spread/2
-    
-    # Ball sizes and positions
-    ball_configs = [
-        {"radius": 25, "y_offset": 150},  # Closer/larger ball
-        {"radius": 25, "y_offset": 150}   # Further/smaller ball
-    ]
-    
-    for i, config in enumerate(ball_configs):
-        mass = 1
-        radius = config["radius"]
-        moment = pymunk.moment_for_circle(mass, 0, radius)
-        body = pymunk.Body(mass, moment)
-        
-        body.position = (start_x + (i * spread), hand.position.y + config["y_offset"])
-        
-        shape = pymunk.Circle(body, radius)
-        shape.elasticity = 0
-        shape.friction = 0.5
-        shape.color = RED
-        
-        string = pymunk.PinJoint(hand, body)
-        
-        bodies.append(body)
-        shapes.append(shape)
-        strings.append(string)
-    
-    return hand, bodies, shapes, strings
-
-def create_boundaries():
-    # Ground
-    ground = pymunk.Segment(space.static_body, (0, HEIGHT-10), (WIDTH, HEIGHT-10), 5)
-    ground.elasticity = 0.8
-    ground.friction = 0.5
-    
-    # Walls
-    left_wall = pymunk.Segment(space.static_body, (0, 0), (0, HEIGHT), 5)
-    right_wall = pymunk.Segment(space.static_body, (WIDTH, 0), (WIDTH, HEIGHT), 5)
     
-    left_wall.elasticity = 0.8
-    right_wall.elasticity = 0.8
-    
-    return [ground, left_wall, right_wall]
-
-def calculate_angle(hand_pos, ball_pos):
-    """Calculate angle from vertical in degrees"""
-    dx = ball_pos.x - hand_pos.x
-    dy = ball_pos.y - hand_pos.y
-    # Calculate angle from vertical (90 degrees offset from atan2)
-    angle = math.degrees(math.atan2(dx, dy))
-    return angle
+    def draw_spectrum(self, screen, drive_interval=None):
+        """Welch PSD of θ (log scale, 0-5 Hz) with peak and drive frequency markers"""
+        surface = self.spectrum_surface
+        width, height = surface.get_size()
+        surface.fill((220, 220, 220, 240))
+        font = self.small_font
+        
+        max_freq = 5.0
+        plot_left, plot_right = 30, width - 10
+        plot_top, plot_bottom = 30, height - 40
+        
+        def freq_to_x(freq):
+            return int(plot_left + freq / max_freq * (plot_right - plot_left))
+        
+        for i in range(6):
+            x = freq_to_x(i)
+            pygame.draw.line(surface, (180, 180, 180, 255), (x, plot_top), (x, plot_bottom))
+            label = font.render(f"{i}", True, (0, 0, 0))
+            surface.blit(label, (x - 3, plot_bottom + 3))
+        
+        title = self.font.render('θ Power Spectrum (Hz)', True, (0, 0, 0))
+        surface.blit(title, (width//2 - title.get_width()//2, 5))
+        
+        spectrum = self.spectrum
+        if spectrum.psd is not None:
+            visible = spectrum.frequencies <= max_freq
+            power = np.log10(spectrum.psd[visible] + 1e-12)
+            low, high = power.min(), power.max()
+            span = max(high - low, 1e-6)
+            xs = plot_left + spectrum.frequencies[visible] / max_freq * (plot_right - plot_left)
+            ys = plot_bottom - (power - low) / span * (plot_bottom - plot_top)
+            points = np.column_stack((xs, ys)).astype(int).tolist()
+            if len(points) > 1:
+                pygame.draw.lines(surface, (0, 100, 255, 255), False, points, 2)
+        
+        peak = spectrum.dominant_frequency()
+        if peak is not None and peak <= max_freq:
+            x = freq_to_x(peak)
+            pygame.draw.line(surface, BALL_RED, (x, plot_top), (x, plot_bottom), 1)
+        
+        if drive_interval is not None:
+            drive = drive_frequency(drive_interval)
+            if drive <= max_freq:
+                x = freq_to_x(drive)
+                pygame.draw.line(surface, (0, 160, 0, 255), (x, plot_top), (x, plot_bottom), 1)
+        
+        period = spectrum.zero_crossing_period()
+        peak_text = f"Peak: {peak:.2f} Hz" if peak else "Peak: --"
+        period_text = f"Period: {period:.2f} s" if period else "Period: --"
+        info = font.render(f"{peak_text}   {period_text}", True, (0, 0, 0))
+        surface.blit(info, (10, height - 18))
+        
+        pygame.draw.rect(surface, (0, 0, 0, 255), (0, 0, width, height), 2)
+        screen.blit(surface, self.spectrum_rect)
 
 def draw_ball(screen, pos, radius):
     # Draw shadow
@@ -244,199 +283,342 @@ def draw_ball(screen, pos, radius):
     shine_radius = int(radius/3)
     pygame.draw.circle(screen, BALL_SHINE, shine_pos, shine_radius)
 
-def main():
+def create_controls():
+    """Buttons of the window; clicking one calls button.action(state)"""
+    return [
+        Button(WIDTH//2 - 180, 20, 120, 40, "Pull Up", toggle_pull),
+        Button(WIDTH//2 + 60, 20, 120, 40, "Auto Mode", toggle_auto),
+        # Time control buttons
+        Button(WIDTH - 140, 70, 30, 30, "+",
+               partial(adjust_automation, name="interval", delta=0.5, low=0.5, high=10.0)),
+        Button(WIDTH - 180, 70, 30, 30, "-",
+               partial(adjust_automation, name="interval", delta=-0.5, low=0.5, high=10.0)),
+        # Stop time control buttons
+        Button(WIDTH - 140, 110, 30, 30, "+",
+               partial(adjust_automation, name="stop_time", delta=1.0, low=1.0, high=30.0)),
+        Button(WIDTH - 180, 110, 30, 30, "-",
+               partial(adjust_automation, name="stop_time", delta=-1.0, low=1.0, high=30.0)),
+        # Force control buttons
+        Button(WIDTH - 140, 150, 30, 30, "+",
+               partial(adjust_automation, name="pull_force", delta=25)),
+        Button(WIDTH - 180, 150, 30, 30, "-",
+               partial(adjust_automation, name="pull_force", delta=-25)),
+    ]
+
+def create_layer(buttons):
+    layer = WidgetLayer()
+    for button in buttons:
+        layer.add(button)
+    return layer
+
+def info_texts(automation, current_time):
+    texts = [
+        f"Auto: {'ON' if automation.is_automated else 'OFF'}",
+        f"Interval: {automation.interval:.1f}s",
+        f"Stop Time: {automation.stop_time:.1f}s",
+        f"Pull Force: {automation.pull_force:.0f}"
+    ]
+    
+    if automation.is_automated and not automation.is_finished:
+        elapsed = current_time - automation.start_time
+        remaining = max(0, automation.stop_time - elapsed)
+        texts.append(f"Time Left: {remaining:.1f}s")
+        texts.append(f"Next Move: {max(0, automation.interval - (current_time - automation.last_update)):.1f}s")
+    elif automation.is_finished:
+        texts.append("Automation Complete!")
+    return texts
+
+# Translucent box of the info texts
+INFO_RECT = pygame.Rect(WIDTH - 270, 10, 250, 200)
+
+def scene_rect(hand_pos, ball_positions):
+    """What draw_scene can draw over: the hand and balls with room for the radii and shadows"""
+    return render.bounding_rect([hand_pos] + list(ball_positions), 40)
+
+def track_widgets(scheduler, hand_pos, ball_positions, buttons, texts, graph):
+    """Report what each widget shows so only changed regions get presented"""
+    scene_points = [hand_pos] + list(ball_positions)
+    scheduler.track("scene", scene_rect(hand_pos, ball_positions),
+                    tuple((p.x, p.y) for p in scene_points))
+    for i, button in enumerate(buttons):
+        scheduler.track(f"button{i}", button.area, button.look())
+    scheduler.track("info", INFO_RECT, tuple(texts))
+    scheduler.track("graph", graph.rect,
+                    (graph.history.sample_count, graph.history_span, graph.history_end))
+    scheduler.track("spectrum", graph.spectrum_rect,
+                    (graph.show_spectrum, graph.show_spectrum and graph.spectrum.sample_count))
+
+def draw_scene(screen, hand_pos, ball_positions, radii):
+    """Strings, balls and hand grip (everything but the controls)"""
+    # Draw strings with gradient effect
+    for end_pos in ball_positions:
+        start_pos = hand_pos
+        points = [(start_pos.x, start_pos.y)]
+        
+        # Create slight curve in string
+        mid_x = (start_pos.x + end_pos.x) / 2
+        mid_y = (start_pos.y + end_pos.y) / 2 + 10
+        points.append((mid_x, mid_y))
+        points.append((end_pos.x, end_pos.y))
+        
+        pygame.draw.lines(screen, STRING_COLOR, False, points, 2)
+    
+    # Draw balls with enhanced effects
+    for pos, radius in zip(ball_positions, radii):
+        draw_ball(screen, pos, radius)
+    
+    # Draw hand grip with shadow
+    grip_rect = pygame.Rect(hand_pos.x - 15, hand_pos.y - 8, 30, 16)
+    shadow_rect = grip_rect.copy()
+    shadow_rect.y += 2
+    pygame.draw.rect(screen, (150, 150, 150), shadow_rect, border_radius=5)
+    pygame.draw.rect(screen, BALL_RED, grip_rect, border_radius=5)
+
+# Translucent box behind the info texts; it never changes, so it is built once
+_info_panel = None
+
+def info_panel():
+    global _info_panel
+    if _info_panel is None:
+        _info_panel = pygame.Surface((250, 200))
+        _info_panel.set_alpha(220)
+        _info_panel.fill(BACKGROUND)
+    return _info_panel
+
+def draw_info(screen, font, texts):
+    """Display information with better formatting"""
+    screen.blit(info_panel(), INFO_RECT)
+    
+    y_pos = 20
+    for text in texts:
+        text_surface = font.render(text, True, TEXT_COLOR)
+        screen.blit(text_surface, (WIDTH - 250, y_pos))
+        y_pos += 30
+
+def draw_frame(screen, font, hand_pos, ball_positions, radii, buttons, texts, graph, drive_interval,
+               regions=None):
+    """Draw the window, or only the widgets reaching into regions (RenderScheduler.regions())"""
+    layers = [
+        (screen.get_rect(), partial(screen.fill, BACKGROUND)),
+        (scene_rect(hand_pos, ball_positions), partial(draw_scene, screen, hand_pos, ball_positions, radii)),
+    ]
+    layers += [(button.area, partial(button.draw, screen)) for button in buttons]
+    layers.append((INFO_RECT, partial(draw_info, screen, font, texts)))
+    layers.append((graph.rect, partial(graph.draw, screen)))
+    if graph.show_spectrum:
+        layers.append((graph.spectrum_rect, partial(graph.draw_spectrum, screen, drive_interval)))
+    render.redraw(screen, [screen.get_rect()] if regions is None else regions, layers)
+
+def open_window():
+    """Start pygame and open the simulation window (nothing is opened at import)"""
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Multiple Lato-lato Simulation")
+    return screen
+
+def new_tuned_simulation(profile, graph=None):
+    """new_simulation() with the solver settings of a lato.tuning profile, if any"""
+    state = new_simulation(graph=graph)
+    if profile is not None:
+        tuning.apply_profile(state.space, profile)
+        state.substeps = profile["substeps"]
+    return state
+
+def main(profile=None, serve=None, memory=None, frames=None):
+    """The window; memory is a memtrack.MemoryTracker to report on at exit and
+    frames a number of frames to quit after"""
+    screen = open_window()
     clock = pygame.time.Clock()
     font = pygame.font.Font(None, 36)
     
-    # Create buttons
-    pull_button = Button(WIDTH//2 - 180, 20, 120, 40, "Pull Up")
-    auto_button = Button(WIDTH//2 + 60, 20, 120, 40, "Auto Mode")
+    buttons = create_controls()
+    layer = create_layer(buttons)
     
-    # Time control buttons
-    time_up = Button(WIDTH - 140, 70, 30, 30, "+")
-    time_down = Button(WIDTH - 180, 70, 30, 30, "-")
+    state = new_tuned_simulation(profile, GraphData())
     
-    # Stop time control buttons
-    stop_time_up = Button(WIDTH - 140, 110, 30, 30, "+")
-    stop_time_down = Button(WIDTH - 180, 110, 30, 30, "-")
+    # Commands from clients of the state server, run between frames
+    remote = queue.SimpleQueue()
+    server = StateServer(serve, LATO_COMMANDS, remote.put).start() if serve else None
     
-    # Force control buttons
-    force_up = Button(WIDTH - 140, 150, 30, 30, "+")
-    force_down = Button(WIDTH - 180, 150, 30, 30, "-")
+    # F5 keeps a checkpoint in memory, F9 rewinds to it
+    saved_checkpoint = None
     
-    automation = AutomationSettings()
+    scheduler = render.RenderScheduler(screen.get_rect())
+    
+    tracker = memory if memory is not None else memtrack.UNTRACKED
+    frame = 0
+    
+    while True:
+        tracker.begin_frame()
+        tracker.phase("input")
+        dt = clock.get_time() / 1000.0
+        state.current_time += dt
+        
+        frame += 1
+        if frames is not None and frame > frames:
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+        events, clicked = layer.handle(pygame.event.get())
+        for button in clicked:
+            button.action(state)
+        while not remote.empty():
+            remote.get()(state)
+        
+        for event in events:
+            if event.type == pygame.QUIT:
+                if server is not None:
+                    server.stop()
+                pygame.quit()
+                if memory is not None:
+                    sys.exit(1 if memtrack.finish(memory) else 0)
+                sys.exit()
+            
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F5:
+                    saved_checkpoint = checkpoint.capture(state)
+                elif event.key == pygame.K_F9 and saved_checkpoint is not None:
+                    checkpoint.restore(saved_checkpoint, state)
+                    scheduler.invalidate()
+            
+            state.graph.handle_event(event)
+        
+        # At rest nothing needs stepping, drawing or presenting
+        tracker.phase("physics")
+        idle = is_idle(state)
+        if not idle:
+            step_simulation(state)
+            if server is not None:
+                server.publish(state.current_time, state.body_states)
+        
+        tracker.phase("draw")
+        automation = state.automation
+        graph = state.graph
+        texts = info_texts(automation, state.current_time)
+        ball_positions = [body.position for body in state.bodies]
+        
+        track_widgets(scheduler, state.hand.position, ball_positions, buttons, texts, graph)
+        if scheduler.needs_redraw():
+            draw_frame(screen, font, state.hand.position, ball_positions,
+                       [shape.radius for shape in state.shapes], buttons, texts, graph,
+                       automation.interval if automation.is_automated else None,
+                       scheduler.regions())
+            scheduler.present()
+        tracker.end_frame()
+        
+        clock.tick(render.IDLE_FPS if idle else 60)
+
+LatoSnapshot = namedtuple("LatoSnapshot", "time hand balls radii automation idle")
+
+def take_snapshot(state):
+    """Immutable copy of what the window needs to draw one frame"""
+    return LatoSnapshot(
+        state.current_time,
+        state.hand.position,
+        tuple(body.position for body in state.bodies),
+        tuple(shape.radius for shape in state.shapes),
+        copy.copy(state.automation),
+        is_idle(state),
+    )
+
+def main_threaded(profile=None, serve=None):
+    """Like main(), but physics steps on its own thread and the window draws snapshots"""
+    screen = open_window()
+    clock = pygame.time.Clock()
+    font = pygame.font.Font(None, 36)
     
-    hand, bodies, shapes, strings = create_lato_system()
+    buttons = create_controls()
+    layer = create_layer(buttons)
     
-    for body, shape, string in zip(bodies, shapes, strings):
-        space.add(body, shape, string)
+    # (time, signed θ) per physics step; (None, graph data) after a restore.
+    # deque append/popleft are atomic, so the two threads never lock.
+    samples = deque()
     
-    # Initial impulses
-    bodies[0].apply_impulse_at_local_point((-300, 0))
-    bodies[1].apply_impulse_at_local_point((300, 0))
+    def step(state):
+        state.current_time += 1/60.0
+        step_simulation(state)
+        samples.append((state.current_time, math.radians(state.prev_angles[0])))
+        if server is not None:
+            server.publish(state.current_time, state.body_states)
     
-    # Target Y position for pull up animation
-    original_y = hand.position.y
-    target_y = original_y
+    def save(state):
+        saved[:] = [checkpoint.capture(state)]
     
-    prev_angles = [0, 0]
-    angular_velocities = [0, 0]
+    def restore(state, saved_checkpoint):
+        checkpoint.restore(saved_checkpoint, state)
+        samples.append((None, saved_checkpoint["graph"]))
     
-    current_time = 0
+    physics = PhysicsThread(new_tuned_simulation(profile), step, take_snapshot, idle=is_idle)
+    # Client commands go through the same queue as the buttons
+    server = StateServer(serve, LATO_COMMANDS, physics.send).start() if serve else None
+    physics.start()
     
-    # Initialize graph
+    # The window keeps its own graph, fed from the sample stream
     graph = GraphData()
+    saved = []
+    scheduler = render.RenderScheduler(screen.get_rect())
     
     while True:
-        dt = clock.get_time() / 1000.0
-        current_time += dt
+        events, clicked = layer.handle(pygame.event.get())
+        for button in clicked:
+            physics.send(button.action)
         
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
+                physics.stop()
+                physics.join()
+                if server is not None:
+                    server.stop()
                 pygame.quit()
                 sys.exit()
             
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if pull_button.is_hovered():
-                    automation.is_automated = False
-                    automation.is_finished = False
-                    target_y = original_y - automation.pull_force if target_y == original_y else original_y
-                
-                elif auto_button.is_hovered():
-                    automation.is_automated = not automation.is_automated
-                    automation.timer = 0
-                    automation.is_up = False
-                    automation.last_update = current_time
-                    automation.start_time = current_time
-                    automation.is_finished = False
-                    if automation.is_automated:
-                        target_y = original_y - automation.pull_force
-                        automation.is_up = True
-                
-                elif time_up.is_hovered():
-                    automation.interval = min(10.0, automation.interval + 0.5)
-                
-                elif time_down.is_hovered():
-                    automation.interval = max(0.5, automation.interval - 0.5)
-                
-                elif stop_time_up.is_hovered():
-                    automation.stop_time = min(30.0, automation.stop_time + 1.0)
-                
-                elif stop_time_down.is_hovered():
-                    automation.stop_time = max(1.0, automation.stop_time - 1.0)
-                
-                elif force_up.is_hovered():
-                    automation.pull_force = min(automation.max_force, 
-                                             automation.pull_force + 25)
-                
-                elif force_down.is_hovered():
-                    automation.pull_force = max(automation.min_force, 
-                                             automation.pull_force - 25)
-        
-        # Handle automation and stop time
-        if automation.is_automated and not automation.is_finished:
-            elapsed_time = current_time - automation.start_time
-            if elapsed_time >= automation.stop_time:
-                automation.is_automated = False
-                automation.is_finished = True
-                target_y = original_y
-            else:
-                if current_time - automation.last_update >= automation.interval:
-                    automation.last_update = current_time
-                    automation.is_up = not automation.is_up
-                    target_y = original_y - automation.pull_force if automation.is_up else original_y
-        
-        # Smooth pull up/down animation
-        current_y = hand.position.y
-        if current_y != target_y:
-            dy = (target_y - current_y) * 0.1
-            hand.position = (hand.position.x, current_y + dy)
-        
-        # Calculate angles and update graph
-        current_angles = []
-        for i, body in enumerate(bodies):
-            angle = calculate_angle(hand.position, body.position)
-            current_angles.append(angle)
-            angular_velocities[i] = (angle - prev_angles[i])
-            prev_angles[i] = angle
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F5:
+                    physics.send(save)
+                elif event.key == pygame.K_F9 and saved:
+                    physics.send(restore, saved[0])
             
-            # Update graph with first ball's angle
-            if i == 0:
-                graph.update(current_time, math.radians(abs(angle)))
+            graph.handle_event(event)
         
-        space.step(1/60.0)
+        while samples:
+            time_stamp, angle = samples.popleft()
+            if time_stamp is None:
+                checkpoint.restore_graph(graph, angle)
+                scheduler.invalidate()
+            else:
+                graph.update(time_stamp, abs(angle))
+                graph.spectrum.add_sample(angle)
         
-        # Drawing
-        screen.fill(BACKGROUND)
+        snapshot = physics.buffer.latest()
+        automation = snapshot.automation
+        texts = info_texts(automation, snapshot.time)
         
-        # Draw strings with gradient effect
-        for body in bodies:
-            start_pos = hand.position
-            end_pos = body.position
-            points = [(start_pos.x, start_pos.y)]
-            
-            # Create slight curve in string
-            mid_x = (start_pos.x + end_pos.x) / 2
-            mid_y = (start_pos.y + end_pos.y) / 2 + 10
-            points.append((mid_x, mid_y))
-            points.append((end_pos.x, end_pos.y))
-            
-            pygame.draw.lines(screen, STRING_COLOR, False, points, 2)
-        
-        # Draw balls with enhanced effects
-        for shape in shapes:
-            draw_ball(screen, shape.body.position, shape.radius)
-        
-        # Draw hand grip with shadow
-        hand_pos = hand.position
-        grip_rect = pygame.Rect(hand_pos.x - 15, hand_pos.y - 8, 30, 16)
-        shadow_rect = grip_rect.copy()
-        shadow_rect.y += 2
-        pygame.draw.rect(screen, (150, 150, 150), shadow_rect, border_radius=5)
-        pygame.draw.rect(screen, BALL_RED, grip_rect, border_radius=5)
-        
-        # Draw buttons
-        pull_button.draw(screen)
-        auto_button.draw(screen)
-        time_up.draw(screen)
-        time_down.draw(screen)
-        stop_time_up.draw(screen)
-        stop_time_down.draw(screen)
-        force_up.draw(screen)
-        force_down.draw(screen)
-        
-        # Display information with better formatting
-        info_surface = pygame.Surface((250, 200))
-        info_surface.set_alpha(220)
-        info_surface.fill(BACKGROUND)
-        screen.blit(info_surface, (WIDTH - 270, 10))
-        
-        y_pos = 20
-        texts = [
-            f"Auto: {'ON' if automation.is_automated else 'OFF'}",
-            f"Interval: {automation.interval:.1f}s",
-            f"Stop Time: {automation.stop_time:.1f}s",
-            f"Pull Force: {automation.pull_force:.0f}"
-        ]
-        
-        if automation.is_automated and not automation.is_finished:
-            elapsed = current_time - automation.start_time
-            remaining = max(0, automation.stop_time - elapsed)
-            texts.append(f"Time Left: {remaining:.1f}s")
-            texts.append(f"Next Move: {max(0, automation.interval - (current_time - automation.last_update)):.1f}s")
-        elif automation.is_finished:
-            texts.append("Automation Complete!")
-        
-        for text in texts:
-            text_surface = font.render(text, True, TEXT_COLOR)
-            screen.blit(text_surface, (WIDTH - 250, y_pos))
-            y_pos += 30
-        
-        # Draw graph
-        graph.draw(screen)
-        
-        pygame.display.flip()
-        clock.tick(60)
+        track_widgets(scheduler, snapshot.hand, snapshot.balls, buttons, texts, graph)
+        if scheduler.needs_redraw():
+            draw_frame(screen, font, snapshot.hand, snapshot.balls, snapshot.radii, buttons, texts, graph,
+                       automation.interval if automation.is_automated else None,
+                       scheduler.regions())
+            scheduler.present()
+        
+        clock.tick(render.IDLE_FPS if snapshot.idle else 60)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Multiple Lato-lato Simulation")
+    parser.add_argument("--threaded", action="store_true", help="step the physics on its own thread")
+    parser.add_argument("--profile", help="tuned solver profile written by python -m lato.tuning")
+    parser.add_argument("--serve", nargs="?", const=DEFAULT_ADDRESS, metavar="ADDRESS",
+                        help="stream state to and take commands from local clients "
+                             f"(unix:/path or tcp://host:port, default {DEFAULT_ADDRESS})")
+    parser.add_argument("--memtrack", nargs="?", const="", metavar="REPORT",
+                        help="trace allocations per frame and phase and check them against the memory "
+                             "budget at exit (optionally writing a JSON report); slows the loop down")
+    parser.add_argument("--frames", type=int, help="quit after this many frames")
+    args = parser.parse_args()
+    
+    if args.threaded and (args.memtrack is not None or args.frames is not None):
+        parser.error("--memtrack and --frames apply to the single-threaded loop")
+    
+    profile = tuning.load_profile(args.profile) if args.profile else None
+    if args.threaded:
+        main_threaded(profile, args.serve)
+    else:
+        memory = memtrack.MemoryTracker(report_path=args.memtrack).start() if args.memtrack is not None else None
+        main(profile, args.serve, memory, args.frames)
@@ -0,0 +1,36 @@
+import math
+
+import numpy as np
+import pymunk
+
+from lato.bodystate import BodyStates
+
+def body(position, velocity):
+    b = pymunk.Body(1, 1)
+    b.position = position
+    b.velocity = velocity
+    return b
+
+def test_refresh_derives_angles_and_distances():
+    # One ball 100 px straight below its pivot, one 45° out to the right
+    bodies = [body((0, 100), (50, 0)), body((100, 100), (0, 0))]
+    states = BodyStates(bodies).refresh(pivots=(0, 0))
+
+    assert states.positions.tolist() == [[0, 100], [100, 100]]
+    assert np.allclose(states.lengths, [100, 100 * math.sqrt(2)])
+    assert np.allclose(states.angles, [0, 45])
+    assert np.allclose(states.speeds, [50, 0])
+    # Moving sideways at 50 px/s, 100 px from the pivot: 0.5 rad/s
+    assert math.isclose(states.angular_velocities[0], math.degrees(0.5))
+    assert np.allclose(states.distances, [[0, 100], [100, 0]])
+
+def test_arrays_update_in_place():
+    bodies = [body((0, 100), (0, 0)), body((30, 40), (0, 0))]
+    states = BodyStates(bodies).refresh(pivots=[(0, 0), (30, 0)])
+    angles = states.angles
+    bodies[0].position = (-100, 0)
+    # Pivots are kept from the previous refresh
+    states.refresh()
+    assert states.angles is angles
+    assert np.allclose(states.angles, [-90, 0])
+    assert np.allclose(states.lengths, [100, 40])
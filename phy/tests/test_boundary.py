@@ -0,0 +1,31 @@
+import numpy as np
+
+from lato import boundary
+from lato.boundary import BoundaryMap
+
+def test_refines_only_along_the_boundary(monkeypatch):
+    # No physics: a run "result" is its own scenario, and the class is which side of x + y = 1 it is on
+    monkeypatch.setattr(boundary, "evaluate", lambda batch, cache, workers: batch)
+
+    def above(scenario, result):
+        return int(result["x"] + result["y"] > 1.0)
+
+    base = {"name": "line", "x": 0.0, "y": 0.0}
+    boundary_map = BoundaryMap(base, [("x", 0, 1), ("y", 0, 1)], classify=above, coarse=5, depth=3).build()
+
+    assert boundary_map.resolution == 33
+    assert boundary_map.evaluations < boundary_map.uniform_evaluations / 2
+    grid = boundary_map.grid()
+    assert (grid >= 0).all()
+    x, y = np.meshgrid(np.linspace(0, 1, 33), np.linspace(0, 1, 33), indexing="ij")
+    assert (grid == (x + y > 1.0)).all()
+    # Every finest boundary cell straddles the line
+    assert boundary_map.boundary
+    assert np.allclose(boundary_map.boundary_points().sum(axis=1), 1.0, atol=1 / 32)
+
+def test_nested_keys_are_set():
+    base = {"name": "auto", "automation": {"interval": 2.0, "pull_force": 100.0}}
+    boundary_map = BoundaryMap(base, [("automation.pull_force", 50, 400)], coarse=2, depth=0)
+    scenario = boundary_map.scenario((1,))
+    assert scenario["automation"] == {"interval": 2.0, "pull_force": 400.0}
+    assert base["automation"]["pull_force"] == 100.0
@@ -0,0 +1,50 @@
+import json
+import os
+
+from lato import scenario as scenarios
+from lato.cache import ResultCache, scenario_key
+
+def write_scenarios(directory):
+    """The same lato run as JSON (ints) and as TOML (floats), under different names"""
+    json_path = os.path.join(directory, "kick.json")
+    with open(json_path, "w") as f:
+        json.dump({"kind": "lato", "duration": 2, "gravity": 981, "impulses": [[-300, 0], [300, 0]],
+                   "automation": {"interval": 2}}, f)
+    toml_path = os.path.join(directory, "kick_again.toml")
+    with open(toml_path, "w") as f:
+        f.write('kind = "lato"\nduration = 2.0\ngravity = 981.0\n'
+                'impulses = [[-300.0, 0.0], [300.0, 0.0]]\n\n[automation]\ninterval = 2.0\n')
+    return json_path, toml_path
+
+def test_json_and_toml_of_one_run_share_a_key(tmp_path):
+    json_path, toml_path = write_scenarios(tmp_path)
+    from_json = scenarios.load(json_path)
+    from_toml = scenarios.load(toml_path)
+    assert from_json["name"] != from_toml["name"]
+    assert scenario_key(from_json) == scenario_key(from_toml)
+
+def test_ints_and_floats_share_a_key(tmp_path):
+    scenario = scenarios.load(write_scenarios(tmp_path)[0])
+    assert scenario_key(dict(scenario, gravity=10)) == scenario_key(dict(scenario, gravity=10.0))
+    assert scenario_key(dict(scenario, gravity=10)) != scenario_key(dict(scenario, gravity=11))
+
+def test_eviction_keeps_the_most_recently_used_within_max_bytes(tmp_path):
+    keys = [f"{i:02x}" + "0" * 62 for i in range(5)]
+    cache = ResultCache(tmp_path, max_bytes=1 << 20)
+    cache.put(keys[0], {"collisions": 0})
+    entry_size = cache.size()
+
+    # Room for three entries (they differ by a byte or two)
+    cache.max_bytes = 3 * entry_size + entry_size // 2
+    for age, key in enumerate(keys[:3]):
+        cache.put(key, {"collisions": age})
+        # Oldest first, whatever the file system's mtime resolution
+        os.utime(cache._path(key, ".json"), (1000 + age, 1000 + age))
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) == {"collisions": 0}
+    cache.put(keys[3], {"collisions": 3})
+
+    assert cache.size() <= cache.max_bytes
+    assert cache.get(keys[1]) is None
+    for key in (keys[0], keys[2], keys[3]):
+        assert cache.get(key) is not None
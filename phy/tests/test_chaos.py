@@ -0,0 +1,19 @@
+import math
+
+import numpy as np
+
+from lato.chaos import phase_offset, set_state_vector, state_vector
+from lato.simulation import new_simulation
+
+def test_offsets_wrap_across_the_top():
+    # Both balls just either side of straight up: 0.02 rad apart, not 2π - 0.02
+    vector = np.array([math.pi - 0.01, 0.5, -math.pi + 0.01, 0.0])
+    reference = np.array([-math.pi + 0.01, 0.5, math.pi - 0.01, 0.25])
+    assert np.allclose(phase_offset(vector, reference), [-0.02, 0.0, 0.02, -0.25])
+
+def test_state_vector_round_trip():
+    state = new_simulation()
+    vector = state_vector(state)
+    vector[0::2] += 0.1
+    set_state_vector(state, vector)
+    assert np.allclose(phase_offset(state_vector(state), vector), 0, atol=1e-9)
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from lato import checkpoint
+from lato.simulation import new_simulation, run_headless, toggle_auto
+
+def positions(state):
+    return np.array([tuple(body.position) for body in state.bodies] + [tuple(state.hand.position)])
+
+def test_restored_run_follows_the_continuous_one():
+    continuous = new_simulation()
+    run_headless(continuous, 0.5)
+    saved = checkpoint.capture(continuous)
+    restored = checkpoint.restore(saved)
+    run_headless(continuous, 1.0)
+    run_headless(restored, 1.0)
+
+    assert restored.current_time == continuous.current_time
+    # pymunk does not pickle the joints' warm-start impulses, so the paths part slightly
+    assert np.abs(positions(restored) - positions(continuous)).max() < 0.5
+    assert np.allclose(list(restored.graph.angles), list(continuous.graph.angles), atol=0.5)
+    assert list(restored.graph.times) == list(continuous.graph.times)
+
+def test_every_restore_of_a_checkpoint_runs_the_same():
+    state = new_simulation()
+    run_headless(state, 0.5)
+    saved = checkpoint.capture(state)
+    first = run_headless(checkpoint.restore(saved), 1.0)
+    second = run_headless(checkpoint.restore(saved), 1.0)
+
+    assert np.array_equal(positions(first), positions(second))
+    assert list(first.graph.angles) == list(second.graph.angles)
+
+def test_forks_report_the_same_spectrum_at_any_dt():
+    state = new_simulation()
+    toggle_auto(state)
+    state.automation.interval = 1.0
+    state.automation.stop_time = 30.0
+    run_headless(state, 1.0)
+    saved = checkpoint.capture(state)
+
+    at_60 = checkpoint.run_variant(saved, {}, 20.0, dt=1 / 60)["spectrum"]
+    at_120 = checkpoint.run_variant(saved, {}, 20.0, dt=1 / 120)["spectrum"]
+    # Driven at 0.5 Hz, whatever the step
+    for spectrum in (at_60, at_120):
+        assert abs(spectrum["dominant_frequency"] - 0.5) < 0.03
+        assert abs(spectrum["zero_crossing_period"] - 2.0) < 0.1
+
+def test_a_checkpoint_keeps_its_spectrum_rate(tmp_path):
+    state = new_simulation(sample_rate=120.0)
+    run_headless(state, 1.0, dt=1 / 120)
+    path = tmp_path / "state.checkpoint"
+    checkpoint.save(checkpoint.capture(state), path)
+
+    restored = checkpoint.restore(checkpoint.load(path))
+    assert restored.graph.spectrum.sample_rate == 120.0
+    assert restored.graph.spectrum.sample_count == state.graph.spectrum.sample_count
+    assert os.listdir(tmp_path) == ["state.checkpoint"]
+
+def test_concurrent_saves_never_mix(tmp_path):
+    path = tmp_path / "shared.checkpoint"
+    checkpoints = [{"version": checkpoint.CHECKPOINT_VERSION, "payload": [i] * 100000} for i in range(8)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda data: checkpoint.save(data, path), checkpoints))
+
+    assert checkpoint.load(path) in checkpoints
+    assert os.listdir(tmp_path) == ["shared.checkpoint"]
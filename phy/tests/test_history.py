@@ -0,0 +1,47 @@
+import math
+
+import numpy as np
+
+from lato.history import HistoryPyramid
+
+def test_seeded_level_keeps_min_and_max():
+    pyramid = HistoryPyramid(capacity=8, factor=4)
+    values = [1, 2, 100, 3, -4, -100, 5, 6]
+    for time, value in enumerate(values):
+        pyramid.add_sample(time, value)
+
+    # Level 1 is seeded from level 0 as it fills, one bucket per 4 samples
+    assert len(pyramid.levels) == 2
+    times, mins, maxs = pyramid.levels[1].view()
+    assert times.tolist() == [0, 4]
+    assert mins.tolist() == [1, -100]
+    assert maxs.tolist() == [100, 6]
+
+def test_extremes_survive_once_raw_samples_are_forgotten():
+    pyramid = HistoryPyramid(capacity=8, factor=4)
+    values = np.zeros(64)
+    values[2] = 100
+    values[5] = -100
+    for time, value in enumerate(values):
+        pyramid.add_sample(time, value)
+
+    assert pyramid.levels[0].oldest_time() > 5
+    mins, maxs = pyramid.query(0, 64, 4)
+    assert maxs[0] == 100
+    assert mins[0] == -100
+    assert maxs[1:].tolist() == [0, 0, 0]
+
+def test_no_empty_columns_inside_the_recorded_range():
+    pyramid = HistoryPyramid()
+    for i in range(40 * 60):
+        pyramid.add_sample(i / 60, math.sin(i / 60))
+
+    # A coarse level zoomed out, raw samples zoomed in past one per column, and a view past the data
+    for start, end in ((20, 40), (0, 40), (39, 40), (30, 50)):
+        mins, maxs = pyramid.query(start, end, 340)
+        left_edges = start + (end - start) * np.arange(340) / 340
+        inside = left_edges <= pyramid.end_time()
+        assert not np.isnan(mins[inside]).any()
+        assert not np.isnan(maxs[inside]).any()
+        assert np.isnan(mins[~inside]).all()
+        assert (mins[inside] <= maxs[inside]).all()
@@ -0,0 +1,28 @@
+import numpy as np
+import pymunk
+
+from lato.bodystate import BodyStates
+from lato.live import FIELDS, FRAME_HEADER, pack_frame, unpack_frame
+
+def test_frame_round_trip():
+    bodies = []
+    for x, vx in ((100.0, 3.0), (140.0, -7.5)):
+        body = pymunk.Body(1, 1)
+        body.position = x, 250.0
+        body.velocity = vx, 2.0
+        bodies.append(body)
+    states = BodyStates(bodies).refresh(pivots=(120.0, 50.0))
+
+    payload = pack_frame(42, 1.5, states)
+    assert len(payload) == FRAME_HEADER.size + 4 * len(bodies) * len(FIELDS)
+
+    step, time, fields = unpack_frame(payload)
+    assert (step, time) == (42, 1.5)
+    assert set(fields) == set(FIELDS)
+    assert fields["x"].tolist() == [100.0, 140.0]
+    assert fields["vx"].tolist() == [3.0, -7.5]
+    assert fields["pivot_y"].tolist() == [50.0, 50.0]
+    # float32 on the wire
+    assert np.allclose(fields["angle"], states.angles, atol=1e-4)
+    assert np.allclose(fields["angular_velocity"], states.angular_velocities, atol=1e-4)
+    assert fields["angle"][0] < 0 < fields["angle"][1]
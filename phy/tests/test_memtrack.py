@@ -0,0 +1,35 @@
+import memtrack
+
+def tracked_run(frames, **settings):
+    tracker = memtrack.MemoryTracker(**settings).start()
+    try:
+        kept = []
+        for _ in range(frames):
+            tracker.begin_frame()
+            tracker.phase("work")
+            kept.append(bytearray(1000))
+            tracker.end_frame()
+        return tracker.report()
+    finally:
+        tracker.stop()
+
+def test_a_run_inside_the_warm_up_measures_nothing_and_fails():
+    report = tracked_run(5, warmup=10)
+    assert report["frame"] is None
+    assert report["phases"]["work"] is None
+    assert report["growth_per_hour"] is None
+    failures = memtrack.check(report)
+    assert len(failures) == 1 and "warm-up" in failures[0]
+    assert "not enough data" in memtrack.format_report(report, failures)
+
+def test_growth_needs_enough_snapshots():
+    settings = {"warmup": 2, "snapshot_every": 4, "min_snapshots": 3}
+    short = tracked_run(8, **settings)
+    assert short["frames_needed"] == 10
+    assert short["growth_per_hour"] is None
+    assert short["frame"]["frames"] == 8
+
+    long = tracked_run(short["frames_needed"], **settings)
+    # Every frame keeps another kilobyte
+    assert long["growth_per_hour"] > 0
+    assert memtrack.check(long, {"frame_churn_p95": 1 << 20, "growth_per_hour": 1 << 40}) == []
@@ -0,0 +1,48 @@
+import time
+
+from physics_thread import PhysicsThread, SnapshotBuffer
+
+def test_buffer_returns_the_newest_snapshot():
+    buffer = SnapshotBuffer()
+    assert buffer.latest() is None
+    for snapshot in ("a", "b", "c"):
+        buffer.publish(snapshot)
+        assert buffer.latest() == snapshot
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+def test_thread_steps_and_runs_commands_between_steps():
+    state = {"steps": 0, "force": 0}
+
+    def step(state):
+        state["steps"] += 1
+
+    thread = PhysicsThread(state, step, lambda state: (state["steps"], state["force"]), dt=0.001)
+    assert thread.buffer.latest() == (0, 0)
+    thread.start()
+    try:
+        wait_for(lambda: thread.buffer.latest()[0] >= 5)
+        thread.send(lambda state, force: state.update(force=force), 300)
+        wait_for(lambda: thread.buffer.latest()[1] == 300)
+    finally:
+        thread.stop()
+        thread.join(5)
+    assert not thread.is_alive()
+    assert thread.steps == state["steps"]
+
+def test_idle_thread_publishes_after_a_command():
+    state = {"force": 0}
+    thread = PhysicsThread(state, lambda state: None, lambda state: state["force"],
+                           dt=0.001, idle=lambda state: True)
+    thread.start()
+    try:
+        thread.send(lambda state: state.update(force=1))
+        wait_for(lambda: thread.buffer.latest() == 1)
+    finally:
+        thread.stop()
+        thread.join(5)
+    assert thread.steps == 0
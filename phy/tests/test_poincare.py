@@ -0,0 +1,22 @@
+import numpy as np
+
+from lato.poincare import histogram
+
+def test_histogram_bins_points_by_angle_and_rate():
+    points = [(0.0, 0.0), (0.5, 0.0), (3.9, 1.9), (4.0, 2.0), (2.0, 1.0)]
+    counts, extent = histogram(points, bins=(4, 2), extent=(0, 4, 0, 2))
+    assert extent == (0, 4, 0, 2)
+    assert counts.shape == (2, 4)
+    # Rows are θ̇, columns θ; the top edges fall in the last bin
+    assert counts.tolist() == [[2, 0, 0, 0],
+                               [0, 0, 1, 2]]
+
+def test_points_outside_the_extent_and_nan_drop_out():
+    points = [(-0.1, 0.5), (1.0, 5.0), (np.nan, 0.5), (1.0, 0.5)]
+    counts, _ = histogram(points, bins=(2, 2), extent=(0, 2, 0, 2))
+    assert counts.sum() == 1 and counts[0, 1] == 1
+
+def test_extent_defaults_to_the_points():
+    counts, extent = histogram([(-1.0, 10.0), (1.0, 20.0), (np.nan, np.nan)], bins=(2, 2))
+    assert extent == (-1.0, 1.0, 10.0, 20.0)
+    assert counts.tolist() == [[1, 0], [0, 1]]
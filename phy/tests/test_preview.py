@@ -0,0 +1,62 @@
+import threading
+import time
+
+import pymunk
+
+from preview import TrajectoryPredictor
+
+def falling_ball(started=None, release=None):
+    def build():
+        if started is not None:
+            started.set()
+            release.wait(5)
+        space = pymunk.Space()
+        space.gravity = 0, 900
+        body = pymunk.Body(1, 1)
+        body.position = 100, 0
+        space.add(body, pymunk.Circle(body, 10))
+        return space, [body]
+    return build
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+def test_prediction_matches_stepping_the_space():
+    predictor = TrajectoryPredictor(horizon=1.0, dt=1 / 60.0, sample_every=2)
+    predictor.start()
+    try:
+        predictor.request(falling_ball())
+        wait_for(lambda: predictor.latest() is not None)
+    finally:
+        predictor.stop()
+        predictor.join(5)
+    prediction = predictor.latest()
+    assert prediction.generation == 1
+    (path,) = prediction.paths
+    assert len(path) == 31  # the start and every other of 60 frames
+
+    space, (body,) = falling_ball()()
+    for _ in range(60):
+        space.step(1 / 60.0)
+    assert path[-1] == tuple(body.position)
+
+def test_newer_request_supersedes_a_running_one():
+    predictor = TrajectoryPredictor(horizon=1.0)
+    started, release = threading.Event(), threading.Event()
+    predictor.start()
+    try:
+        predictor.request(falling_ball(started, release))
+        started.wait(5)
+        predictor.request(falling_ball())
+        release.set()
+        wait_for(lambda: predictor.completed)
+    finally:
+        predictor.stop()
+        predictor.join(5)
+    assert predictor.cancelled == 1
+    assert predictor.latest().generation == 2
+    predictor.clear()
+    assert predictor.latest() is None
@@ -0,0 +1,49 @@
+import os
+
+import pygame
+import pytest
+
+from render import RenderScheduler
+
+@pytest.fixture(autouse=True)
+def display():
+    # present() pushes to the display
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((800, 600))
+    yield
+    pygame.display.quit()
+
+def test_nothing_changed_needs_no_redraw():
+    scheduler = RenderScheduler((0, 0, 800, 600))
+    scheduler.track("ball", (10, 10, 20, 20), (10, 10))
+    scheduler.present()
+    scheduler.track("ball", (10, 10, 20, 20), (10, 10))
+    assert not scheduler.needs_redraw()
+
+def test_moves_cover_old_and_new_rects():
+    scheduler = RenderScheduler((0, 0, 800, 600))
+    scheduler.track("ball", (10, 10, 20, 20), (10, 10))
+    scheduler.present()
+    scheduler.track("ball", (100, 10, 20, 20), (100, 10))
+    assert scheduler.regions() == [pygame.Rect(10, 10, 110, 20)]
+
+def test_regions_merge_overlaps_and_clip_to_the_screen():
+    scheduler = RenderScheduler((0, 0, 800, 600))
+    scheduler.present()
+    scheduler.track("a", (0, 0, 50, 50), 1)
+    scheduler.track("b", (40, 40, 50, 50), 1)
+    scheduler.track("c", (300, 300, 10, 10), 1)
+    scheduler.track("offscreen", (900, 0, 10, 10), 1)
+    scheduler.track("edge", (790, 590, 20, 20), 1)
+    regions = scheduler.regions()
+    assert sorted(map(tuple, regions)) == [(0, 0, 90, 90), (300, 300, 10, 10), (790, 590, 10, 10)]
+    # A rect that bridges two merged ones joins them all
+    scheduler.track("bridge", (85, 85, 220, 220), 1)
+    assert sorted(map(tuple, scheduler.regions())) == [(0, 0, 310, 310), (790, 590, 10, 10)]
+
+def test_invalidate_redraws_the_whole_screen():
+    scheduler = RenderScheduler((0, 0, 800, 600))
+    scheduler.present()
+    scheduler.invalidate()
+    assert scheduler.regions() == [pygame.Rect(0, 0, 800, 600)]
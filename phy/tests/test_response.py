@@ -0,0 +1,46 @@
+import math
+
+import numpy as np
+
+from lato.response import OUTCOMES, ResponseTable
+
+def make_table(values):
+    names = ["gravity", "mass"]
+    values = np.asarray(values, dtype=np.float32)
+    return ResponseTable(names, [(0, 200), (1, 3)], values.shape[:2], values, "test")
+
+def linear_values():
+    # period = 1 + gravity/100 + mass; the other outcomes are constant
+    gravity = np.linspace(0, 200, 3)[:, None]
+    mass = np.linspace(1, 3, 3)[None, :]
+    values = np.zeros((3, 3, len(OUTCOMES)), dtype=np.float32)
+    values[..., 0] = 1 + gravity / 100 + mass
+    values[..., 1] = 2
+    values[..., 2] = 30
+    return values
+
+def test_lookup_at_grid_points():
+    table = make_table(linear_values())
+    for gravity in (0, 100, 200):
+        for mass in (1, 2, 3):
+            result = table.lookup({"gravity": gravity, "mass": mass})
+            assert math.isclose(result["period"], 1 + gravity / 100 + mass, rel_tol=1e-6)
+            assert result["collision_rate"] == 2 and result["max_swing"] == 30
+
+def test_lookup_interpolates_and_clamps_at_the_edges():
+    table = make_table(linear_values())
+    assert math.isclose(table.lookup({"gravity": 150, "mass": 1.5})["period"], 4.0, rel_tol=1e-6)
+    # Past the ranges a setting reads the nearest edge
+    assert math.isclose(table.lookup({"gravity": 500, "mass": 3})["period"], 6.0, rel_tol=1e-6)
+    assert math.isclose(table.lookup({"gravity": -50, "mass": 0})["period"], 2.0, rel_tol=1e-6)
+
+def test_nan_corners_are_left_out():
+    values = linear_values()
+    values[1, 1, 0] = np.nan
+    table = make_table(values)
+    # The other three corners of the cell share the weight
+    result = table.lookup({"gravity": 50, "mass": 1.5})
+    assert math.isclose(result["period"], (2 + 3 + 3) / 3, rel_tol=1e-6)
+    assert result["collision_rate"] == 2
+    # Exactly on the unknown point nothing is known
+    assert math.isnan(table.lookup({"gravity": 100, "mass": 2})["period"])
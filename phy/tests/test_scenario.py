@@ -0,0 +1,15 @@
+import os
+
+from lato import scenario as scenarios
+
+SCENARIOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scenarios")
+
+def test_spectrum_does_not_depend_on_dt():
+    scenario = scenarios.load(os.path.join(SCENARIOS, "auto_swing.toml"))
+    at_60 = scenarios.run(dict(scenario, dt=1 / 60))
+    at_120 = scenarios.run(dict(scenario, dt=1 / 120))
+
+    # The drive swings the balls at 0.5 Hz whatever the step
+    for name in ("dominant_frequency", "zero_crossing_period"):
+        assert abs(at_120[name] - at_60[name]) < 0.03 * at_60[name]
+    assert abs(at_60["dominant_frequency"] - 0.5) < 0.02
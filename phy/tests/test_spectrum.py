@@ -0,0 +1,17 @@
+import math
+
+import numpy as np
+
+from lato.spectrum import StreamingSpectrum
+
+def test_psd_peaks_at_the_sine_frequency():
+    spectrum = StreamingSpectrum(sample_rate=60.0, segment_length=512)
+    frequency = 1.7
+    for i in range(4 * 512):
+        spectrum.add_sample(20 * math.sin(2 * math.pi * frequency * i / 60.0))
+
+    resolution = 60.0 / 512
+    peak = spectrum.frequencies[np.argmax(spectrum.psd)]
+    assert abs(peak - frequency) <= resolution / 2
+    assert abs(spectrum.dominant_frequency() - frequency) < 0.02
+    assert abs(spectrum.zero_crossing_period() - 1 / frequency) < 0.01
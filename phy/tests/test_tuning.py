@@ -0,0 +1,24 @@
+from lato.tuning import compare
+
+def recorded(collision_times, steps=10):
+    """A lato result whose trajectory matches any other, so only the collisions differ"""
+    trajectory = {"times": [i / 60 for i in range(steps)], "angles": [[0.0, 0.0]] * steps,
+                  "energy": [1.0] * steps, "kinetic": [1.0] * steps}
+    return {"kind": "lato", "clack_times": collision_times, "trajectory": trajectory}
+
+def collision_error(reference_times, run_times, horizon=10.0):
+    return compare(recorded(reference_times), recorded(run_times), horizon, 0.05)["collision_time"]
+
+def test_each_collision_matches_the_nearest_one():
+    assert abs(collision_error([1.0, 2.0, 3.0], [1.01, 2.02, 2.98]) - 0.02) < 1e-9
+    # An early extra collision must not shift the pairing of the rest
+    assert collision_error([1.0, 2.0], [0.5, 1.0, 2.0]) == float("inf")
+
+def test_missed_and_extra_collisions_are_errors():
+    assert collision_error([1.0, 2.0], [1.0]) == float("inf")
+    assert collision_error([1.0], [1.0, 1.03]) == float("inf")
+    assert collision_error([1.0, 2.0], [1.0, 2.2]) == float("inf")
+
+def test_collisions_at_the_horizon_do_not_count():
+    assert collision_error([1.0, 9.97], [1.0], horizon=10.0) == 0.0
+    assert collision_error([1.0], [1.0, 9.97], horizon=10.0) == 0.0
@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from viewer import DensityCanvas, Runs
+
+def run(name, dt, steps):
+    times = np.arange(steps) * dt
+    positions = np.zeros((steps, 2, 2))
+    positions[:, 0, 0] = times
+    return name, times, positions, np.stack([times, -times], axis=1)
+
+def test_runs_share_one_timeline():
+    runs = Runs([run("fine", 0.5, 9), run("coarse", 1.0, 3)])
+    assert len(runs) == 2
+    assert runs.times.tolist() == [0, 0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4]
+    assert runs.positions.shape == (2, 9, 2, 2)
+    assert runs.angles[0, :, 0].tolist() == runs.times.tolist()
+    # The coarse run holds each sample until the next, then ends
+    assert runs.angles[1, :5, 1].tolist() == [0, 0, -1, -1, -2]
+    assert np.isnan(runs.angles[1, 5:]).all()
+
+def test_runs_need_the_same_balls():
+    three = ("three", np.arange(3.0), np.zeros((3, 3, 2)), np.zeros((3, 3)))
+    with pytest.raises(ValueError):
+        Runs([run("two", 1.0, 3), three])
+    with pytest.raises(ValueError):
+        Runs([])
+
+def test_density_peaks_at_the_point():
+    canvas = DensityCanvas((0, 0, 200, 200), (0, 100, 0, 100), radius=10.0, scale=2)
+    density = canvas.density(np.array([[50.0, 25.0], [np.nan, 0.0], [500.0, 0.0]], dtype=np.float32))
+    assert density.shape == (100, 100)
+    assert np.unravel_index(density.argmax(), density.shape) == (50, 25)
+    # Normalised to one isolated point
+    assert density.max() == pytest.approx(1.0, rel=1e-3)
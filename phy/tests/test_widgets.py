@@ -0,0 +1,45 @@
+import pygame
+
+from widgets import HitIndex, Widget, WidgetLayer, coalesce_motion
+
+def motion(pos, rel=(1, 0)):
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=rel, buttons=(0, 0, 0))
+
+def test_hit_index_finds_the_topmost_widget():
+    index = HitIndex(cell_size=64)
+    below = Widget((0, 0, 200, 100))
+    above = Widget((50, 50, 20, 20))
+    index.add(below)
+    index.add(above)
+    assert index.at((60, 60)) is above
+    assert index.at((150, 90)) is below
+    assert index.at((250, 90)) is None
+    index.remove(above)
+    assert index.at((60, 60)) is below
+
+def test_motion_runs_merge_into_their_last_event():
+    click = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(5, 5), button=1)
+    events = [motion((1, 1)), motion((2, 1)), click, motion((3, 1)), motion((9, 1), rel=(6, 0))]
+    merged = coalesce_motion(events)
+    assert [event.type for event in merged] == [pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEMOTION]
+    assert merged[0].pos == (2, 1) and merged[0].rel == (2, 0)
+    assert merged[2].pos == (9, 1) and merged[2].rel == (7, 0)
+
+def test_layer_routes_hover_press_and_release():
+    layer = WidgetLayer()
+    button = layer.add(Widget((10, 10, 40, 20)))
+    unused, activated = layer.handle([motion((20, 15))])
+    # Motion is still passed on to the rest of the window
+    assert button.hover and len(unused) == 1 and not activated
+
+    press = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(20, 15), button=1)
+    release = pygame.event.Event(pygame.MOUSEBUTTONUP, pos=(300, 300), button=1)
+    layer.handle([press])
+    assert button.pressed and layer.captured is button
+    # Released away from the widget: hover moves off it
+    unused, _ = layer.handle([release])
+    assert not button.pressed and not button.hover and not unused
+
+    elsewhere = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(300, 300), button=1)
+    unused, _ = layer.handle([elsewhere])
+    assert unused == [elsewhere]
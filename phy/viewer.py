@@ -0,0 +1,358 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pygame
+
+from widgets import get_font
+
+WIDTH, HEIGHT = 1000, 760
+SCENE_HEIGHT = 560
+STRIP_TOP = 590            # θ(t) of every run, which is also the timeline
+STRIP_HEIGHT = 130
+BACKGROUND = (235, 235, 235)
+TEXT_COLOR = (40, 40, 40)
+CURSOR_COLOR = (40, 40, 40)
+BALL_COLORS = [(220, 40, 40), (40, 80, 220)]  # ball 1, ball 2
+
+MODES = ("overlay", "onion")
+
+def _trajectories(path):
+    """(name, times, positions, angles in degrees) of each recorded run in a file.
+
+    Reads the results of python -m lato --record (JSON), trajectories of a
+    result cache (.npz) and dataset.py shards (.npz, angles in radians).
+    """
+    if path.endswith(".json"):
+        with open(path) as f:
+            results = json.load(f)
+        for result in results if isinstance(results, list) else [results]:
+            if "trajectory" in result:
+                trajectory = result["trajectory"]
+                yield (result.get("name", path), np.asarray(trajectory["times"]),
+                       np.asarray(trajectory["positions"]), np.asarray(trajectory["angles"]))
+        return
+    with np.load(path) as data:
+        if "positions" not in data.files:
+            return
+        angles = data["angles"]
+        if "episode" in data.files:
+            angles = np.degrees(angles)
+        yield os.path.splitext(os.path.basename(path))[0], data["times"], data["positions"], angles
+
+def _files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in sorted(os.walk(path)):
+                for name in sorted(names):
+                    if name.endswith((".npz", ".json")):
+                        yield os.path.join(directory, name)
+        else:
+            yield path
+
+class Runs:
+    """Recorded runs resampled onto one timeline, so one index is one instant in all of them.
+
+    positions is float32 (runs, steps, balls, 2) and angles (runs, steps, balls);
+    a run that ended earlier than the longest is NaN from then on.
+    """
+    def __init__(self, recorded):
+        if not recorded:
+            raise ValueError("no recorded runs (record them with python -m lato --record)")
+        balls = {positions.shape[1] for _, _, positions, _ in recorded}
+        if len(balls) != 1:
+            raise ValueError("runs with different numbers of balls")
+        self.names = [name for name, _, _, _ in recorded]
+        self.dt = min(float(np.median(np.diff(times))) for _, times, _, _ in recorded if len(times) > 1)
+        end = max(float(times[-1]) for _, times, _, _ in recorded)
+        self.times = np.arange(int(round(end / self.dt)) + 1) * self.dt
+        shape = (len(recorded), len(self.times), balls.pop())
+        self.positions = np.full(shape + (2,), np.nan, dtype=np.float32)
+        self.angles = np.full(shape, np.nan, dtype=np.float32)
+        for i, (_, times, positions, angles) in enumerate(recorded):
+            # The latest recorded sample at or before each instant of the timeline
+            index = np.searchsorted(times, self.times + self.dt / 2, side="right") - 1
+            inside = (index >= 0) & (self.times <= times[-1] + self.dt / 2)
+            self.positions[i, inside] = positions[index[inside]]
+            self.angles[i, inside] = angles[index[inside]]
+
+    def __len__(self):
+        return len(self.names)
+
+def load_runs(paths):
+    return Runs([run for path in _files(paths) for run in _trajectories(path)])
+
+def _box_blur(image, radius, axis):
+    """Running mean of width 2·radius+1 along an axis, by differences of a cumulative sum"""
+    padded = np.pad(image, [(radius + 1, radius) if a == axis else (0, 0) for a in range(image.ndim)])
+    total = np.cumsum(padded, axis=axis)
+    size = image.shape[axis]
+    upper = np.take(total, np.arange(2 * radius + 1, 2 * radius + 1 + size), axis=axis)
+    lower = np.take(total, np.arange(size), axis=axis)
+    return (upper - lower) / (2 * radius + 1)
+
+def _blur_matrix(size, radius):
+    """(size, size) matrix of three box blurs along one axis: nearly a Gaussian, and round in 2-D"""
+    matrix = np.eye(size, dtype=np.float32)
+    for _ in range(3):
+        matrix = _box_blur(matrix, radius, 0)
+    return matrix.astype(np.float32)
+
+class DensityCanvas:
+    """Point density accumulated in NumPy arrays and shown as one blit per layer.
+
+    World points (px of the recorded simulation) go through one bincount per
+    layer into a (width, height) grid, `scale` times coarser than the screen
+    rect it covers. A blur that is three box blurs per axis turns each point
+    into a round, soft ball of about `radius`; being separable and fixed, it
+    is two matrix products. Each layer tints the background by
+    1 - exp(-opacity · density), so a hundred runs on one spot read darker
+    than ten instead of all saturating alike. The small image is smoothly
+    scaled up to the rect, so past the bincount the cost does not depend on
+    the number of points.
+    """
+    def __init__(self, rect, extent, radius=20.0, scale=2, background=BACKGROUND):
+        self.rect = pygame.Rect(rect)
+        self.width = self.rect.width // scale
+        self.height = self.rect.height // scale
+        x_low, x_high, y_low, y_high = extent
+        # One scale for both axes, centred, so balls stay round
+        self.pixels_per_unit = min(self.width / max(x_high - x_low, 1e-9),
+                                   self.height / max(y_high - y_low, 1e-9))
+        self.origin = (x_low - (self.width / self.pixels_per_unit - (x_high - x_low)) / 2,
+                       y_low - (self.height / self.pixels_per_unit - (y_high - y_low)) / 2)
+        blur_radius = max(1, int(round(radius * self.pixels_per_unit / 3)))
+        self.blur_columns = _blur_matrix(self.width, blur_radius)
+        self.blur_rows = _blur_matrix(self.height, blur_radius).T
+        # Density of one isolated ball at its centre, so opacity is per run
+        self.peak = float(self.blur_columns.max() * self.blur_rows.max())
+        self.background = background
+        self.surface = pygame.Surface((self.width, self.height))
+        self.layers = {}  # color -> surface of that color whose alpha is set per frame
+        self._alpha = np.empty((self.width, self.height), dtype=np.float32)
+
+    def density(self, points, weights=None):
+        """(width, height) density of world points (n, 2); NaN points are skipped"""
+        x = (points[:, 0] - self.origin[0]) * self.pixels_per_unit
+        y = (points[:, 1] - self.origin[1]) * self.pixels_per_unit
+        inside = (x >= 0) & (x < self.width) & (y >= 0) & (y < self.height)
+        flat = x[inside].astype(np.int32) * self.height + y[inside].astype(np.int32)
+        counts = np.bincount(flat, None if weights is None else weights[inside],
+                             minlength=self.width * self.height)
+        counts = counts.reshape(self.width, self.height).astype(np.float32)
+        return self.blur_columns @ counts @ self.blur_rows * (1 / self.peak)
+
+    def _layer(self, color):
+        layer = self.layers.get(color)
+        if layer is None:
+            layer = self.layers[color] = pygame.Surface((self.width, self.height), pygame.SRCALPHA)
+            layer.fill(color)
+        return layer
+
+    def draw(self, screen, layers, opacity):
+        """Composite (density, color) layers over the background and blit them to the rect"""
+        self.surface.fill(self.background)
+        for density, color in layers:
+            layer = self._layer(color)
+            # 255 · (1 - exp(-opacity · density)), written straight into the layer's alpha
+            alpha = self._alpha
+            np.multiply(density, -opacity, out=alpha)
+            np.exp(alpha, out=alpha)
+            np.multiply(alpha, -255, out=alpha)
+            alpha += 255
+            np.copyto(pygame.surfarray.pixels_alpha(layer), alpha, casting="unsafe")
+            self.surface.blit(layer, (0, 0))
+        pygame.transform.smoothscale(self.surface, self.rect.size, screen.subsurface(self.rect))
+
+def angle_strip(runs, size):
+    """Surface with the θ(t) density of every run and ball across the whole timeline"""
+    width, height = size
+    steps = len(runs.times)
+    # A column per step at most (scaled up after), so short runs leave no gaps
+    columns = min(steps, width)
+    limit = max(float(np.nanmax(np.abs(runs.angles))), 1.0)
+    pixels = np.empty((columns, height, 3), dtype=np.float32)
+    pixels[:] = BACKGROUND
+    step_columns = np.broadcast_to((np.arange(steps) * columns // steps)[None, :], runs.angles.shape[:2])
+    for ball, color in zip(range(runs.angles.shape[2]), BALL_COLORS):
+        rows = (limit - runs.angles[:, :, ball]) / (2 * limit) * (height - 1)
+        valid = np.isfinite(rows)
+        flat = step_columns[valid] * height + rows[valid].astype(np.int32)
+        counts = np.bincount(flat, minlength=columns * height).reshape(columns, height)
+        # Log density, so rare excursions stay visible next to the common paths
+        alpha = np.log1p(counts) / max(np.log1p(counts.max()), 1e-9)
+        pixels += alpha[..., None] * (np.asarray(color, dtype=np.float32) - pixels)
+    surface = pygame.Surface((columns, height))
+    pygame.surfarray.blit_array(surface, pixels.astype(np.uint8))
+    return pygame.transform.smoothscale(surface, size), limit
+
+class RunViewer:
+    """What is on screen: the instant, the mode and how the runs are drawn.
+
+    overlay draws every run's balls at the current instant; onion adds
+    `onion_length` earlier instants, `onion_spacing` steps apart, fading
+    with age, the same instants for every run.
+    """
+    def __init__(self, runs, radius=20.0, scale=2, opacity=None):
+        self.runs = runs
+        self.index = 0
+        self.mode = "overlay"
+        self.onion_length = 8
+        self.onion_spacing = 6
+        # Ink per run: by default about ten runs on one spot are needed to saturate it
+        self.opacity = opacity if opacity is not None else min(0.35, 10.0 / len(runs))
+        self.playing = False
+        self.scrubbing = False
+        positions = runs.positions.reshape(-1, 2)
+        (x_low, y_low), (x_high, y_high) = np.nanmin(positions, axis=0), np.nanmax(positions, axis=0)
+        extent = (x_low - radius, x_high + radius, y_low - radius, y_high + radius)
+        self.canvas = DensityCanvas((0, 0, WIDTH, SCENE_HEIGHT), extent, radius, scale)
+        self.strip_rect = pygame.Rect(10, STRIP_TOP, WIDTH - 20, STRIP_HEIGHT)
+        self.strip, self.angle_limit = angle_strip(runs, self.strip_rect.size)
+        self.draw_ms = 0.0
+
+    @property
+    def steps(self):
+        return len(self.runs.times)
+
+    def seek(self, index):
+        self.index = min(max(int(index), 0), self.steps - 1)
+
+    def scrub(self, x):
+        """Timeline position of a mouse x over the strip"""
+        self.seek((x - self.strip_rect.x) / self.strip_rect.width * (self.steps - 1))
+
+    def instants(self):
+        """Timeline indices drawn now and the weight of each"""
+        if self.mode == "overlay":
+            return np.array([self.index]), np.ones(1, dtype=np.float32)
+        ages = np.arange(self.onion_length + 1)
+        indices = self.index - ages * self.onion_spacing
+        keep = indices >= 0
+        return indices[keep], (1 - ages / (self.onion_length + 1))[keep].astype(np.float32)
+
+    def look(self):
+        return self.index, self.mode, self.onion_length, self.onion_spacing, round(self.opacity, 2)
+
+    def draw(self, screen):
+        started = time.perf_counter()
+        indices, weights = self.instants()
+        layers = []
+        for ball, color in zip(range(self.runs.positions.shape[2]), BALL_COLORS):
+            points = self.runs.positions[:, indices, ball]          # (runs, instants, 2)
+            point_weights = np.broadcast_to(weights, points.shape[:2])
+            layers.append((self.canvas.density(points.reshape(-1, 2), point_weights.reshape(-1)), color))
+        screen.fill(BACKGROUND)
+        self.canvas.draw(screen, layers, self.opacity)
+
+        screen.blit(self.strip, self.strip_rect)
+        pygame.draw.rect(screen, CURSOR_COLOR, self.strip_rect, 1)
+        x = self.strip_rect.x + self.index / max(self.steps - 1, 1) * self.strip_rect.width
+        pygame.draw.line(screen, CURSOR_COLOR, (x, self.strip_rect.top), (x, self.strip_rect.bottom), 2)
+
+        font = get_font(24)
+        screen.blit(font.render(f"θ ±{self.angle_limit:.0f}°", True, TEXT_COLOR), (14, STRIP_TOP - 22))
+        mode = self.mode if self.mode == "overlay" else \
+            f"onion {self.onion_length}×{self.onion_spacing * self.runs.dt:.2f} s"
+        status = (f"{len(self.runs)} runs   t = {self.runs.times[self.index]:6.2f} s   {mode}   "
+                  f"opacity {self.opacity:.2f}   draw {self.draw_ms:4.1f} ms")
+        screen.blit(font.render(status, True, TEXT_COLOR), (10, 10))
+        help_text = ("drag the strip: scrub   space: play   left/right: step   m: mode   "
+                     "up/down: onion length   +/-: opacity")
+        screen.blit(font.render(help_text, True, TEXT_COLOR), (10, HEIGHT - 30))
+        self.draw_ms = (time.perf_counter() - started) * 1000
+
+    def handle(self, event):
+        """Apply one input event; returns False on quit"""
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and self.strip_rect.collidepoint(event.pos):
+            self.scrubbing = True
+            self.scrub(event.pos[0])
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.scrubbing = False
+        elif event.type == pygame.MOUSEMOTION and self.scrubbing:
+            self.scrub(event.pos[0])
+        elif event.type == pygame.KEYDOWN:
+            step = 10 if event.mod & pygame.KMOD_SHIFT else 1
+            if event.key == pygame.K_ESCAPE:
+                return False
+            if event.key == pygame.K_SPACE:
+                self.playing = not self.playing
+            elif event.key == pygame.K_RIGHT:
+                self.seek(self.index + step)
+            elif event.key == pygame.K_LEFT:
+                self.seek(self.index - step)
+            elif event.key == pygame.K_HOME:
+                self.seek(0)
+            elif event.key == pygame.K_END:
+                self.seek(self.steps - 1)
+            elif event.key == pygame.K_m:
+                self.mode = MODES[(MODES.index(self.mode) + 1) % len(MODES)]
+            elif event.key == pygame.K_UP:
+                self.onion_length = min(self.onion_length + 1, 60)
+            elif event.key == pygame.K_DOWN:
+                self.onion_length = max(self.onion_length - 1, 1)
+            elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                self.opacity = min(self.opacity * 1.25, 5.0)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                self.opacity = max(self.opacity / 1.25, 0.01)
+        return True
+
+def main(paths, mode="overlay", radius=20.0, scale=2, opacity=None, frames=None):
+    """Window over recorded runs; frames is a number of frames to quit after"""
+    runs = load_runs(paths)
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption(f"Recorded runs ({len(runs)})")
+    clock = pygame.time.Clock()
+    viewer = RunViewer(runs, radius, scale, opacity)
+    viewer.mode = mode
+    shown = None
+    frame = 0
+    draw_times = []
+
+    running = True
+    while running:
+        frame += 1
+        if frames is not None and frame > frames:
+            break
+        for event in pygame.event.get():
+            running = viewer.handle(event) and running
+        if viewer.playing:
+            # Real time: as many recorded steps as the last frame took
+            viewer.seek(viewer.index + max(1, round(clock.get_time() / 1000.0 / runs.dt)))
+            if viewer.index == viewer.steps - 1:
+                viewer.playing = False
+
+        # Nothing changed, nothing to draw
+        if viewer.look() != shown:
+            viewer.draw(screen)
+            draw_times.append(viewer.draw_ms)
+            pygame.display.update()
+            shown = viewer.look()
+        clock.tick(60)
+
+    pygame.quit()
+    if draw_times:
+        print(f"{len(draw_times)} frames drawn, {np.mean(draw_times):.1f} ms mean, "
+              f"{np.percentile(draw_times, 95):.1f} ms p95")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="View many recorded runs at once")
+    parser.add_argument("paths", nargs="+",
+                        help="python -m lato --record outputs (.json), cached trajectories or dataset "
+                             "shards (.npz), or directories of them")
+    parser.add_argument("--mode", choices=MODES, default="overlay")
+    parser.add_argument("--radius", type=float, default=20.0, help="ball radius in simulation px")
+    parser.add_argument("--scale", type=int, default=2, help="screen pixels per density cell")
+    parser.add_argument("--opacity", type=float, help="ink of one run (default: by the number of runs)")
+    parser.add_argument("--frames", type=int, help="quit after this many frames")
+    args = parser.parse_args()
+    try:
+        main(args.paths, args.mode, args.radius, args.scale, args.opacity, args.frames)
+    except ValueError as error:
+        sys.exit(str(error))
@@ -0,0 +1,175 @@
+from collections import OrderedDict
+
+import pygame
+
+_fonts = {}
+
+def get_font(size):
+    """Shared default font of a size; loading one reads the font file"""
+    font = _fonts.get(size)
+    if font is None:
+        font = _fonts[size] = pygame.font.Font(None, size)
+    return font
+
+def coalesce_motion(events):
+    """Merge each run of consecutive MOUSEMOTION events into its last one.
+
+    Only where the mouse ended up matters to the widgets, so a burst of motion
+    costs one hit test. Clicks in between split the runs, so a press still sees
+    the position it happened at. rel is summed over the run.
+    """
+    merged = []
+    for event in events:
+        if event.type == pygame.MOUSEMOTION and merged and merged[-1].type == pygame.MOUSEMOTION:
+            previous = merged[-1]
+            rel = (previous.rel[0] + event.rel[0], previous.rel[1] + event.rel[1])
+            merged[-1] = pygame.event.Event(pygame.MOUSEMOTION, pos=event.pos, rel=rel,
+                                            buttons=event.buttons)
+        else:
+            merged.append(event)
+    return merged
+
+class HitIndex:
+    """Uniform grid over the window: each cell lists the widgets whose rect overlaps it.
+
+    A lookup only tests the few widgets in one cell, however many the panel has.
+    """
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def _cells(self, rect):
+        size = self.cell_size
+        for cx in range(rect.left // size, (rect.right - 1) // size + 1):
+            for cy in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                yield cx, cy
+
+    def add(self, widget):
+        for cell in self._cells(widget.rect):
+            self.cells.setdefault(cell, []).append(widget)
+
+    def remove(self, widget):
+        for cell in self._cells(widget.rect):
+            self.cells[cell].remove(widget)
+
+    def at(self, pos):
+        """Topmost (last added) widget hit at pos, or None"""
+        cell = (int(pos[0]) // self.cell_size, int(pos[1]) // self.cell_size)
+        for widget in reversed(self.cells.get(cell, ())):
+            if widget.hit(pos):
+                return widget
+        return None
+
+class Widget:
+    """Base of the retained widgets: a rect, an interaction state and cached renders.
+
+    Subclasses implement render(look), drawing one appearance into a new
+    surface the size of area, and look(), the hashable key of what the widget
+    shows right now. draw() only blits, rendering a look the first time it is
+    needed; the last MAX_RENDERS looks are kept.
+    """
+    MAX_RENDERS = 32
+
+    def __init__(self, rect, area=None):
+        self.rect = pygame.Rect(rect)  # where it reacts to the mouse
+        self.area = pygame.Rect(area) if area is not None else self.rect.copy()  # what it draws over
+        self.hover = False
+        self.pressed = False
+        self.renders = OrderedDict()
+
+    def hit(self, pos):
+        return self.rect.collidepoint(pos)
+
+    def look(self):
+        return "pressed" if self.pressed else "hover" if self.hover else "normal"
+
+    def render(self, look):
+        raise NotImplementedError
+
+    def image(self):
+        look = self.look()
+        surface = self.renders.get(look)
+        if surface is None:
+            surface = self.renders[look] = self.render(look)
+            if len(self.renders) > self.MAX_RENDERS:
+                self.renders.popitem(last=False)
+        else:
+            self.renders.move_to_end(look)
+        return surface
+
+    def draw(self, window):
+        window.blit(self.image(), self.area.topleft)
+
+    # Input, routed by WidgetLayer. on_press returns whether the widget takes the
+    # mouse until release; on_press, on_drag and on_release return whether the
+    # widget was activated (clicked, value changed...).
+    def on_press(self, pos):
+        self.pressed = True
+        return True, False
+
+    def on_drag(self, pos):
+        return False
+
+    def on_release(self, pos):
+        self.pressed = False
+        return False
+
+class WidgetLayer:
+    """Routes mouse input to widgets through a HitIndex.
+
+    handle(events) coalesces motion, updates hover and pressed states and
+    returns the events no widget used, plus the widgets activated by this
+    batch, in order. Only the widget under the mouse and the one holding it
+    are ever touched, so the cost does not grow with the number of widgets.
+    """
+    def __init__(self, cell_size=64):
+        self.widgets = []
+        self.index = HitIndex(cell_size)
+        self.hovered = None
+        self.captured = None
+
+    def add(self, widget):
+        self.widgets.append(widget)
+        self.index.add(widget)
+        return widget
+
+    def _set_hover(self, widget):
+        if widget is not self.hovered:
+            if self.hovered is not None:
+                self.hovered.hover = False
+            if widget is not None:
+                widget.hover = True
+            self.hovered = widget
+
+    def handle(self, events):
+        unused = []
+        activated = []
+        for event in coalesce_motion(events):
+            if event.type == pygame.MOUSEMOTION:
+                if self.captured is not None:
+                    if self.captured.on_drag(event.pos):
+                        activated.append(self.captured)
+                    continue
+                self._set_hover(self.index.at(event.pos))
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                widget = self.index.at(event.pos)
+                self._set_hover(widget)
+                if widget is not None:
+                    capture, fired = widget.on_press(event.pos)
+                    if capture:
+                        self.captured = widget
+                    if fired:
+                        activated.append(widget)
+                    continue
+            elif event.type == pygame.MOUSEBUTTONUP and event.button == 1 and self.captured is not None:
+                widget, self.captured = self.captured, None
+                if widget.on_release(event.pos):
+                    activated.append(widget)
+                self._set_hover(self.index.at(event.pos))
+                continue
+            unused.append(event)
+        return unused, activated
+
+    def draw(self, window):
+        for widget in self.widgets:
+            widget.draw(window)